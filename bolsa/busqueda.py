@@ -0,0 +1,56 @@
+"""
+Búsqueda de personas por nombre o carnet, compartida por los listados de
+aspirantes, bajas y contratos.
+
+Cada Aspirante guarda en `busqueda` su nombre completo y CI en minúsculas y
+sin tildes. Esa columna tiene un índice GIN de trigramas (pg_trgm), que
+resuelve tanto el ILIKE '%texto%' como la similitud por palabra, de modo
+que la búsqueda no recorre la tabla ni concatena nombres en cada fila.
+"""
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, Q, Value
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes/diéresis y con espacios simples ('Ñúñez  Pérez' -> 'nunez perez')."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def texto_busqueda(aspirante):
+    return normalizar(f"{aspirante.nombre} {aspirante.papellido} {aspirante.sapellido} {aspirante.doc_identidad}")
+
+
+def relevancia(texto, prefijo=''):
+    """Expresión de relevancia (0..1) de `texto` frente al nombre/CI, para anotar resultados."""
+    consulta = normalizar(texto)
+    if not consulta:
+        return Value(0.0, output_field=FloatField())
+    return TrigramWordSimilarity(Value(consulta), f'{prefijo}busqueda')
+
+
+def buscar(qs, texto, prefijo=''):
+    """
+    Filtra `qs` por `texto` y anota `relevancia` (0..1) para ordenar.
+    `prefijo` es la ruta hasta el Aspirante ('' en Aspirante, 'aspirante__' en CAlta).
+
+    Coincide si todas las palabras aparecen en el nombre/CI o si el texto se
+    parece a alguna palabra (tolera faltas de ortografía: 'yoandri' ~ 'yoandry').
+    Solo usa la columna indexada: no añadir condiciones con OR sobre otras
+    tablas, que impedirían usar el índice de trigramas.
+    """
+    consulta = normalizar(texto)
+    if not consulta:
+        # Texto que se queda vacío al normalizar (solo tildes sueltas): no filtra
+        return qs.annotate(relevancia=relevancia(consulta))
+
+    campo = f'{prefijo}busqueda'
+    todas = Q()
+    for palabra in consulta.split():
+        todas &= Q(**{f'{campo}__contains': palabra})
+    condicion = todas | Q(**{f'{campo}__trigram_word_similar': consulta})
+
+    return qs.filter(condicion).annotate(relevancia=relevancia(consulta, prefijo))
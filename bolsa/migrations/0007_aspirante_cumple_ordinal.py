@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bolsa', '0006_poblar_fecha_nacimiento'),
+        ('nomencladores', '0011_poblar_valor_numerico_grupos'),
+        ('strorganizativa', '0011_alter_unidadorganizativa_orden_informe_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aspirante',
+            name='cumple_ordinal',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='aspirante',
+            index=models.Index(fields=['estado', 'cumple_ordinal'], name='aspirante_estado_cumple_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def poblar_cumple_ordinal(apps, schema_editor):
+    Aspirante = apps.get_model('bolsa', 'Aspirante')
+
+    # Un solo UPDATE: mes*100 + día a partir de la fecha ya calculada
+    Aspirante.objects.filter(fecha_nacimiento__isnull=False).update(
+        cumple_ordinal=ExtractMonth(F('fecha_nacimiento')) * 100 + ExtractDay(F('fecha_nacimiento'))
+    )
+
+
+def revertir(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+    ('bolsa', '0007_aspirante_cumple_ordinal'),  # ← Depende de la migración de esquema
+    ]
+    operations = [
+        migrations.RunPython(poblar_cumple_ordinal, revertir),
+    ]
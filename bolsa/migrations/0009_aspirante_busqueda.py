@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:32
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bolsa', '0008_poblar_cumple_ordinal'),
+        ('nomencladores', '0011_poblar_valor_numerico_grupos'),
+        ('strorganizativa', '0011_alter_unidadorganizativa_orden_informe_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='aspirante',
+            name='busqueda',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='aspirante',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='aspirante_busqueda_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from bolsa.busqueda import texto_busqueda
+
+
+def poblar_busqueda(apps, schema_editor):
+    Aspirante = apps.get_model('bolsa', 'Aspirante')
+
+    pendientes = []
+    for aspirante in Aspirante.objects.only('nombre', 'papellido', 'sapellido', 'doc_identidad').iterator():
+        aspirante.busqueda = texto_busqueda(aspirante)
+        pendientes.append(aspirante)
+
+    Aspirante.objects.bulk_update(pendientes, ['busqueda'], batch_size=500)
+
+
+def revertir(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+    ('bolsa', '0009_aspirante_busqueda'),  # ← Depende de la migración de esquema
+    ]
+    operations = [
+        migrations.RunPython(poblar_busqueda, revertir),
+    ]
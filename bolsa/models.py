@@ -1,10 +1,53 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
 from strorganizativa.models import CargoPlantilla, UnidadOrganizativa
 from nomencladores.models import NTridente, NSalario, NJornada, NEspecialidad, NMunicipio, NProvincia
 from django.core.validators import MinValueValidator
-from datetime import date
+from datetime import date, timedelta
 from auditoria.models import Base
 from django.core.exceptions import ValidationError
+from .busqueda import texto_busqueda
+class AspiranteQuerySet(models.QuerySet):
+
+    def proximos_cumpleannos(self, n=None, hoy=None, dias=None):
+        """
+        Próximos `n` cumpleaños a partir de `hoy` (incluido), opcionalmente
+        limitados a los próximos `dias`. Cruza el fin de año sin lógica extra:
+        primero el tramo [hoy, 31/12] y luego [01/01, hoy), cada uno como un
+        rango sobre el índice de cumple_ordinal.
+
+        Devuelve una lista de Aspirante con dos atributos añadidos:
+        `proximo_cumple` (date) y `dias_para_cumple` (int).
+        """
+        hoy = hoy or date.today()
+        desde = hoy.month * 100 + hoy.day
+        qs = self.filter(cumple_ordinal__isnull=False).order_by('cumple_ordinal')
+
+        if dias is None or dias >= 365:
+            tramos = [qs.filter(cumple_ordinal__gte=desde), qs.filter(cumple_ordinal__lt=desde)]
+        else:
+            fin = hoy + timedelta(days=dias)
+            hasta = fin.month * 100 + fin.day
+            if desde <= hasta:
+                tramos = [qs.filter(cumple_ordinal__gte=desde, cumple_ordinal__lte=hasta)]
+            else:
+                tramos = [qs.filter(cumple_ordinal__gte=desde), qs.filter(cumple_ordinal__lte=hasta)]
+
+        resultado = []
+        for tramo in tramos:
+            faltan = None if n is None else n - len(resultado)
+            if faltan is not None and faltan <= 0:
+                break
+            resultado.extend(tramo if faltan is None else tramo[:faltan])
+
+        for aspirante in resultado:
+            aspirante.proximo_cumple = aspirante.siguiente_cumpleannos(hoy)
+            aspirante.dias_para_cumple = (aspirante.proximo_cumple - hoy).days
+        return resultado
+
+
 # CONTACTO
 class Contacto(Base):
 
@@ -71,6 +114,10 @@ class Aspirante(Contacto):
         verbose_name="Fecha de Nacimiento",
         help_text="Calculada automáticamente desde el Carnet de Identidad."
     )
+    # Mes*100 + día de fecha_nacimiento (ej. 24 de julio -> 724). Indexado para buscar cumpleaños por rango.
+    cumple_ordinal = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    # Nombre completo + CI normalizados (ver bolsa/busqueda.py). Índice GIN de trigramas.
+    busqueda = models.CharField(max_length=150, blank=True, default='', editable=False)
 
     especialidad = models.ForeignKey(NEspecialidad,null=True, blank=True, on_delete=models.RESTRICT)
     
@@ -82,9 +129,15 @@ class Aspirante(Contacto):
     tcamisa = models.CharField(max_length=5, null=True, blank=True)
     tzapatos = models.IntegerField(null=True, blank=True)
 
+    objects = AspiranteQuerySet.as_manager()
+
     class Meta:
         verbose_name = ("Aspirante")
         verbose_name_plural = ("Aspirantes")
+        indexes = [
+            models.Index(fields=['estado', 'cumple_ordinal'], name='aspirante_estado_cumple_idx'),
+            GinIndex(fields=['busqueda'], name='aspirante_busqueda_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def clean(self):
         super().clean()
@@ -116,10 +169,59 @@ class Aspirante(Contacto):
         except ValueError:
             return None
 
+    @staticmethod
+    def _calcular_cumple_ordinal(fecha_nacimiento):
+        return fecha_nacimiento.month * 100 + fecha_nacimiento.day if fecha_nacimiento else None
+
+    def siguiente_cumpleannos(self, hoy=None):
+        """Fecha del próximo cumpleaños (hoy incluido). El 29/02 se celebra el 28/02 en años no bisiestos."""
+        if not self.fecha_nacimiento:
+            return None
+        hoy = hoy or date.today()
+        mm, dd = self.fecha_nacimiento.month, self.fecha_nacimiento.day
+        for anno in (hoy.year, hoy.year + 1):
+            try:
+                fecha = date(anno, mm, dd)
+            except ValueError:
+                fecha = date(anno, mm, 28)
+            if fecha >= hoy:
+                return fecha
+
     def save(self, *args, **kwargs):
         self.fecha_nacimiento = self._calcular_fecha_nacimiento(self.doc_identidad)
+        self.cumple_ordinal = self._calcular_cumple_ordinal(self.fecha_nacimiento)
+        self.busqueda = texto_busqueda(self)
+        if kwargs.get('update_fields'):
+            # Los campos derivados viajan con sus campos de origen
+            campos = set(kwargs['update_fields'])
+            if 'fecha_nacimiento' in campos:
+                campos.add('cumple_ordinal')
+            if campos & {'nombre', 'papellido', 'sapellido', 'doc_identidad'}:
+                campos.add('busqueda')
+            kwargs['update_fields'] = campos
         self.full_clean()  # asegura que se ejecute clean()
-        super().save(*args, **kwargs)
+
+        # Los contadores de plazas solo cuentan trabajadores ACTIVO: al entrar o
+        # salir de ese estado se suman o restan las plazas de sus contratos
+        cambia_estado = not self._state.adding and (
+            not kwargs.get('update_fields') or 'estado' in kwargs['update_fields']
+        )
+        with transaction.atomic():
+            estado_anterior = (
+                Aspirante.objects.filter(pk=self.pk).values_list('estado', flat=True).first()
+                if cambia_estado else None
+            )
+            super().save(*args, **kwargs)
+            if cambia_estado and (estado_anterior == 'ACTIVO') != (self.estado == 'ACTIVO'):
+                self._ajustar_plazas(1 if self.estado == 'ACTIVO' else -1)
+
+    def _ajustar_plazas(self, signo):
+        """Suma (1) o resta (-1) en los contadores de plazas los contratos de este trabajador."""
+        plazas = Counter(
+            (cargo_id, ocupa_plaza)
+            for cargo_id, ocupa_plaza in self.calta_contratos.values_list('cargo_id', 'tipo__ocupa_plaza')
+        )
+        CargoPlantilla.ajustar_plazas({plaza: signo * n for plaza, n in plazas.items()})
 
     def __str__(self):
         return f"{self.nombre} {self.papellido} {self.sapellido or ''}".strip()
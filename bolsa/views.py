@@ -4,8 +4,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.views.generic import ListView, CreateView, DeleteView, UpdateView
 from django.urls import reverse, reverse_lazy
-from django.db.models import Q, ProtectedError, Value, RestrictedError
-from django.db.models.functions import Concat
+from django.db.models import ProtectedError, RestrictedError
 from django.utils.decorators import method_decorator
 from django.core.paginator import Paginator
 from nomencladores.models import NProvincia
@@ -13,6 +12,7 @@ from nomencladores.models import NProvincia
 from django.views.decorators.cache import never_cache
 
 from .models import Aspirante
+from .busqueda import buscar
 from .forms import AspiranteForm
 from usuarios.decorators import write_required
 
@@ -119,16 +119,9 @@ def search_aspirantes(request):
         qs = qs.filter(grado_cientifico=grado_cientifico)
 
     
-    # Filtro de texto (Buscador Inteligente)
+    # Filtro de texto (Buscador Inteligente): índice de trigramas, más relevantes primero
     if query:
-        # Creamos un campo temporal 'nombre_completo' uniendo las partes
-        qs = qs.annotate(
-            nombre_completo=Concat('nombre', Value(' '), 'papellido', Value(' '), 'sapellido')
-        ).filter(
-            # Buscamos en el CI o en el nombre completo armado
-            Q(doc_identidad__icontains=query) |
-            Q(nombre_completo__icontains=query)
-        )
+        qs = buscar(qs, query).order_by('-relevancia', '-id')
 
     # --- INICIO LÓGICA DE PAGINACIÓN ---
     page_num = request.GET.get('page', 1)
@@ -188,16 +181,9 @@ def search_bajas(request):
 
     
 
-    # Filtro de texto (Buscador Inteligente)
+    # Filtro de texto (Buscador Inteligente): índice de trigramas, más relevantes primero
     if query:
-        # Creamos un campo temporal 'nombre_completo' uniendo las partes
-        qs = qs.annotate(
-            nombre_completo=Concat('nombre', Value(' '), 'papellido', Value(' '), 'sapellido')
-        ).filter(
-            # Buscamos en el CI o en el nombre completo armado
-            Q(doc_identidad__icontains=query) |
-            Q(nombre_completo__icontains=query)
-        )
+        qs = buscar(qs, query).order_by('-relevancia', '-id')
     # --- INICIO LÓGICA DE PAGINACIÓN ---
     page_num = request.GET.get('page', 1)
     page_size = request.GET.get('page_size', '8') # Recibe 8 o 10
@@ -9,6 +9,8 @@ from nomencladores.models import NSalario, NGrupoEscala, NTridente, NRol, NProvi
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
+from django.db import transaction
+from contratos.salarios import recalcular_salarios
 import json
 from operator import attrgetter
 from django.http import JsonResponse
@@ -95,9 +97,11 @@ def actualizar_salario(request):
         if not salario_id or nuevo_monto is None:
             return JsonResponse({"error": "Datos incompletos."}, status=400)
 
-        salario = NSalario.objects.get(id=salario_id)
-        salario.monto = nuevo_monto
-        salario.save()
+        with transaction.atomic():
+            salario = NSalario.objects.get(id=salario_id)
+            salario.monto = nuevo_monto
+            salario.save()
+            recalcular_salarios([salario.grupo_escala_id])
 
         # Devolver la URL con el parámetro de pestaña activa
         return JsonResponse({
@@ -0,0 +1,154 @@
+"""
+Baja masiva de contratos.
+
+Reproduce lo que hace ContratoDeleteView.post para un contrato (movimiento
+de Baja, registro CBaja, aspirante a BAJA, borrado del CAlta y contadores
+de plazas), pero por conjuntos: una consulta para leer y validar todos los
+contratos, bulk_create para los históricos y UPDATE/DELETE por lotes.
+"""
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from auditoria.middleware import get_current_user
+from bolsa.models import Aspirante
+from strorganizativa.models import CargoPlantilla
+
+from .models import CAlta, CBaja, TMovimiento
+from .signals import contratos_actualizados, en_lote
+
+
+def _texto(valor):
+    return valor if valor else "---"
+
+
+def _movimiento_baja(contrato, fecha_baja, fecha_documento, observaciones):
+    """Foto del contrato antes de borrarlo (mismos campos que la baja individual)."""
+    cargo = contrato.cargo
+    departamento = cargo.departamento if cargo else None
+    return TMovimiento(
+        aspirante_id=contrato.aspirante_id,
+        no_expediente=contrato.no_expediente,
+        contrato=None,
+        fecha_efectiva=fecha_baja,
+        fecha_solicitud=fecha_documento,
+        tipo_movimiento="Baja",
+        observaciones=observaciones,
+
+        cargo_anterior=_texto(cargo and cargo.ncargo.descripcion),
+        departamento_anterior=_texto(departamento and departamento.descripcion),
+        grupo_escala_anterior=_texto(cargo and cargo.ncargo.grupo_escala and cargo.ncargo.grupo_escala.nivel),
+        cat_ocupacional_anterior=cargo.ncargo.get_cat_ocupacional_display() if cargo else "---",
+        tipo_salario_anterior=contrato.get_tipo_salario_display() if contrato.tipo_salario else "---",
+        rol_anterior=_texto(cargo and cargo.rol and cargo.rol.tipo),
+        tridente_anterior=str(contrato.tridente) if contrato.tridente else "---",
+        unidad_anterior=_texto(departamento and departamento.unidad_organizativa.descripcion),
+        salario_anterior=contrato.calcular_salario_escala() or 0,
+
+        cargo_nuevo="---",
+        salario_nuevo=0,
+        unidad_nueva="---"
+    )
+
+
+def _registro_cbaja(contrato, fecha_baja, fecha_documento, causa_id, cobro_sistema, actividad,
+                    observaciones, completar_cargo, usuario):
+    return CBaja(
+        aspirante_id=contrato.aspirante_id,
+        no_expediente=contrato.no_expediente,
+        tipo_id=contrato.tipo_id,
+        cargo_id=contrato.cargo_id,
+        reg_militar=contrato.reg_militar,
+        profesional=contrato.profesional,
+        fecha_baja=fecha_baja,
+        fecha_documento=fecha_documento,
+        causa_baja_id=causa_id,
+        fecha_alta=contrato.fecha_alta,
+        tridente_id=contrato.tridente_id,
+        cobro_sistema_pago=cobro_sistema,
+        actividad_realizada=actividad,
+        observaciones=observaciones,
+        completar_cargo=completar_cargo,
+        # bulk_create no pasa por Base.save: la auditoría se asigna aquí
+        created_by=usuario,
+        updated_by=usuario,
+    )
+
+
+def dar_baja_masiva(contratos_ids, fecha_baja, causa_id, fecha_documento=None, cobro_sistema=False,
+                    actividad=None, observaciones='', completar_cargo=False):
+    """
+    Da de baja todos los contratos indicados con la misma fecha y causa.
+    Todo o nada: si algún contrato no existe o tiene un evento posterior a
+    fecha_baja se lanza ValidationError sin tocar nada. Devuelve la lista de
+    movimientos de Baja creados.
+    """
+    ids = {int(pk) for pk in contratos_ids}
+    if not ids:
+        raise ValidationError("No se seleccionó ningún contrato.")
+
+    ultimo_mov = TMovimiento.objects.filter(contrato=OuterRef('pk')).order_by('-fecha_efectiva').values('fecha_efectiva')[:1]
+
+    with transaction.atomic():
+        # 1. Lectura y validación cronológica de todos los contratos (una consulta)
+        contratos = list(
+            CAlta.objects.filter(pk__in=ids)
+            .select_related(
+                'aspirante', 'tipo', 'tridente', 'cargo__rol', 'cargo__ncargo__grupo_escala',
+                'cargo__departamento__unidad_organizativa'
+            )
+            .annotate(ultimo_evento=Subquery(ultimo_mov))
+            .select_for_update(of=('self',))
+            .order_by('no_expediente')
+        )
+        faltan = ids - {c.pk for c in contratos}
+        if faltan:
+            raise ValidationError(f"Contratos inexistentes: {', '.join(map(str, sorted(faltan)))}.")
+
+        errores = []
+        for c in contratos:
+            fecha_limite = c.ultimo_evento or c.fecha_alta
+            if fecha_limite and fecha_baja < fecha_limite:
+                errores.append(f"Exp. {c.no_expediente}: existe un evento posterior el {fecha_limite.strftime('%d/%m/%Y')}")
+        if errores:
+            raise ValidationError(
+                [f"No puede dar Baja con fecha {fecha_baja.strftime('%d/%m/%Y')}."] + errores
+            )
+
+        # 2. Salvar el historial existente (el FK contrato quedará en NULL al borrar)
+        contrato_ref = CAlta.objects.filter(pk=OuterRef('contrato_id'))
+        TMovimiento.objects.filter(contrato_id__in=ids).update(
+            aspirante_id=Subquery(contrato_ref.values('aspirante_id')[:1]),
+            no_expediente=Subquery(contrato_ref.values('no_expediente')[:1]),
+        )
+
+        # 3. Históricos de baja
+        usuario = get_current_user()
+        movimientos = TMovimiento.objects.bulk_create([
+            _movimiento_baja(c, fecha_baja, fecha_documento, observaciones) for c in contratos
+        ])
+        CBaja.objects.bulk_create([
+            _registro_cbaja(c, fecha_baja, fecha_documento, causa_id, cobro_sistema, actividad,
+                            observaciones, completar_cargo, usuario)
+            for c in contratos
+        ])
+
+        # 4. Aspirantes a BAJA y borrado de los contratos
+        # El DELETE emite post_delete por contrato: los receptores por fila se
+        # silencian y el dashboard, los informes y los períodos se invalidan una vez
+        aspirantes_ids = {c.aspirante_id for c in contratos}
+        Aspirante.objects.filter(pk__in=aspirantes_ids).update(estado='BAJA')
+        with en_lote():
+            CAlta.objects.filter(pk__in=ids).delete()
+        contratos_actualizados.send(
+            sender=CAlta, cargos_ids={c.cargo_id for c in contratos if c.cargo_id}, aspirantes_ids=aspirantes_ids
+        )
+
+        # 5. Liberar las plazas de los cargos afectados (un UPDATE con F())
+        # (solo cuentan los de trabajadores que estaban ACTIVO, ver refrescar_conteos)
+        liberadas = Counter(c._plaza() for c in contratos if c.aspirante.estado == 'ACTIVO')
+        CargoPlantilla.ajustar_plazas({plaza: -n for plaza, n in liberadas.items()})
+
+    return movimientos
@@ -382,8 +382,8 @@ class CAltaForm(forms.ModelForm):
                     check_capacity = False
             
             if check_capacity:
-                if cargo.cant_cubierta_real >= cargo.cant_aprobada:
-                    self.add_error('cargo', f'El cargo "{cargo}" no tiene plazas disponibles ({cargo.cant_cubierta_real}/{cargo.cant_aprobada}).')
+                if cargo.cant_cubierta >= cargo.cant_aprobada:
+                    self.add_error('cargo', f'El cargo "{cargo}" no tiene plazas disponibles ({cargo.cant_cubierta}/{cargo.cant_aprobada}).')
         
         return cleaned_data
     
@@ -586,4 +586,29 @@ class ExportarContratoWordForm(forms.Form):
         tipo = cleaned_data.get('tipo_documento')
         if tipo == 'modificacion' and not cleaned_data.get('observaciones', '').strip():
             self.add_error('observaciones', 'Debe indicar el motivo del cambio para generar una modificación.')
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class ExportarContratosLoteForm(ExportarContratoWordForm):
+    """Exportación en lote: los mismos datos del documento, para varios contratos."""
+    FORMATO_CHOICES = [
+        ('zip', 'ZIP (un documento por contrato)'),
+        ('docx', 'Un solo documento (un contrato por página)'),
+    ]
+
+    # Ids separados por coma; vacío = los contratos del filtro del listado
+    contratos = forms.CharField(required=False, widget=forms.HiddenInput)
+    formato = forms.ChoiceField(
+        choices=FORMATO_CHOICES,
+        initial='zip',
+        widget=forms.RadioSelect(attrs={'class': 'form-check-input'})
+    )
+
+    # Generar como tarea en segundo plano y seguir el progreso (lotes grandes)
+    segundo_plano = forms.BooleanField(required=False)
+
+    def clean_contratos(self):
+        try:
+            return [int(pk) for pk in self.cleaned_data.get('contratos', '').split(',') if pk.strip()]
+        except ValueError:
+            raise forms.ValidationError('Selección de contratos inválida.')
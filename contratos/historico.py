@@ -0,0 +1,186 @@
+"""
+Línea de tiempo laboral de un trabajador (altas, recontrataciones,
+movimientos y bajas).
+
+Se cargan las altas activas, las bajas y los movimientos del trabajador en
+tres consultas y los hitos se arman en memoria. La usan la vista JSON
+historico_trabajador y el PDF ExportarHistoricoPDFView.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Q
+
+from .models import CAlta, CBaja, TMovimiento
+
+# Movimientos que el sistema crea por detrás: no son hitos por sí mismos
+MOVIMIENTOS_SISTEMA = ('Baja', 'Alta Inicial')
+
+COLORES_HITO = {
+    'Alta Inicial': 'text-success',      # Verde
+    'Recontratación': 'text-primary',    # Azul
+    'Movimiento Salario': 'text-gold',   # Dorado
+    'Movimiento Cargo': 'text-orange',   # Naranja
+    'Baja': 'text-danger'                # Rojo
+}
+
+CARGO_RELACIONADO = ('cargo__ncargo', 'cargo__departamento__unidad_organizativa')
+
+
+def fmt_dinero(valor):
+    try: return f"{float(valor):.2f}"
+    except (TypeError, ValueError): return "0.00"
+
+
+def _cargo_y_unidad(contrato):
+    if not contrato.cargo:
+        return "---", "---"
+    unidad = contrato.cargo.departamento.unidad_organizativa.descripcion if contrato.cargo.departamento else "---"
+    return contrato.cargo.ncargo.descripcion, unidad
+
+
+class _Movimientos:
+    """Índices en memoria sobre los TMovimiento del trabajador (orden cronológico)."""
+
+    def __init__(self, movimientos):
+        self.todos = movimientos
+
+    def id_ultimo(self, aspirante_id, expediente, tipo):
+        # Equivale a .first() con el orden por defecto (-fecha_efectiva)
+        candidatos = [
+            m for m in self.todos
+            if m.aspirante_id == aspirante_id and m.no_expediente == expediente and m.tipo_movimiento == tipo
+        ]
+        return max(candidatos, key=lambda m: m.fecha_efectiva).pk if candidatos else None
+
+    def primero_real(self, condicion):
+        # Primer movimiento real (se ignora el "Alta Inicial" fantasma)
+        return next((m for m in self.todos if m.tipo_movimiento != 'Alta Inicial' and condicion(m)), None)
+
+
+def _hito(id_, fecha, evento, expediente, unidad, cargo, salario, es_baja=False):
+    return {
+        'id': id_,
+        'fecha_orden': fecha,
+        'fecha_inicio': fecha,
+        'evento': evento,
+        'expediente': expediente,
+        'unidad': unidad,
+        'cargo': cargo,
+        'salario': salario,
+        'es_baja': es_baja
+    }
+
+
+def linea_tiempo(aspirante):
+    """
+    Devuelve (encabezado, hitos) del trabajador. Cada hito lleva evento,
+    expediente, unidad, cargo, salario, fecha_inicio_str, fecha_fin y
+    estado_clase, ordenados cronológicamente.
+    """
+    altas = list(CAlta.objects.filter(aspirante=aspirante).select_related(*CARGO_RELACIONADO))
+    bajas = list(CBaja.objects.filter(aspirante=aspirante).select_related(*CARGO_RELACIONADO))
+    movs = _Movimientos(list(
+        TMovimiento.objects.filter(Q(aspirante=aspirante) | Q(contrato__aspirante=aspirante))
+        .order_by('fecha_efectiva', 'pk')
+    ))
+
+    # Expediente vitalicio: contrato activo más reciente o, si está de baja, la última baja
+    contrato_data = max(altas or bajas, key=lambda c: c.fecha_alta or date.min, default=None)
+    encabezado = {
+        'nombre_completo': f"{aspirante.nombre} {aspirante.papellido} {aspirante.sapellido}",
+        'ci': aspirante.doc_identidad,
+        'id': aspirante.id,
+        'expediente': contrato_data.no_expediente if contrato_data else "---"
+    }
+
+    hitos = []
+
+    # --- FUENTE A: Altas Activas ---
+    for a in altas:
+        primer_mov = movs.primero_real(lambda m: m.contrato_id == a.pk)
+        if primer_mov and primer_mov.cargo_anterior != "---":
+            cargo_inicial = primer_mov.cargo_anterior
+            unidad_inicial = primer_mov.unidad_anterior or "---"
+            salario_inicial = primer_mov.salario_anterior
+        else:
+            cargo_inicial, unidad_inicial = _cargo_y_unidad(a)
+            salario_inicial = a.calcular_salario_escala()
+
+        hitos.append(_hito(
+            movs.id_ultimo(aspirante.pk, a.no_expediente, 'Alta Inicial'), a.fecha_alta, 'ALTA_PENDIENTE',
+            a.no_expediente, unidad_inicial, cargo_inicial, fmt_dinero(salario_inicial)
+        ))
+
+    # --- FUENTE B: Altas de Contratos Cerrados ---
+    for b in bajas:
+        if not b.fecha_alta:
+            continue
+        primer_mov = movs.primero_real(
+            lambda m: m.aspirante_id == aspirante.pk and m.no_expediente == b.no_expediente
+        )
+        if primer_mov and primer_mov.cargo_anterior != "---":
+            cargo_ini = primer_mov.cargo_anterior
+            unidad_ini = primer_mov.unidad_anterior or "---"
+            salario_ini = primer_mov.salario_anterior
+        else:
+            cargo_ini, unidad_ini = _cargo_y_unidad(b)
+            salario_ini = b.cargo.ncargo.salario_basico if b.cargo else 0
+
+        hitos.append(_hito(
+            movs.id_ultimo(aspirante.pk, b.no_expediente, 'Alta Inicial'), b.fecha_alta, 'ALTA_PENDIENTE',
+            b.no_expediente, unidad_ini, cargo_ini, fmt_dinero(salario_ini)
+        ))
+        # El evento de BAJA explícito
+        hitos.append(_hito(
+            movs.id_ultimo(aspirante.pk, b.no_expediente, 'Baja'), b.fecha_baja, 'Baja',
+            b.no_expediente, "---", "---", "---", es_baja=True
+        ))
+
+    # --- FUENTE C: Movimientos ---
+    for m in movs.todos:
+        if m.aspirante_id != aspirante.pk or m.tipo_movimiento in MOVIMIENTOS_SISTEMA:
+            continue
+        tipo = "Movimiento Salario"
+        if m.unidad_anterior != m.unidad_nueva or m.cargo_anterior != m.cargo_nuevo:
+            tipo = "Movimiento Cargo"
+        hitos.append(_hito(
+            m.pk, m.fecha_efectiva, tipo, m.no_expediente,
+            m.unidad_nueva or "---", m.cargo_nuevo, fmt_dinero(m.salario_nuevo)
+        ))
+
+    return encabezado, _encadenar(hitos, aspirante.estado == 'ACTIVO')
+
+
+def _encadenar(hitos, esta_activo_ahora):
+    """Ordena los hitos y calcula evento definitivo, fecha fin y color de cada uno."""
+    hitos.sort(key=lambda x: x['fecha_orden'])
+    primer_alta = True
+    total = len(hitos)
+
+    for i, item in enumerate(hitos):
+        # 1. Alta Inicial o Recontratación
+        if item['evento'] == 'ALTA_PENDIENTE':
+            item['evento'] = 'Alta Inicial' if primer_alta else 'Recontratación'
+            primer_alta = False
+
+        # 2. Fecha fin
+        if i == total - 1:
+            # Último hito: una Baja queda "en baja"; un contrato solo sigue vivo si está ACTIVO
+            if item['es_baja']:
+                item['fecha_fin'] = "Actualidad"
+            else:
+                item['fecha_fin'] = "Actualidad" if esta_activo_ahora else "Cerrado"
+        else:
+            proximo = hitos[i + 1]
+            if not item['es_baja'] and proximo['es_baja'] and item['expediente'] == proximo['expediente']:
+                # Contrato seguido por su propia Baja: termina el día de la baja
+                item['fecha_fin'] = proximo['fecha_inicio'].strftime('%d/%m/%Y')
+            else:
+                # El estado anterior termina un día antes de que empiece el nuevo hito
+                item['fecha_fin'] = (proximo['fecha_inicio'] - timedelta(days=1)).strftime('%d/%m/%Y')
+
+        # 3. Color y fecha de inicio formateada
+        item['estado_clase'] = COLORES_HITO.get(item['evento'], 'text-muted')
+        item['fecha_inicio_str'] = item['fecha_inicio'].strftime('%d/%m/%Y')
+
+    return hitos
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from contratos.salarios import diferencias_salario, recalcular_salarios
+
+
+class Command(BaseCommand):
+    help = "Recalcula CAlta.salario_actual según la escala salarial vigente."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grupo', type=int, action='append', dest='grupos',
+            help="Id de NGrupoEscala a recalcular (repetible). Por defecto, todos."
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Solo muestra las diferencias, sin modificar nada."
+        )
+
+    def handle(self, *args, **options):
+        grupos = options['grupos']
+
+        if options['dry_run']:
+            diferencias = diferencias_salario(grupos)
+            for _, expediente, actual, nuevo in diferencias:
+                self.stdout.write(f"{expediente}: {actual if actual is not None else '---'} -> {nuevo if nuevo is not None else '---'}")
+            self.stdout.write(self.style.WARNING(f"Contratos con diferencias: {len(diferencias)} (sin cambios)."))
+            return
+
+        cambiados = recalcular_salarios(grupos)
+        self.stdout.write(self.style.SUCCESS(f"Salarios recalculados: {cambiados} contratos actualizados."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from contratos.periodos import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye desde cero los periodos laborales (plantilla a fecha) a partir de altas, bajas y "
+        "movimientos. La migración 0015_poblar_periodolaboral hace la carga inicial y las señales los "
+        "mantienen al día; esto es para una reparación (o si esa migración no pudo completarse)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--aspirante', type=int, action='append', dest='aspirantes',
+            help="Solo el trabajador indicado (se puede repetir)."
+        )
+
+    def handle(self, *args, **options):
+        total = reconstruir(options['aspirantes'])
+        self.stdout.write(self.style.SUCCESS(f"Periodos laborales reconstruidos: {total} tramos."))
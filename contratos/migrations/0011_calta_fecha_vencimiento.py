@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bolsa', '0008_poblar_cumple_ordinal'),
+        ('contratos', '0010_calta_salario_actual'),
+        ('nomencladores', '0011_poblar_valor_numerico_grupos'),
+        ('strorganizativa', '0011_alter_unidadorganizativa_orden_informe_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calta',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, editable=False, help_text='fecha_alta + duración. Se recalcula en cada guardado; vacía si el contrato no vence.', null=True, verbose_name='Fecha de Vencimiento'),
+        ),
+        migrations.AddIndex(
+            model_name='calta',
+            index=models.Index(condition=models.Q(('fecha_vencimiento__isnull', False)), fields=['fecha_vencimiento'], name='calta_vencimiento_idx'),
+        ),
+    ]
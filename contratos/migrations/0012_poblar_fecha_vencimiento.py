@@ -0,0 +1,26 @@
+from django.db import migrations
+from datetime import timedelta
+
+
+def poblar_fecha_vencimiento(apps, schema_editor):
+    CAlta = apps.get_model('contratos', 'CAlta')
+
+    pendientes = []
+    for contrato in CAlta.objects.filter(fecha_alta__isnull=False, duracion__isnull=False).only('fecha_alta', 'duracion').iterator():
+        contrato.fecha_vencimiento = contrato.fecha_alta + timedelta(days=contrato.duracion)
+        pendientes.append(contrato)
+
+    CAlta.objects.bulk_update(pendientes, ['fecha_vencimiento'], batch_size=500)
+
+
+def revertir(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+    ('contratos', '0011_calta_fecha_vencimiento'),  # ← Depende de la migración de esquema
+    ]
+    operations = [
+        migrations.RunPython(poblar_fecha_vencimiento, revertir),
+    ]
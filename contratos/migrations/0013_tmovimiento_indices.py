@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bolsa', '0010_poblar_busqueda'),
+        ('contratos', '0012_poblar_fecha_vencimiento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tmovimiento',
+            index=models.Index(fields=['aspirante', 'no_expediente', 'fecha_efectiva'], name='tmov_asp_exp_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tmovimiento',
+            index=models.Index(fields=['contrato', 'fecha_efectiva'], name='tmov_contrato_fecha_idx'),
+        ),
+    ]
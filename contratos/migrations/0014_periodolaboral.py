@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:07
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bolsa', '0010_poblar_busqueda'),
+        ('contratos', '0013_tmovimiento_indices'),
+        ('strorganizativa', '0015_poblar_unidadjerarquia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoLaboral',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('no_expediente', models.CharField(max_length=20)),
+                ('cargo_nombre', models.CharField(max_length=255)),
+                ('unidad_nombre', models.CharField(max_length=255)),
+                ('salario', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('fecha_desde', models.DateField()),
+                ('fecha_hasta', models.DateField(blank=True, null=True)),
+                ('aspirante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periodos_laborales', to='bolsa.aspirante')),
+                ('cargo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='periodos_laborales', to='strorganizativa.cargoplantilla')),
+                ('unidad', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='periodos_laborales', to='strorganizativa.unidadorganizativa')),
+            ],
+            options={
+                'verbose_name': 'Periodo Laboral',
+                'verbose_name_plural': 'Periodos Laborales',
+                'ordering': ['aspirante', 'fecha_desde'],
+                'indexes': [models.Index(fields=['unidad', 'fecha_desde', 'fecha_hasta'], name='periodo_unidad_fechas_idx'), models.Index(fields=['fecha_desde', 'fecha_hasta'], name='periodo_fechas_idx'), models.Index(fields=['aspirante', 'fecha_desde'], name='periodo_aspirante_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def poblar_periodos(apps, schema_editor):
+    # Sin contratos no hay nada que reconstruir (base de datos nueva)
+    if not apps.get_model('contratos', 'CAlta').objects.exists():
+        return
+    # El cálculo de tramos (salario por escala, resolución de textos) vive en
+    # los modelos actuales: se usa la misma reconstrucción que el comando
+    # reconstruir_periodos. Si fallara, se puede repetir con ese comando.
+    from contratos.periodos import reconstruir
+    reconstruir()
+
+
+def revertir(apps, schema_editor):
+    apps.get_model('contratos', 'PeriodoLaboral').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('contratos', '0014_periodolaboral'),  # ← Depende de la migración de esquema
+    ]
+    operations = [
+        migrations.RunPython(poblar_periodos, revertir),
+    ]
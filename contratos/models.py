@@ -1,12 +1,16 @@
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from bolsa.models import Aspirante
-from strorganizativa.models import CargoPlantilla
-from nomencladores.models import NTridente, NSalario, NJornada, NCausaAltaBaja, NRol, NTipoContrato, NMotivoContrato
+from strorganizativa.jerarquia import en_subarbol
+from strorganizativa.models import CargoPlantilla, UnidadOrganizativa
+from nomencladores.models import NTridente, NJornada, NCausaAltaBaja, NRol, NTipoContrato, NMotivoContrato
 from django.core.validators import MinValueValidator
 from datetime import timedelta
 from django.utils import timezone
 from auditoria.models import Base
+from nomencladores.salarios import redondear, salario_cargo
 from django.core.exceptions import ValidationError
 
 
@@ -62,6 +66,34 @@ class ContratoBase(Base):
     def __str__(self):
         return self.aspirante.nombre
 
+class CAltaQuerySet(models.QuerySet):
+
+    def vencen_entre(self, desde, hasta):
+        """Contratos con vencimiento en [desde, hasta]. Rango sobre el índice parcial
+        de fecha_vencimiento (los contratos sin vencimiento no están en él)."""
+        return self.filter(fecha_vencimiento__range=(desde, hasta))
+
+    def vencen_hasta(self, hasta):
+        """Contratos con vencimiento hasta `hasta`, incluidos los ya vencidos."""
+        return self.filter(fecha_vencimiento__lte=hasta)
+
+    def a_termino(self):
+        """Excluye los contratos por tiempo indeterminado, aunque tengan duración cargada."""
+        return self.exclude(tipo__descripcion__icontains='INDETERMINADO')
+
+    def con_ultima_accion(self):
+        """
+        Anota `ultima_accion`: fecha del último TMovimiento del expediente o, si
+        no hay, la fecha de alta. Un Subquery por fila sobre el índice
+        (aspirante, no_expediente, fecha_efectiva): una página entera en una consulta.
+        """
+        ultimo_mov = TMovimiento.objects.filter(
+            aspirante_id=OuterRef('aspirante_id'),
+            no_expediente=OuterRef('no_expediente'),
+        ).order_by('-fecha_efectiva').values('fecha_efectiva')[:1]
+        return self.annotate(ultima_accion=Coalesce(Subquery(ultimo_mov), 'fecha_alta'))
+
+
 class CAlta(ContratoBase):
     
     duracion = models.IntegerField(null=True, blank=True)
@@ -139,6 +171,14 @@ class CAlta(ContratoBase):
         help_text="Se recalcula automáticamente en cada guardado. No editar a mano."
     )
 
+    fecha_vencimiento = models.DateField(
+        null=True, blank=True, editable=False,
+        verbose_name="Fecha de Vencimiento",
+        help_text="fecha_alta + duración. Se recalcula en cada guardado; vacía si el contrato no vence."
+    )
+
+    objects = CAltaQuerySet.as_manager()
+
     def clean(self):
         super().clean()
         
@@ -160,6 +200,14 @@ class CAlta(ContratoBase):
     class Meta:
         verbose_name = ("Alta")
         verbose_name_plural = ("Altas")
+        indexes = [
+            # Parcial: los contratos sin vencimiento (indeterminados) no ocupan el índice
+            models.Index(
+                fields=['fecha_vencimiento'],
+                name='calta_vencimiento_idx',
+                condition=models.Q(fecha_vencimiento__isnull=False),
+            ),
+        ]
         
     @staticmethod
     def actualizar_aspirante(doc_aspirante):
@@ -169,62 +217,43 @@ class CAlta(ContratoBase):
             aspirante.estado = 'ACTIVO'
             aspirante.save()
         
+    def _plaza(self):
+        """(cargo_id, ocupa_plaza) que este contrato suma en los contadores del cargo."""
+        return self.cargo_id, (self.tipo.ocupa_plaza if self.tipo_id else None)
+
+    def _plaza_ocupada(self):
+        """
+        Plaza que el contrato cuenta ahora mismo: solo si el trabajador está
+        ACTIVO, igual que CargoPlantilla.refrescar_conteos. Las entradas y
+        salidas de ACTIVO las ajusta Aspirante.save.
+        """
+        if not Aspirante.objects.filter(pk=self.aspirante_id, estado='ACTIVO').exists():
+            return None
+        return self._plaza()
+
     @staticmethod
-    def actualizar_plantilla(cargo_id):
-        """Recalcula la cantidad cubierta del cargo contando los contratos reales."""
-        cargo = CargoPlantilla.objects.filter(pk=cargo_id).first()
-        if cargo:
-            cargo.refrescar_conteo_plazas()
+    def actualizar_plantilla(plaza_anterior, plaza_nueva):
+        """Mueve el contrato entre contadores de plaza (alta, baja, cambio de tipo o de cargo)."""
+        if plaza_anterior == plaza_nueva:
+            return
+        deltas = {}
+        if plaza_anterior:
+            deltas[plaza_anterior] = deltas.get(plaza_anterior, 0) - 1
+        if plaza_nueva:
+            deltas[plaza_nueva] = deltas.get(plaza_nueva, 0) + 1
+        CargoPlantilla.ajustar_plazas(deltas)
         
     def calcular_salario_escala(self):
+        """Salario según la escala en memoria (nomencladores.salarios), sin consultas a NSalario."""
         try:
-            if self.tipo_salario == 'DIN':
-                # 1. Validación básica (ya no exigimos el rol aquí)
-                if not self.cargo:
-                    return None
-                
-                grupo_temp = self.cargo.ncargo.grupo_escala
-                
-                # Buscamos el rol (puede venir del contrato o del cargo)
-                rol_temp = self.rol or self.cargo.rol 
-                
-                # 2. REGLA: Un cargo es Cuadro SOLO por su categoría (CDI/CEJ)
-                es_cuadro = self.cargo.ncargo.es_cuadro
-                
-                if es_cuadro:
-                    salario_obj = NSalario.objects.filter(
-                        grupo_escala=grupo_temp,
-                        rol=rol_temp, 
-                        tridente__isnull=True
-                    ).first()
-                    
-                    # Fallback de seguridad extrema
-                    if not salario_obj:
-                         salario_obj = NSalario.objects.filter(
-                             grupo_escala=grupo_temp,
-                             rol__isnull=True,
-                             tridente__isnull=True
-                         ).first()
-                else:
-                    if not self.tridente:
-                        return None
-                    salario_obj = NSalario.objects.filter(
-                        grupo_escala=grupo_temp,
-                        rol=rol_temp,
-                        tridente=self.tridente
-                    ).first()
-
-                if salario_obj and salario_obj.monto:
-                    return round(float(salario_obj.monto), 2)
-                return None
-                
-            else:
-                if self.cargo and self.cargo.ncargo and self.cargo.ncargo.salario_basico:
-                    return round(float(self.cargo.ncargo.salario_basico), 2)
+            if not self.cargo:
                 return None
+            # El rol puede venir del contrato o del cargo
+            rol_id = self.rol_id or self.cargo.rol_id
+            return redondear(salario_cargo(self.cargo.ncargo, self.tipo_salario, rol_id, self.tridente_id))
         except Exception as e:
             return None
-        
+
     @property
     def funcionario(self):
         return self.cargo.funcionario if self.cargo else False
@@ -233,8 +262,7 @@ class CAlta(ContratoBase):
     def designado(self):
         return self.cargo.designado if self.cargo else False
     
-    @property
-    def fecha_vencimiento(self):
+    def calcular_fecha_vencimiento(self):
         if not self.fecha_alta or self.duracion is None:
             return None
         return self.fecha_alta + timedelta(days=self.duracion)
@@ -265,7 +293,9 @@ class CAlta(ContratoBase):
     @property
     def fecha_ultima_accion(self):
         """Devuelve la fecha del último evento. (fecha_alta garantizada por validación)"""
-        from .models import TMovimiento
+        if hasattr(self, 'ultima_accion'):
+            # Ya anotada con CAlta.objects.con_ultima_accion()
+            return self.ultima_accion
         ultimo_mov = TMovimiento.objects.filter(
             aspirante=self.aspirante, 
             no_expediente=self.no_expediente
@@ -275,48 +305,51 @@ class CAlta(ContratoBase):
     
     def save(self, *args, **kwargs):
         try:
-            es_nuevo = self._state.adding
-
-            # Cargo que tenía antes, para liberar su plaza si cambió
-            cargo_anterior_id = None
-            if not es_nuevo:
-                anterior = CAlta.objects.filter(pk=self.pk).values('cargo_id').first()
-                if anterior:
-                    cargo_anterior_id = anterior['cargo_id']
-
-            # EL ESCUDO: Asignación y Limpieza real en base de datos
-            if self.tipo_salario == 'DIN' and not self.tridente:
-                from nomencladores.models import NTridente
-                self.tridente = NTridente.objects.filter(tipo='I').first()
-            elif self.tipo_salario == 'FIJ':
-                self.tridente = None  # Obligamos a que el fijo sea NULL
-
-            if es_nuevo:
-                self.actualizar_aspirante(self.aspirante.doc_identidad)
-
-            super().save(*args, **kwargs)
-
-            # Recalcular el salario cacheado DESPUÉS del primer save
-            # (necesita que self.pk y las relaciones ya estén resueltas)
-            nuevo_salario = self.calcular_salario_escala()
-            if nuevo_salario != self.salario_actual:
-                CAlta.objects.filter(pk=self.pk).update(salario_actual=nuevo_salario)
-                self.salario_actual = nuevo_salario
-
-            # Recalculamos DESPUÉS de guardar, para contar la realidad
-            if self.cargo_id:
-                self.actualizar_plantilla(self.cargo_id)
-            if cargo_anterior_id and cargo_anterior_id != self.cargo_id:
-                self.actualizar_plantilla(cargo_anterior_id)
+            # Contrato, salario cacheado y contadores de plazas se confirman juntos
+            # (las señales on_commit ven el contrato ya completo)
+            with transaction.atomic():
+                es_nuevo = self._state.adding
+
+                # Plaza que ocupaba antes, para liberarla si cambió el cargo o el tipo
+                plaza_anterior = None
+                if not es_nuevo:
+                    anterior = CAlta.objects.filter(pk=self.pk).values(
+                        'cargo_id', 'tipo__ocupa_plaza', 'aspirante__estado'
+                    ).first()
+                    if anterior and anterior['aspirante__estado'] == 'ACTIVO':
+                        plaza_anterior = (anterior['cargo_id'], anterior['tipo__ocupa_plaza'])
+
+                # EL ESCUDO: Asignación y Limpieza real en base de datos
+                if self.tipo_salario == 'DIN' and not self.tridente:
+                    from nomencladores.models import NTridente
+                    self.tridente = NTridente.objects.filter(tipo='I').first()
+                elif self.tipo_salario == 'FIJ':
+                    self.tridente = None  # Obligamos a que el fijo sea NULL
+
+                if es_nuevo:
+                    self.actualizar_aspirante(self.aspirante.doc_identidad)
+
+                self.fecha_vencimiento = self.calcular_fecha_vencimiento()
+                if kwargs.get('update_fields') and {'fecha_alta', 'duracion'} & set(kwargs['update_fields']):
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'fecha_vencimiento'}
+
+                super().save(*args, **kwargs)
+
+                # Recalcular el salario cacheado DESPUÉS del primer save
+                # (necesita que self.pk y las relaciones ya estén resueltas)
+                nuevo_salario = self.calcular_salario_escala()
+                if nuevo_salario != self.salario_actual:
+                    CAlta.objects.filter(pk=self.pk).update(salario_actual=nuevo_salario)
+                    self.salario_actual = nuevo_salario
+
+                # Contadores de plazas: +1/-1 atómicos, sin volver a contar
+                self.actualizar_plantilla(plaza_anterior, self._plaza_ocupada())
 
         except Exception as e:
             print(f"Error al guardar el contrato: {e}")
             raise
 
     def delete(self, *args, **kwargs):
-        # Guardamos el cargo ANTES de borrar, porque después ya no podremos leerlo
-        cargo_id_afectado = self.cargo_id
-
         try:
             # 1. Mover Aspirante a BAJA
             if self.aspirante:
@@ -330,11 +363,13 @@ class CAlta(ContratoBase):
         except Exception as e:
             print(f"Error al eliminar contrato: {e}")
 
+        # Guardamos la plaza ANTES de borrar, porque después ya no podremos leerla.
+        # Si el aspirante acaba de pasar a BAJA, Aspirante.save ya la liberó (None)
+        plaza_afectada = self._plaza_ocupada()
         super().delete(*args, **kwargs)
 
-        # 2. Recalculamos la plaza DESPUÉS de borrar, contando la realidad
-        if cargo_id_afectado:
-            self.actualizar_plantilla(cargo_id_afectado)
+        # 2. Liberamos la plaza DESPUÉS de borrar
+        self.actualizar_plantilla(plaza_afectada, None)
 
 
     def __str__(self):
@@ -455,6 +490,65 @@ class TMovimiento(models.Model):
 
     class Meta:
         ordering = ['-fecha_efectiva']
+        indexes = [
+            # Último evento por expediente (fecha_ultima_accion, validación cronológica)
+            models.Index(fields=['aspirante', 'no_expediente', 'fecha_efectiva'], name='tmov_asp_exp_fecha_idx'),
+            # Último evento por contrato (bajas)
+            models.Index(fields=['contrato', 'fecha_efectiva'], name='tmov_contrato_fecha_idx'),
+        ]
+
+
+class PeriodoLaboralQuerySet(models.QuerySet):
+
+    def vigentes_en(self, fecha):
+        """Tramos que cubren `fecha` (fecha_hasta inclusiva; NULL = sigue vigente)."""
+        return self.filter(Q(fecha_hasta__isnull=True) | Q(fecha_hasta__gte=fecha), fecha_desde__lte=fecha)
+
+    def en_unidad(self, unidad):
+        """Solo la unidad y sus dependientes (sin filtro si `unidad` está vacío)."""
+        return self.filter(en_subarbol(unidad, 'unidad')) if unidad else self
+
+    def plantilla_en(self, fecha, unidad=None):
+        """{'trabajadores', 'masa_salarial'} en `fecha` para la unidad (o la entidad): una consulta."""
+        return self.vigentes_en(fecha).en_unidad(unidad).aggregate(
+            trabajadores=Count('aspirante', distinct=True),
+            masa_salarial=Coalesce(Sum('salario'), Decimal('0.00')),
+        )
+
+
+class PeriodoLaboral(models.Model):
+    """
+    Tramo de la vida laboral de un trabajador con cargo, unidad y salario
+    constantes: [fecha_desde, fecha_hasta], fecha_hasta vacía si sigue vigente.
+
+    Se reconstruye a partir de altas, bajas y TMovimiento (ver
+    contratos/periodos.py) y se mantiene por trabajador desde las señales, de
+    modo que "la plantilla de la unidad X el día D" es una consulta de rango.
+    """
+    aspirante = models.ForeignKey(Aspirante, on_delete=models.CASCADE, related_name='periodos_laborales')
+    no_expediente = models.CharField(max_length=20)
+    cargo = models.ForeignKey(CargoPlantilla, on_delete=models.SET_NULL, null=True, blank=True, related_name='periodos_laborales')
+    unidad = models.ForeignKey(UnidadOrganizativa, on_delete=models.SET_NULL, null=True, blank=True, related_name='periodos_laborales')
+    # Textos del histórico (el cargo o la unidad pueden no existir ya)
+    cargo_nombre = models.CharField(max_length=255)
+    unidad_nombre = models.CharField(max_length=255)
+    salario = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    fecha_desde = models.DateField()
+    fecha_hasta = models.DateField(null=True, blank=True)
+
+    objects = PeriodoLaboralQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-fecha_efectiva']
\ No newline at end of file
+        verbose_name = ("Periodo Laboral")
+        verbose_name_plural = ("Periodos Laborales")
+        ordering = ['aspirante', 'fecha_desde']
+        indexes = [
+            # Consultas "a fecha" por unidad: rango sobre fecha_desde dentro de la unidad
+            models.Index(fields=['unidad', 'fecha_desde', 'fecha_hasta'], name='periodo_unidad_fechas_idx'),
+            models.Index(fields=['fecha_desde', 'fecha_hasta'], name='periodo_fechas_idx'),
+            models.Index(fields=['aspirante', 'fecha_desde'], name='periodo_aspirante_idx'),
+        ]
+
+    def __str__(self):
+        hasta = self.fecha_hasta.strftime('%d/%m/%Y') if self.fecha_hasta else 'Actualidad'
+        return f"{self.no_expediente} {self.cargo_nombre} ({self.fecha_desde:%d/%m/%Y} - {hasta})"
@@ -0,0 +1,215 @@
+"""
+Plantilla "a fecha": reconstrucción de PeriodoLaboral a partir del histórico.
+
+Altas (CAlta), bajas (CBaja) y movimientos (TMovimiento) guardan la historia
+de cada trabajador, pero los movimientos solo como textos (cargo, unidad,
+salario anterior y nuevo). Aquí se reproduce esa historia por trabajador en
+tramos con cargo, unidad y salario constantes:
+
+    contrato  [fecha_alta ............................ fecha_baja | vigente]
+    tramos    [alta .. mov1 - 1][mov1 .. mov2 - 1][mov2 .......... fin]
+
+Los textos se resuelven contra la estructura actual (CargoPlantilla y
+UnidadOrganizativa) cuando coinciden sin ambigüedad; si no, el tramo conserva
+solo el texto. Las señales de contratos/signals.py reconstruyen únicamente los
+trabajadores afectados al confirmar cada transacción.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+
+from bolsa.models import Aspirante
+from strorganizativa.models import CargoPlantilla, UnidadOrganizativa
+
+from .historico import MOVIMIENTOS_SISTEMA
+from .models import CAlta, CBaja, PeriodoLaboral, TMovimiento
+
+SIN_DATO = "---"
+CARGO_RELACIONADO = ('cargo__ncargo', 'cargo__departamento__unidad_organizativa')
+
+
+class _Estructura:
+    """Resolución de los textos del histórico a cargo y unidad (dos consultas, solo si hacen falta)."""
+
+    def __init__(self):
+        self._cargos = None
+        self._unidades = None
+
+    @staticmethod
+    def _unico(indice, clave, valor):
+        # Un texto que corresponde a más de un objeto no se resuelve
+        indice[clave] = valor if indice.get(clave, valor) == valor else None
+
+    def _cargar(self):
+        self._cargos, self._unidades = {}, {}
+        for pk, descripcion in UnidadOrganizativa.objects.values_list('pk', 'descripcion'):
+            self._unico(self._unidades, descripcion, pk)
+        filas = CargoPlantilla.objects.values_list(
+            'pk', 'ncargo__descripcion', 'departamento__descripcion', 'departamento__unidad_organizativa__descripcion'
+        )
+        for pk, cargo, departamento, unidad in filas:
+            self._unico(self._cargos, (cargo, departamento, unidad), pk)
+            self._unico(self._cargos, (cargo, None, unidad), pk)
+
+    def resolver(self, cargo, departamento, unidad):
+        """(cargo_id, unidad_id) de los textos de un movimiento (None donde no se pueda)."""
+        if self._cargos is None:
+            self._cargar()
+        departamento = None if departamento in (None, '', SIN_DATO) else departamento
+        cargo_id = self._cargos.get((cargo, departamento, unidad)) or self._cargos.get((cargo, None, unidad))
+        return cargo_id, self._unidades.get(unidad)
+
+
+def _estado_de_contrato(contrato, salario):
+    """Cargo y unidad del contrato; el salario solo si se conoce (si no, manda el del último movimiento)."""
+    cargo = contrato.cargo
+    departamento = cargo.departamento if cargo else None
+    estado = {
+        'cargo_id': contrato.cargo_id,
+        'unidad_id': departamento.unidad_organizativa_id if departamento else None,
+        'cargo_nombre': cargo.ncargo.descripcion if cargo else SIN_DATO,
+        'unidad_nombre': departamento.unidad_organizativa.descripcion if departamento else SIN_DATO,
+    }
+    if salario is not None:
+        estado['salario'] = salario
+    return estado
+
+
+def _estado_de_movimiento(mov, estructura, sufijo):
+    cargo = getattr(mov, f'cargo_{sufijo}') or SIN_DATO
+    unidad = getattr(mov, 'unidad_anterior' if sufijo == 'anterior' else 'unidad_nueva') or SIN_DATO
+    departamento = getattr(mov, f'departamento_{sufijo}')
+    cargo_id, unidad_id = estructura.resolver(cargo, departamento, unidad)
+    return {
+        'cargo_id': cargo_id,
+        'unidad_id': unidad_id,
+        'cargo_nombre': cargo,
+        'unidad_nombre': unidad,
+        'salario': getattr(mov, f'salario_{sufijo}') or Decimal('0.00'),
+    }
+
+
+def _mismo_estado(a, b):
+    return all(a.get(k) == b.get(k) for k in ('cargo_nombre', 'unidad_nombre', 'salario'))
+
+
+def _tramos_de_contrato(aspirante_id, contrato, inicio, fin, movimientos, estructura, estado_actual):
+    """
+    Tramos de un contrato entre `inicio` y `fin` (None si sigue activo).
+    `estado_actual` es el estado real del contrato hoy (activo) o al darse
+    de baja: manda sobre los textos en el último tramo y en el único tramo
+    de un contrato sin movimientos.
+    """
+    if movimientos and movimientos[0].cargo_anterior not in (None, '', SIN_DATO):
+        estado = _estado_de_movimiento(movimientos[0], estructura, 'anterior')
+    else:
+        estado = estado_actual
+
+    tramos = [dict(estado, fecha_desde=inicio)]
+    for mov in movimientos:
+        nuevo = _estado_de_movimiento(mov, estructura, 'nuevo')
+        # Renovaciones y cambios que no tocan cargo, unidad ni salario no parten el tramo
+        if _mismo_estado(nuevo, tramos[-1]):
+            continue
+        if mov.fecha_efectiva <= tramos[-1]['fecha_desde']:
+            tramos[-1].update(nuevo)
+        else:
+            tramos.append(dict(nuevo, fecha_desde=mov.fecha_efectiva))
+
+    # El último tramo refleja el estado real (cargo y unidad como objetos, no como textos)
+    tramos[-1].update(estado_actual)
+
+    periodos = []
+    for i, tramo in enumerate(tramos):
+        hasta = tramos[i + 1]['fecha_desde'] - timedelta(days=1) if i + 1 < len(tramos) else fin
+        periodos.append(PeriodoLaboral(
+            aspirante_id=aspirante_id, no_expediente=contrato.no_expediente, fecha_hasta=hasta, **tramo
+        ))
+    return periodos
+
+
+def _periodos_de_trabajador(aspirante_id, altas, bajas, movimientos, estructura):
+    # Contratos del trabajador en orden: los cerrados (bajas) y el activo, si lo hay
+    contratos = [(b.fecha_alta, b.fecha_baja or b.fecha_alta, b) for b in bajas if b.fecha_alta]
+    contratos += [(a.fecha_alta, None, a) for a in altas if a.fecha_alta]
+    contratos.sort(key=lambda c: c[0])
+
+    periodos = []
+    for inicio, fin, contrato in contratos:
+        propios = [
+            m for m in movimientos
+            if m.expediente == contrato.no_expediente and inicio <= m.fecha_efectiva and (fin is None or m.fecha_efectiva <= fin)
+        ]
+        if isinstance(contrato, CAlta):
+            salario = contrato.salario_actual or Decimal('0.00')
+        elif not propios:
+            # Baja sin movimientos: el salario básico del cargo, como en la línea de tiempo
+            salario = contrato.cargo.ncargo.salario_basico if contrato.cargo else Decimal('0.00')
+        else:
+            salario = None
+        periodos += _tramos_de_contrato(
+            aspirante_id, contrato, inicio, fin, propios, estructura, _estado_de_contrato(contrato, salario)
+        )
+    return periodos
+
+
+def reconstruir(aspirantes_ids=None):
+    """
+    Rehace los PeriodoLaboral de los trabajadores indicados (todos si es
+    None): tres lecturas (altas, bajas, movimientos), un DELETE y un
+    bulk_create. Devuelve cuántos tramos quedaron.
+
+    Las filas de Aspirante se bloquean (SELECT ... FOR UPDATE) antes de leer
+    el histórico: dos transacciones que reconstruyen al mismo trabajador se
+    esperan en lugar de borrar a la vez e insertar tramos duplicados.
+    """
+    with transaction.atomic():
+        return _reconstruir(aspirantes_ids)
+
+
+def _reconstruir(aspirantes_ids):
+    bloqueados = Aspirante.objects.select_for_update().order_by('pk')
+    altas = CAlta.objects.select_related(*CARGO_RELACIONADO)
+    bajas = CBaja.objects.select_related(*CARGO_RELACIONADO)
+    movimientos = TMovimiento.objects.exclude(tipo_movimiento__in=MOVIMIENTOS_SISTEMA).annotate(
+        trabajador=Coalesce('aspirante_id', 'contrato__aspirante_id'),
+        expediente=Coalesce('no_expediente', 'contrato__no_expediente'),
+    )
+    existentes = PeriodoLaboral.objects.all()
+    if aspirantes_ids is not None:
+        ids = {pk for pk in aspirantes_ids if pk}
+        if not ids:
+            return 0
+        altas = altas.filter(aspirante_id__in=ids)
+        bajas = bajas.filter(aspirante_id__in=ids)
+        movimientos = movimientos.filter(Q(aspirante_id__in=ids) | Q(contrato__aspirante_id__in=ids))
+        existentes = existentes.filter(aspirante_id__in=ids)
+        bloqueados = bloqueados.filter(pk__in=ids)
+    # Orden por pk: dos reconstrucciones con trabajadores en común no se interbloquean
+    list(bloqueados.values_list('pk', flat=True))
+
+    por_trabajador = {}
+    for alta in altas:
+        por_trabajador.setdefault(alta.aspirante_id, ([], [], []))[0].append(alta)
+    for baja in bajas:
+        por_trabajador.setdefault(baja.aspirante_id, ([], [], []))[1].append(baja)
+    for mov in movimientos.order_by('fecha_efectiva', 'pk'):
+        if mov.trabajador in por_trabajador:
+            por_trabajador[mov.trabajador][2].append(mov)
+
+    estructura = _Estructura()
+    periodos = []
+    for aspirante_id, (altas_t, bajas_t, movs_t) in por_trabajador.items():
+        periodos += _periodos_de_trabajador(aspirante_id, altas_t, bajas_t, movs_t, estructura)
+
+    existentes.delete()
+    PeriodoLaboral.objects.bulk_create(periodos, batch_size=1000)
+    return len(periodos)
+
+
+def plantilla_en(fecha=None, unidad=None):
+    """{'trabajadores', 'masa_salarial'} de la unidad (y dependientes) o de la entidad en `fecha`."""
+    return PeriodoLaboral.objects.plantilla_en(fecha or date.today(), unidad)
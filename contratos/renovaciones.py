@@ -0,0 +1,173 @@
+"""
+Renovación por lotes de contratos a término (determinados, adiestramiento...).
+
+Selecciona los contratos que vencen en una ventana de fechas, calcula la
+propuesta (nueva duración y nuevo vencimiento) sin tocar nada y, al aplicar,
+prorroga todos los seleccionados en una transacción: una consulta para leer y
+validar, bulk_create de los TMovimiento y bulk_update de los CAlta.
+"""
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from auditoria.middleware import get_current_user
+from strorganizativa.jerarquia import en_subarbol
+
+from .models import CAlta, TMovimiento
+from .signals import contratos_actualizados
+
+RELACIONADOS = (
+    'aspirante', 'tipo', 'motivo', 'tridente', 'cargo__rol', 'cargo__ncargo__grupo_escala',
+    'cargo__departamento__unidad_organizativa'
+)
+
+
+def contratos_por_vencer(desde, hasta, tipo_id=None, unidad_id=None, motivo_id=None):
+    """
+    Contratos a término con vencimiento en [desde, hasta], filtrados por tipo,
+    unidad (y sus dependientes) y motivo.
+    """
+    qs = CAlta.objects.vencen_entre(desde, hasta).a_termino()
+    if tipo_id:
+        qs = qs.filter(tipo_id=tipo_id)
+    if unidad_id:
+        qs = qs.filter(en_subarbol(unidad_id, 'cargo__departamento__unidad_organizativa'))
+    if motivo_id:
+        qs = qs.filter(motivo_id=motivo_id)
+    return qs.select_related(*RELACIONADOS).con_ultima_accion().order_by('fecha_vencimiento', 'no_expediente')
+
+
+def proponer(contrato, dias=None):
+    """
+    Anota en el contrato la propuesta de renovación: `dias_prorroga`,
+    `duracion_propuesta` y `vencimiento_propuesto`. Sin `dias` no hay
+    propuesta (quedan en None): `duracion` es la acumulada de todas las
+    prórrogas, así que tomarla por defecto duplicaría el plazo en cada
+    renovación. Devuelve el contrato.
+    """
+    contrato.dias_prorroga = dias or None
+    contrato.duracion_propuesta = contrato.duracion + dias if dias else None
+    contrato.vencimiento_propuesto = contrato.fecha_vencimiento + timedelta(days=dias) if dias else None
+    return contrato
+
+
+def previsualizar(contratos, dias=None):
+    """Propuesta de renovación de cada contrato, sin escribir en la base de datos."""
+    return [proponer(c, dias) for c in contratos]
+
+
+def _movimiento_renovacion(contrato, fecha_solicitud, observaciones):
+    """Movimiento de Nómina que solo cambia la duración (mismo cargo y salario)."""
+    cargo = contrato.cargo
+    departamento = cargo.departamento if cargo else None
+    grupo = cargo.ncargo.grupo_escala if cargo else None
+    salario = contrato.calcular_salario_escala() or 0
+    cargo_txt = cargo.ncargo.descripcion if cargo else "---"
+    departamento_txt = departamento.descripcion if departamento else "---"
+    unidad_txt = departamento.unidad_organizativa.descripcion if departamento else "---"
+    grupo_txt = grupo.nivel if grupo else "---"
+    cat_txt = cargo.ncargo.get_cat_ocupacional_display() if cargo else "---"
+    tipo_salario_txt = contrato.get_tipo_salario_display() if contrato.tipo_salario else "---"
+    rol_txt = cargo.rol.tipo if (cargo and cargo.rol) else "---"
+    tridente_txt = str(contrato.tridente) if contrato.tridente else "---"
+    tipo_txt = contrato.tipo.descripcion if contrato.tipo else "---"
+    motivo_txt = contrato.motivo.descripcion if contrato.motivo else "---"
+
+    return TMovimiento(
+        contrato=contrato,
+        aspirante_id=contrato.aspirante_id,
+        no_expediente=contrato.no_expediente,
+        # Fecha del trámite, no del vencimiento: una fecha futura bloquearía las
+        # bajas y movimientos posteriores (no pueden ser anteriores al último evento)
+        fecha_efectiva=fecha_solicitud or timezone.localdate(),
+        fecha_solicitud=fecha_solicitud,
+        observaciones=observaciones or (
+            f"Renovación por {contrato.dias_prorroga} días hasta el "
+            f"{contrato.vencimiento_propuesto.strftime('%d/%m/%Y')}"
+        ),
+
+        cargo_anterior=cargo_txt, cargo_nuevo=cargo_txt,
+        departamento_anterior=departamento_txt, departamento_nuevo=departamento_txt,
+        unidad_anterior=unidad_txt, unidad_nueva=unidad_txt,
+        grupo_escala_anterior=grupo_txt, grupo_escala_nuevo=grupo_txt,
+        cat_ocupacional_anterior=cat_txt, cat_ocupacional_nuevo=cat_txt,
+        tipo_salario_anterior=tipo_salario_txt, tipo_salario_nuevo=tipo_salario_txt,
+        rol_anterior=rol_txt, rol_nuevo=rol_txt,
+        tridente_anterior=tridente_txt, tridente_nuevo=tridente_txt,
+        salario_anterior=salario, salario_nuevo=salario,
+        tipo_contrato_anterior=tipo_txt, tipo_contrato_nuevo=tipo_txt,
+        motivo_anterior=motivo_txt, motivo_nuevo=motivo_txt,
+        duracion_nueva=contrato.duracion_propuesta,
+
+        tipo_movimiento="Movimiento de Nómina"
+    )
+
+
+def renovar_contratos(contratos_ids, dias=None, fecha_solicitud=None, observaciones=''):
+    """
+    Prorroga los contratos indicados `dias` días (obligatorio). Todo o nada: si algún contrato no existe, no tiene
+    vencimiento o tiene un evento posterior a su vencimiento se lanza
+    ValidationError sin tocar nada. Devuelve la lista de movimientos creados.
+    """
+    ids = {int(pk) for pk in contratos_ids}
+    if not ids:
+        raise ValidationError("No se seleccionó ningún contrato.")
+    if dias is None:
+        raise ValidationError("Indique los días de prórroga.")
+    if dias <= 0:
+        raise ValidationError("La prórroga debe ser de al menos un día.")
+
+    with transaction.atomic():
+        # 1. Lectura y validación de todos los contratos (una consulta)
+        contratos = list(
+            CAlta.objects.filter(pk__in=ids)
+            .select_related(*RELACIONADOS)
+            .con_ultima_accion()
+            .select_for_update(of=('self',))
+            .order_by('no_expediente')
+        )
+        faltan = ids - {c.pk for c in contratos}
+        if faltan:
+            raise ValidationError(f"Contratos inexistentes: {', '.join(map(str, sorted(faltan)))}.")
+
+        errores = []
+        a_termino = set(CAlta.objects.filter(pk__in=ids).a_termino().values_list('pk', flat=True))
+        for c in contratos:
+            if c.pk not in a_termino:
+                errores.append(f"Exp. {c.no_expediente}: el contrato es por tiempo indeterminado")
+            elif c.fecha_vencimiento is None or not c.duracion:
+                errores.append(f"Exp. {c.no_expediente}: el contrato no tiene duración definida")
+            elif c.ultima_accion and c.fecha_vencimiento < c.ultima_accion:
+                errores.append(
+                    f"Exp. {c.no_expediente}: existe un evento posterior al vencimiento "
+                    f"({c.ultima_accion.strftime('%d/%m/%Y')})"
+                )
+        if errores:
+            raise ValidationError(["No se pudo renovar la selección."] + errores)
+
+        # 2. Propuesta, históricos y nuevos vencimientos
+        usuario = get_current_user()
+        previsualizar(contratos, dias)
+        movimientos = TMovimiento.objects.bulk_create([
+            _movimiento_renovacion(c, fecha_solicitud, observaciones) for c in contratos
+        ])
+
+        ahora = timezone.now()
+        for c in contratos:
+            c.duracion = c.duracion_propuesta
+            c.fecha_vencimiento = c.vencimiento_propuesto
+            # bulk_update no pasa por Base.save: la auditoría se asigna aquí
+            c.updated_at = ahora
+            if usuario and usuario.is_authenticated:
+                c.updated_by = usuario
+        CAlta.objects.bulk_update(contratos, ['duracion', 'fecha_vencimiento', 'updated_at', 'updated_by'])
+
+        contratos_actualizados.send(
+            sender=CAlta,
+            cargos_ids={c.cargo_id for c in contratos if c.cargo_id},
+            aspirantes_ids={c.aspirante_id for c in contratos},
+        )
+
+    return movimientos
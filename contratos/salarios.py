@@ -0,0 +1,98 @@
+"""
+Recálculo por conjuntos de CAlta.salario_actual.
+
+El salario guardado en cada contrato se recalculaba solo al volver a guardar
+el contrato. Aquí las mismas reglas de CAlta.calcular_salario_escala (ver
+nomencladores/salarios.py) se expresan en una única consulta, de modo que un
+cambio en la matriz de salarios se propaga con un solo UPDATE ... FROM dentro
+de la transacción que lo provocó.
+"""
+from django.db import connection, transaction
+
+from nomencladores.models import NCargo, NSalario
+from strorganizativa.models import CargoPlantilla
+
+from .models import CAlta
+from .signals import contratos_actualizados
+
+
+def _salarios_nuevos_sql(grupos_ids=None):
+    """
+    SELECT (id, nuevo) con el salario que corresponde a cada contrato activo.
+    FIJ: salario básico del NCargo. DIN cuadro: celda del rol sin tridente o,
+    si no existe, la celda general del grupo. DIN resto: celda exacta
+    (grupo, rol, tridente). Sin cargo, sin celda o monto 0: NULL.
+    """
+    c, p = CAlta._meta.db_table, CargoPlantilla._meta.db_table
+    n, s = NCargo._meta.db_table, NSalario._meta.db_table
+    rol = 'COALESCE(c.rol_id, p.rol_id)'
+    sql = f"""
+        SELECT c.id AS id,
+            CASE
+                WHEN p.id IS NULL THEN NULL
+                WHEN c.tipo_salario = 'FIJ' THEN NULLIF(n.salario_basico, 0)
+                WHEN n.cat_ocupacional IN ('CDI', 'CEJ') THEN NULLIF(COALESCE(sr.monto, sg.monto), 0)
+                WHEN c.tridente_id IS NULL THEN NULL
+                ELSE NULLIF(st.monto, 0)
+            END AS nuevo
+        FROM {c} c
+        LEFT JOIN {p} p ON p.id = c.cargo_id
+        LEFT JOIN {n} n ON n.id = p.ncargo_id
+        LEFT JOIN {s} sr ON sr.grupo_escala_id = n.grupo_escala_id
+            AND sr.rol_id IS NOT DISTINCT FROM {rol} AND sr.tridente_id IS NULL
+        LEFT JOIN {s} sg ON sg.grupo_escala_id = n.grupo_escala_id
+            AND sg.rol_id IS NULL AND sg.tridente_id IS NULL
+        LEFT JOIN {s} st ON st.grupo_escala_id = n.grupo_escala_id
+            AND st.rol_id IS NOT DISTINCT FROM {rol} AND st.tridente_id = c.tridente_id
+    """
+    params = []
+    if grupos_ids is not None:
+        grupos_ids = list(grupos_ids)
+        if not grupos_ids:
+            return None, []
+        sql += f" WHERE n.grupo_escala_id IN ({', '.join(['%s'] * len(grupos_ids))})"
+        params = grupos_ids
+    return sql, params
+
+
+def diferencias_salario(grupos_ids=None):
+    """
+    Contratos cuyo salario_actual no coincide con la escala vigente, sin
+    modificar nada: lista de (id, no_expediente, actual, nuevo).
+    """
+    sql, params = _salarios_nuevos_sql(grupos_ids)
+    if sql is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT c.id, c.no_expediente, c.salario_actual, s.nuevo
+            FROM {CAlta._meta.db_table} c JOIN ({sql}) s ON s.id = c.id
+            WHERE c.salario_actual IS DISTINCT FROM s.nuevo
+            ORDER BY c.no_expediente
+        """, params)
+        return cursor.fetchall()
+
+
+def recalcular_salarios(grupos_ids=None):
+    """
+    Actualiza salario_actual de los contratos afectados (todos, o solo los de
+    los grupos escala indicados) en una sola sentencia. Devuelve cuántos
+    contratos cambiaron.
+    """
+    sql, params = _salarios_nuevos_sql(grupos_ids)
+    if sql is None:
+        return 0
+    tabla = CAlta._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {tabla} SET salario_actual = s.nuevo
+            FROM ({sql}) s
+            WHERE {tabla}.id = s.id AND {tabla}.salario_actual IS DISTINCT FROM s.nuevo
+            RETURNING {tabla}.cargo_id, {tabla}.aspirante_id
+        """, params)
+        filas = cursor.fetchall()
+    if filas:
+        contratos_actualizados.send(
+            sender=CAlta, cargos_ids={f[0] for f in filas}, aspirantes_ids={f[1] for f in filas}
+        )
+    return len(filas)
@@ -0,0 +1,80 @@
+"""
+Señales propias de contratos.
+
+Las operaciones por lotes (recálculo de salarios, renovaciones...) escriben
+con UPDATE o bulk_update, que no disparan post_save de CAlta. Al terminar
+emiten `contratos_actualizados` con cargos_ids=<set de CargoPlantilla> y
+aspirantes_ids=<set de Aspirante> de los contratos tocados, para que quien
+mantenga datos derivados (p. ej. dashboard/signals.py) los invalide.
+Las que además borran o guardan contratos uno a uno (baja masiva) lo hacen
+dentro de `en_lote()`: los receptores fila a fila no hacen nada y todo se
+invalida una vez con `contratos_actualizados`.
+
+Aquí también se mantiene PeriodoLaboral: cada alta, baja o movimiento marca
+a su trabajador y, al confirmarse la transacción, se reconstruyen solo los
+tramos de los trabajadores marcados (ver contratos/periodos.py).
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import CAlta, CBaja, TMovimiento
+
+contratos_actualizados = Signal()
+
+
+@contextmanager
+def en_lote():
+    """Silencia los receptores por fila de CAlta/CBaja; quien lo usa debe enviar contratos_actualizados."""
+    conexion = transaction.get_connection()
+    anterior = getattr(conexion, '_contratos_en_lote', False)
+    conexion._contratos_en_lote = True
+    try:
+        yield
+    finally:
+        conexion._contratos_en_lote = anterior
+
+
+def es_lote():
+    return getattr(transaction.get_connection(), '_contratos_en_lote', False)
+
+
+def _reconstruir_periodos(*aspirantes_ids):
+    # Los trabajadores se acumulan por conexión: el primer on_commit de la
+    # transacción los reconstruye todos juntos y los siguientes no tienen nada que hacer
+    conexion = transaction.get_connection()
+    if getattr(conexion, '_periodos_pendientes', None) is None:
+        conexion._periodos_pendientes = set()
+    conexion._periodos_pendientes.update(pk for pk in aspirantes_ids if pk)
+
+    def aplicar():
+        from .periodos import reconstruir
+        ids, conexion._periodos_pendientes = conexion._periodos_pendientes, set()
+        if ids:
+            reconstruir(ids)
+
+    transaction.on_commit(aplicar)
+
+
+@receiver([post_save, post_delete], sender=CAlta)
+@receiver([post_save, post_delete], sender=CBaja)
+def contrato_cambiado(sender, instance, **kwargs):
+    if es_lote():
+        return
+    _reconstruir_periodos(instance.aspirante_id)
+
+
+@receiver([post_save, post_delete], sender=TMovimiento)
+def movimiento_cambiado(sender, instance, **kwargs):
+    aspirante_id = instance.aspirante_id or CAlta.objects.filter(pk=instance.contrato_id).values_list(
+        'aspirante_id', flat=True
+    ).first()
+    _reconstruir_periodos(aspirante_id)
+
+
+@receiver(contratos_actualizados)
+def contratos_actualizados_en_lote(sender, aspirantes_ids, **kwargs):
+    # Solo los trabajadores de los contratos tocados, no todos los de sus cargos
+    _reconstruir_periodos(*aspirantes_ids)
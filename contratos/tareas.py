@@ -0,0 +1,49 @@
+"""
+Tareas en segundo plano de contratos (ver tareas/registro.py).
+
+Las vistas se importan dentro de cada función: este módulo se carga en
+TareasConfig.ready, antes de que las URLs y las vistas estén listas.
+"""
+import tempfile
+
+from django.core.files import File
+
+from tareas.registro import tarea
+
+
+@tarea('contratos.exportar_excel')
+def exportar_excel(tarea):
+    from .utils import guardar_excel
+    from .views import (
+        CABECERAS_EXCEL_ACTIVOS, COLUMNAS_EXCEL_ACTIVOS, _filas_excel_activos,
+        contratos_activos_excel, nombre_excel_activos,
+    )
+
+    contratos = contratos_activos_excel()
+    total = contratos.count() or 1
+
+    def con_progreso(filas):
+        for i, fila in enumerate(filas, 1):
+            if i % 1000 == 0:
+                tarea.reportar(i * 95 / total, f"{i} de {total} trabajadores...")
+            yield fila
+
+    filas = _filas_excel_activos(contratos.values_list(*COLUMNAS_EXCEL_ACTIVOS).iterator(chunk_size=2000))
+    # Archivo temporal en disco: la memoria no crece con el número de filas
+    destino = tempfile.TemporaryFile()
+    guardar_excel(destino, "Trabajadores Activos", CABECERAS_EXCEL_ACTIVOS, con_progreso(filas))
+    destino.seek(0)
+    return nombre_excel_activos(), File(destino)
+
+
+@tarea('contratos.contratos_word_lote')
+def contratos_word_lote(tarea, **datos):
+    from .forms import ExportarContratosLoteForm
+    from .views import ExportarContratosLoteView
+
+    vista = ExportarContratosLoteView()
+    form = ExportarContratosLoteForm(datos, cuadros_qs=vista.cuadros_firmantes())
+    if not form.is_valid():
+        raise ValueError(f"Datos no válidos: {form.errors.as_text()}")
+    return vista.generar_lote(form, datos, tarea)
+
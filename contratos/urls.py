@@ -10,11 +10,14 @@ urlpatterns = [
     path('add_contrato/<str:aspirante_id>/', login_required(views.ContratoCreateView.as_view()), name='add_contrato'),
     path('updt_contrato/<str:pk>/', login_required(views.ContratoUpdateView.as_view()), name='updt_contrato'),
     path('del_contrato/<str:pk>/', login_required(views.ContratoDeleteView.as_view()), name='del_contrato'),
+    path('baja_masiva/', login_required(views.baja_masiva), name='baja_masiva'),
+    path('renovacion/', login_required(views.RenovacionContratosView.as_view()), name='renovacion_contratos'),
     path('cargar_salarios/', login_required(views.cargar_salario), name='cargar_salarios'),
     path('search_contrato/', login_required(views.search_contratos), name='search_contrato'),
     
     #?REPORTES
     path('reporte/modelo_movimiento/<str:pk>/', login_required(views.ModeloMovimientoDocxView.as_view()), name='imprimir_modelo_movimiento'),
+    path('reporte/relacion_bajas/', login_required(views.RelacionBajasPDFView.as_view()), name='relacion_bajas_pdf'),
     
 
     #?Validaciones
@@ -51,6 +54,7 @@ urlpatterns = [
     #? EXPORTACIONES
     path('exportar_excel/', login_required(views.exportar_contratos_excel), name='exportar_contratos_excel'),
 
-    path('exportar_contrato/<int:pk>/', login_required(views.ExportarContratoWordView.as_view()), name='exportar_contrato_word')
+    path('exportar_contrato/<int:pk>/', login_required(views.ExportarContratoWordView.as_view()), name='exportar_contrato_word'),
+    path('exportar_contratos/lote/', login_required(views.ExportarContratosLoteView.as_view()), name='exportar_contratos_word_lote')
 
 ]
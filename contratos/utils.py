@@ -0,0 +1,190 @@
+"""
+Ordenamiento y paginación por clave (keyset) para los listados de contratos.
+
+Toda columna ordenable se traduce a una expresión SQL anotada como
+`orden_valor`, de modo que la base de datos ordena y corta la página: nunca
+se materializa el listado completo en Python.
+
+Incluye también la exportación a Excel con memoria acotada
+(respuesta_excel_streaming y guardar_excel).
+"""
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.core import signing
+from django.http import StreamingHttpResponse
+from django.db.models import Case, CharField, DecimalField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, Lower, Upper
+
+from nomencladores.models import NCargo
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+
+# Jerarquía de roles para ordenar (sin rol = Cuadro, igual que en la tabla)
+JERARQUIA_ROLES = {"APOYO": 1, "FUNDAMENTAL": 2, "DECISORIO": 3, "CUADRO": 4}
+
+
+def _orden_categoria():
+    # Ordena por la etiqueta visible (get_cat_ocupacional_display), no por el código
+    choices = NCargo._meta.get_field('cat_ocupacional').choices
+    return Case(
+        *[When(cargo__ncargo__cat_ocupacional=codigo, then=Value(etiqueta)) for codigo, etiqueta in choices],
+        default=Value(''), output_field=CharField()
+    )
+
+
+def _orden_rol():
+    # Requiere la anotación previa `rol_orden_txt` (ver anotar_orden_contratos)
+    return Case(
+        *[When(rol_orden_txt=nombre, then=Value(peso)) for nombre, peso in JERARQUIA_ROLES.items()],
+        default=Value(0), output_field=IntegerField()
+    )
+
+
+ORDEN_CONTRATOS = {
+    # Expediente numérico: los no numéricos cuentan como 0
+    'expediente': lambda: Case(
+        When(no_expediente__regex=r'^[0-9]+$', then=Cast('no_expediente', IntegerField())),
+        default=Value(0), output_field=IntegerField()
+    ),
+    'nombre': lambda: Lower(Concat(
+        'aspirante__nombre', Value(' '), 'aspirante__papellido', Value(' '), 'aspirante__sapellido',
+        output_field=CharField()
+    )),
+    'area': lambda: Lower(Coalesce('cargo__departamento__descripcion', Value(''))),
+    'cat': _orden_categoria,
+    # Grupo escala en número (I..XXV) ya calculado en NGrupoEscala.valor_numerico_db
+    'grupo': lambda: Coalesce('cargo__ncargo__grupo_escala__valor_numerico_db', Value(0)),
+    'tridente': lambda: Coalesce('tridente__tipo', Value('')),
+    # Salario ya guardado en CAlta (sin recalcular la escala fila a fila)
+    'salario': lambda: Coalesce('salario_actual', Value(Decimal('0.00')), output_field=DecimalField(max_digits=10, decimal_places=2)),
+    # Orden por defecto del listado
+    'fecha_alta': lambda: Coalesce('fecha_alta', Value(date(1900, 1, 1))),
+}
+
+
+def anotar_orden_contratos(qs, sort_col):
+    """Anota `orden_valor` según la columna pedida (desconocida -> fecha_alta)."""
+    if sort_col == 'rol':
+        return qs.annotate(
+            rol_orden_txt=Upper(Coalesce('rol__tipo', 'cargo__rol__tipo', Value('CUADRO')))
+        ).annotate(orden_valor=_orden_rol())
+    return qs.annotate(orden_valor=ORDEN_CONTRATOS.get(sort_col, ORDEN_CONTRATOS['fecha_alta'])())
+
+
+def _serializar(valor):
+    return valor if isinstance(valor, (int, float, str)) or valor is None else str(valor)
+
+
+def codificar_cursor(obj):
+    return signing.dumps([_serializar(obj.orden_valor), obj.pk], salt='keyset', compress=True)
+
+
+def decodificar_cursor(cursor):
+    try:
+        valor, pk = signing.loads(cursor, salt='keyset')
+        return valor, pk
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+
+
+def paginar_keyset(qs, tamanno, descendente=False, despues=None, antes=None):
+    """
+    Página de `tamanno` filas de `qs` (ya anotado con `orden_valor`), ordenada por
+    (orden_valor, pk). `despues`/`antes` son cursores de codificar_cursor: se
+    busca directamente desde esa posición, así que la página 500 cuesta lo
+    mismo que la primera y solo se leen tamanno + 1 filas.
+    """
+    sig, ant = ('lt', 'gt') if descendente else ('gt', 'lt')
+    orden = ['-orden_valor', '-pk'] if descendente else ['orden_valor', 'pk']
+    inverso = ['orden_valor', 'pk'] if descendente else ['-orden_valor', '-pk']
+
+    def desde(cursor, op):
+        valor, pk = cursor
+        return Q(**{f'orden_valor__{op}': valor}) | Q(orden_valor=valor, **{f'pk__{op}': pk})
+
+    cursor_antes = decodificar_cursor(antes) if antes else None
+    cursor_despues = decodificar_cursor(despues) if despues and not cursor_antes else None
+
+    if cursor_antes:
+        filas = list(qs.filter(desde(cursor_antes, ant)).order_by(*inverso)[:tamanno + 1])
+        has_previous = len(filas) > tamanno
+        filas = filas[:tamanno][::-1]
+        has_next = True
+    else:
+        if cursor_despues:
+            qs = qs.filter(desde(cursor_despues, sig))
+        filas = list(qs.order_by(*orden)[:tamanno + 1])
+        has_next = len(filas) > tamanno
+        filas = filas[:tamanno]
+        has_previous = cursor_despues is not None
+
+    return {
+        'object_list': filas,
+        'has_next': has_next and bool(filas),
+        'has_previous': has_previous and bool(filas),
+        'cursor_siguiente': codificar_cursor(filas[-1]) if filas else None,
+        'cursor_anterior': codificar_cursor(filas[0]) if filas else None,
+    }
+
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _cabecera_excel(ws, cabeceras):
+    fuente = Font(bold=True, color="FFFFFF")
+    fondo = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+    centro = Alignment(horizontal="center", vertical="center")
+    celdas = []
+    for texto in cabeceras:
+        celda = WriteOnlyCell(ws, value=texto)
+        celda.font, celda.fill, celda.alignment = fuente, fondo, centro
+        celdas.append(celda)
+    return celdas
+
+
+def _generar_excel(titulo, cabeceras, filas, tamanno_bloque):
+    # Modo write-only: cada fila se vuelca a disco al añadirla, la memoria no
+    # crece con el número de filas. openpyxl solo puede cerrar el .zip al final,
+    # así que el libro se guarda en un temporal que se envía por bloques: el
+    # primer bloque sale cuando ya se escribieron todas las filas.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+    for col in range(1, len(cabeceras) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 20
+    ws.append(_cabecera_excel(ws, cabeceras))
+    for fila in filas:
+        ws.append(fila)
+
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while bloque := tmp.read(tamanno_bloque):
+            yield bloque
+
+
+def guardar_excel(destino, titulo, cabeceras, filas):
+    """Escribe en el archivo binario `destino` el mismo .xlsx que respuesta_excel_streaming (tareas en segundo plano)."""
+    for bloque in _generar_excel(titulo, cabeceras, filas, 64 * 1024):
+        destino.write(bloque)
+
+
+def respuesta_excel_streaming(nombre_archivo, titulo, cabeceras, filas, tamanno_bloque=64 * 1024):
+    """
+    StreamingHttpResponse con un .xlsx de una hoja. `filas` es un iterable
+    perezoso (p. ej. un generador sobre .values_list().iterator()): el trabajo
+    empieza cuando el servidor comienza a enviar la respuesta.
+
+    Solo acota la memoria: no se envía ningún byte hasta terminar el libro,
+    así que el tiempo máximo de gunicorn y del proxy sigue aplicando. Los
+    listados grandes se generan como tarea en segundo plano (guardar_excel).
+    """
+    response = StreamingHttpResponse(
+        _generar_excel(titulo, cabeceras, filas, tamanno_bloque), content_type=CONTENT_TYPE_XLSX
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
@@ -7,32 +7,40 @@ from django.views.generic import ListView, CreateView, DeleteView, UpdateView, V
 from django.core.paginator import Paginator
 from django.conf import settings
 from bolsa.models import Aspirante
+from bolsa.busqueda import buscar, relevancia
 from .models import CAlta, CBaja, TMovimiento
 from .forms import CAltaForm
-from strorganizativa.models import Departamento, CargoPlantilla
-from nomencladores.models import NSalario, NCausaAltaBaja, NRol, NProvincia, NTipoContrato
+from strorganizativa.models import Departamento, CargoPlantilla, UnidadOrganizativa
+from nomencladores.models import NCausaAltaBaja, NMotivoContrato, NRol, NProvincia, NTipoContrato
+from nomencladores.salarios import monto_escala, roles_con_salario, salario_cargo, salario_escala
 from django.urls import reverse_lazy, reverse
 from configuracion.models import Configuracion
-from django.template.loader import get_template
-from django.db.models import Q, ProtectedError, Value
-from django.db.models.functions import Concat
+from django.db.models import Case, F, FloatField, ProtectedError, Value, When
 from django.db import transaction
-from xhtml2pdf import pisa
+from django.core.exceptions import ValidationError
+from reportes.pdf import respuesta_pdf
+from reportes.procesos import ErrorTrabajo, PoolOcupado
+from reportes.word import comprimir, render_docx, render_lote, respuesta_docx, unir_documentos
 from datetime import datetime, timedelta
 from .forms import CAltaForm, MovimientoForm
-from docxtpl import DocxTemplate, RichText
-from io import BytesIO
+from docxtpl import RichText
+import logging
 import os
 import traceback
 import sys
 import json
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
-from django.http import HttpResponse, Http404
+from django.http import FileResponse, HttpResponse, Http404
+from io import BytesIO
 from datetime import datetime
-from .forms import ExportarContratoWordForm
+from .forms import ExportarContratoWordForm, ExportarContratosLoteForm
+from .bajas import dar_baja_masiva
+from .historico import linea_tiempo
+from .renovaciones import contratos_por_vencer, previsualizar, renovar_contratos
+from .utils import anotar_orden_contratos, paginar_keyset, respuesta_excel_streaming
+from tareas.models import Tarea
+from tareas.views import respuesta_tarea
 
+logger = logging.getLogger(__name__)
 
 
 CAT_MAP = {
@@ -111,13 +119,7 @@ def cargar_roles(request):
             nivel_num = nivel_romano_a_int(grupo.nivel) # Leemos el número del grupo
             
             # 1. LA LIMPIEZA (Tu código original): Buscar en NSalario qué roles tienen dinero (> 0)
-            salarios_con_fondo = NSalario.objects.filter(
-                grupo_escala=grupo, 
-                monto__gt=0
-            ).values_list('rol_id', flat=True).distinct()
-            
-            # Convertimos a Set para manipular fácil
-            ids_validos = set(salarios_con_fondo)
+            ids_validos = roles_con_salario(grupo.pk)
             
             # Buscamos los IDs de los roles clave
             rol_cuadro_obj = NRol.objects.filter(tipo__iexact="Cuadro").first()
@@ -206,34 +208,18 @@ def obtener_datos_previos(request):
     # 3. No se encontró nada
     return JsonResponse({'existe': False})
 
-def search_contratos(request):
-    # 1. Obtener parámetros de filtros
-    query = request.GET.get('filter_contrato', '').strip()
-    page_num = request.GET.get('page', 1)
-    page_size = request.GET.get('per_page')
-    if not page_size:
-        page_size = '8'
-    
-    # Filtros del Aspirante asociado
-    provincia_id = request.GET.get('provincia')
-    municipio_id = request.GET.get('municipio')
-    nivel_educ = request.GET.get('nivel_educ')
-    especialidad_id = request.GET.get('especialidad')
-    sexo = request.GET.get('sexo')
-    raza = request.GET.get('raza')
-    grado_cientifico = request.GET.get('grado_cientifico')
+def filtrar_contratos(qs, params):
+    """Filtros del listado de contratos (aspirante y buscador) sobre `qs`, leídos de `params`."""
+    query = params.get('filter_contrato', '').strip()
 
-    # 2. QuerySet Base con el Grafo Relacional expandido (Corrección N+1)
-    qs = CAlta.objects.select_related(
-        'aspirante', 
-        'cargo',
-        'cargo__departamento',
-        'cargo__ncargo',
-        'cargo__ncargo__grupo_escala',
-        'cargo__rol',
-        'rol',
-        'tridente'
-    ).all().order_by('-fecha_alta')
+    # Filtros del Aspirante asociado
+    provincia_id = params.get('provincia')
+    municipio_id = params.get('municipio')
+    nivel_educ = params.get('nivel_educ')
+    especialidad_id = params.get('especialidad')
+    sexo = params.get('sexo')
+    raza = params.get('raza')
+    grado_cientifico = params.get('grado_cientifico')
 
     # 3. Aplicar Filtros "Embudo" (Relación aspirante__)
     if provincia_id:
@@ -251,66 +237,77 @@ def search_contratos(request):
     if grado_cientifico:
         qs = qs.filter(aspirante__grado_cientifico=grado_cientifico)
 
-    # 4. Buscador Inteligente (Concatenación)
+    # 4. Buscador Inteligente: No. Expediente que empieza por el texto (índice
+    # del expediente) o nombre/CI del Aspirante (índice de trigramas). Se unen
+    # con UNION para que cada rama use su índice (un OR entre ambas no usa
+    # ninguno); los expedientes van primero.
     if query:
-        qs = qs.annotate(
-            nombre_completo=Concat(
-                'aspirante__nombre', Value(' '), 
-                'aspirante__papellido', Value(' '), 
-                'aspirante__sapellido'
-            )
-        ).filter(
-            Q(no_expediente__icontains=query) |
-            Q(nombre_completo__icontains=query)|
-            Q(aspirante__doc_identidad__icontains=query)
+        ids = qs.filter(no_expediente__startswith=query).values('pk').union(
+            buscar(qs, query, prefijo='aspirante__').values('pk')
         )
+        qs = qs.filter(pk__in=ids).annotate(relevancia=Case(
+            When(no_expediente__startswith=query, then=Value(1.0)),
+            default=relevancia(query, prefijo='aspirante__'),
+            output_field=FloatField(),
+        ))
+    return qs
+
 
-    # 5. ORDENAMIENTO COMPLETO EN EL SERVIDOR (Todas las páginas)
+def search_contratos(request):
+    # 1. Obtener parámetros de filtros
+    query = request.GET.get('filter_contrato', '').strip()
+    page_num = request.GET.get('page', 1)
+    page_size = request.GET.get('per_page')
+    if not page_size:
+        page_size = '8'
+    
+    # 2. QuerySet Base con el Grafo Relacional expandido (Corrección N+1)
+    qs = CAlta.objects.select_related(
+        'aspirante', 
+        'cargo',
+        'cargo__departamento',
+        'cargo__ncargo',
+        'cargo__ncargo__grupo_escala',
+        'cargo__departamento__unidad_organizativa',
+        'cargo__rol',
+        'rol',
+        'tridente'
+    ).con_ultima_accion()  # fecha límite de cada fila sin una consulta por contrato
+
+    # 3-4. Filtros del aspirante y buscador (compartidos con la exportación en lote)
+    qs = filtrar_contratos(qs, request.GET)
+
+    # 5. ORDENAMIENTO EN SQL (ver contratos/utils.py): nunca se carga el listado completo
     sort_col = request.GET.get('sort', '')
     order = request.GET.get('order', 'asc')
-    
-    # Convertimos el QuerySet a una Lista. Aquí se ejecuta la única consulta SQL.
-    contratos_list = list(qs)
-    
-    if sort_col:
-        reverse_sort = (order == 'desc')
-        
-        if sort_col == 'expediente':
-            contratos_list.sort(key=lambda x: int(x.no_expediente) if x.no_expediente.isdigit() else 0, reverse=reverse_sort)
-        elif sort_col == 'nombre':
-            contratos_list.sort(key=lambda x: f"{x.aspirante.nombre} {x.aspirante.papellido} {x.aspirante.sapellido}".lower(), reverse=reverse_sort)
-        elif sort_col == 'area':
-            contratos_list.sort(key=lambda x: x.cargo.departamento.descripcion.lower() if x.cargo and x.cargo.departamento else "", reverse=reverse_sort)
-        elif sort_col == 'cat':
-            contratos_list.sort(key=lambda x: getattr(x.cargo.ncargo, 'get_cat_ocupacional_display')() if x.cargo and hasattr(x.cargo, 'ncargo') else "", reverse=reverse_sort)
-        elif sort_col == 'grupo':
-            def get_grupo_val(c):
-                nivel = c.cargo.ncargo.grupo_escala.nivel if c.cargo and c.cargo.ncargo and hasattr(c.cargo.ncargo, 'grupo_escala') and c.cargo.ncargo.grupo_escala else ""
-                return nivel_romano_a_int(nivel)
-            contratos_list.sort(key=get_grupo_val, reverse=reverse_sort)
-        elif sort_col == 'rol':
-            jerarquia = {"APOYO": 1, "FUNDAMENTAL": 2, "DECISORIO": 3, "CUADRO": 4}
-            def get_rol_val(c):
-                r = c.rol or (c.cargo.rol if c.cargo else None)
-                rol_str = r.tipo.upper() if r else "CUADRO"
-                return jerarquia.get(rol_str, 0)
-            contratos_list.sort(key=get_rol_val, reverse=reverse_sort)
-        elif sort_col == 'tridente':
-            contratos_list.sort(key=lambda x: x.tridente.tipo if x.tridente else "", reverse=reverse_sort)
-        elif sort_col == 'salario':
-            contratos_list.sort(key=lambda x: x.calcular_salario_escala() or 0, reverse=reverse_sort)
-
-    # 6. Paginación SOBRE la lista ya ordenada
-    paginator = Paginator(contratos_list, int(page_size))
-    page_obj = paginator.get_page(page_num)
-
-    return render(request, 'pages/contrato/partials/filter_contratos_list.html', {
-        'object_list': page_obj,  
-        'page_obj': page_obj,     
-        'paginator': paginator,   
-        'search_url': 'search_contrato', 
-        'current_page_size': str(page_size)  
-    })
+    # Sin columna elegida: más relevantes primero si hay búsqueda; si no, más recientes (-fecha_alta)
+    descendente = (order == 'desc') if sort_col else True
+    if query and not sort_col:
+        qs = qs.annotate(orden_valor=F('relevancia'))
+    else:
+        qs = anotar_orden_contratos(qs, sort_col)
+
+    contexto = {
+        'search_url': 'search_contrato',
+        'current_page_size': str(page_size)
+    }
+
+    # 6a. Paginación numerada (compatibilidad con ?page=N): LIMIT/OFFSET en la BD
+    if 'page' in request.GET:
+        orden = ['-orden_valor', '-pk'] if descendente else ['orden_valor', 'pk']
+        paginator = Paginator(qs.order_by(*orden), int(page_size))
+        page_obj = paginator.get_page(page_num)
+        contexto.update({'object_list': page_obj, 'page_obj': page_obj, 'paginator': paginator})
+
+    # 6b. Paginación por clave (?despues= / ?antes=): cuesta lo mismo en cualquier página
+    else:
+        keyset = paginar_keyset(
+            qs, int(page_size), descendente,
+            despues=request.GET.get('despues'), antes=request.GET.get('antes')
+        )
+        contexto.update({'object_list': keyset['object_list'], 'keyset': keyset})
+
+    return render(request, 'pages/contrato/partials/filter_contratos_list.html', contexto)
 
 
 
@@ -376,9 +373,9 @@ def validar_plazas_cargo(request):
                 except NTipoContrato.DoesNotExist:
                     pass
         
-            if cargo.cant_cubierta_real >= cargo.cant_aprobada:
+            if cargo.cant_cubierta >= cargo.cant_aprobada:
                 data['plazas_agotadas'] = True
-                data['mensaje'] = f"El Cargo '{cargo.ncargo.descripcion}' no tiene plazas oficiales disponibles ({cargo.cant_cubierta_real}/{cargo.cant_aprobada})"
+                data['mensaje'] = f"El Cargo '{cargo.ncargo.descripcion}' no tiene plazas oficiales disponibles ({cargo.cant_cubierta}/{cargo.cant_aprobada})"
                 
         except CargoPlantilla.DoesNotExist:
             pass
@@ -415,213 +412,22 @@ def cargar_cargos(request):
 
 
 def historico_trabajador(request, aspirante_id):
-
     try:
         aspirante = Aspirante.objects.get(pk=aspirante_id)
-        
-        # 1. Buscamos primero en contratos activos
-        contrato_data = CAlta.objects.filter(aspirante_id=aspirante_id).order_by('-fecha_alta').first()
-        
-        # 2. Si no hay contrato activo (está de baja), buscamos en el historial de bajas para recuperar el expediente vitalicio
-        if not contrato_data:
-            contrato_data = CBaja.objects.filter(aspirante_id=aspirante_id).order_by('-fecha_alta').first()
-            
-        exp_num = contrato_data.no_expediente if contrato_data else "---"
-        encabezado = {
-            'nombre_completo': f"{aspirante.nombre} {aspirante.papellido} {aspirante.sapellido}",
-            'ci': aspirante.doc_identidad,
-            'id': aspirante.id, 
-            'expediente': exp_num
-        }
     except Aspirante.DoesNotExist:
         return JsonResponse({'data': [], 'encabezado': {'nombre_completo': 'Desconocido', 'ci': ''}})
 
-    def fmt_dinero(valor):
-        try: return f"{float(valor):.2f}"
-        except: return "0.00"
-
-    hitos = []
-
-    # --- FUNCIÓN AUXILIAR PARA BUSCAR EL ID DEL MOVIMIENTO ---
-    def obtener_id_movimiento(aspirante_id, expediente, tipo_busqueda):
-        # Buscamos en TMovimiento el registro que coincide con este expediente y tipo
-        mov = TMovimiento.objects.filter(
-            aspirante_id=aspirante_id, 
-            no_expediente=expediente, 
-            tipo_movimiento=tipo_busqueda
-        ).first()
-        return mov.pk if mov else None
-
-    # --- FUENTE A: Altas Activas ---
-    altas_activas = CAlta.objects.filter(aspirante_id=aspirante_id)
-    for a in altas_activas:
-        # CORRECCIÓN: Ignorar el movimiento fantasma de "Alta Inicial" para buscar el pasado real
-        mov_id = obtener_id_movimiento(aspirante_id, a.no_expediente, 'Alta Inicial')
-        primer_mov = TMovimiento.objects.filter(contrato=a).exclude(tipo_movimiento='Alta Inicial').order_by('fecha_efectiva').first()
-        
-        if primer_mov and primer_mov.cargo_anterior != "---":
-            cargo_inicial = primer_mov.cargo_anterior
-            unidad_inicial = primer_mov.unidad_anterior or "---"
-            salario_inicial = primer_mov.salario_anterior
-        else:
-            cargo_inicial = a.cargo.ncargo.descripcion if a.cargo else "---"
-            unidad_inicial = a.cargo.departamento.unidad_organizativa.descripcion if (a.cargo and a.cargo.departamento) else "---"
-            salario_inicial = a.calcular_salario_escala()
-
-        hitos.append({
-            'id': mov_id,
-            'fecha_orden': a.fecha_alta,
-            'fecha_inicio': a.fecha_alta,
-            'evento': 'ALTA_PENDIENTE', 
-            'expediente': a.no_expediente,
-            'unidad': unidad_inicial,
-            'cargo': cargo_inicial,
-            'salario': fmt_dinero(salario_inicial),
-            'es_baja': False
-        })
-
-    # --- FUENTE B: Altas de Contratos Cerrados ---
-    altas_viejas = CBaja.objects.filter(aspirante_id=aspirante_id)
-    for b in altas_viejas:
-        if b.fecha_alta:
-            mov_id_alta = obtener_id_movimiento(aspirante_id, b.no_expediente, 'Alta Inicial')
-            mov_id_baja = obtener_id_movimiento(aspirante_id, b.no_expediente, 'Baja')
-            # CORRECCIÓN: Igual que arriba, ignoramos "Alta Inicial"
-            primer_mov_baja = TMovimiento.objects.filter(
-                aspirante_id=aspirante_id, 
-                no_expediente=b.no_expediente
-            ).exclude(tipo_movimiento='Alta Inicial').order_by('fecha_efectiva').first()
-
-            if primer_mov_baja and primer_mov_baja.cargo_anterior != "---":
-                cargo_baja_ini = primer_mov_baja.cargo_anterior
-                unidad_baja_ini = primer_mov_baja.unidad_anterior or "---"
-                salario_baja_ini = primer_mov_baja.salario_anterior
-            else:
-                cargo_baja_ini = b.cargo.ncargo.descripcion if b.cargo else "---"
-                unidad_baja_ini = b.cargo.departamento.unidad_organizativa.descripcion if (b.cargo and b.cargo.departamento) else "---"
-                salario_baja_ini = b.cargo.ncargo.salario_basico if b.cargo else 0
-
-            hitos.append({
-                'id': mov_id_alta,
-                'fecha_orden': b.fecha_alta,
-                'fecha_inicio': b.fecha_alta,
-                'evento': 'ALTA_PENDIENTE',
-                'expediente': b.no_expediente,
-                'unidad': unidad_baja_ini,
-                'cargo': cargo_baja_ini,
-                'salario': fmt_dinero(salario_baja_ini),
-                'es_baja': False
-            })
-            
-            # El evento de BAJA explícito
-            hitos.append({
-                'id': mov_id_baja,
-                'fecha_orden': b.fecha_baja,
-                'fecha_inicio': b.fecha_baja,
-                'evento': 'Baja',
-                'expediente': b.no_expediente,
-                'unidad': "---",
-                'cargo': "---",
-                'salario': "---",
-                'es_baja': True
-            })
-
-    # --- FUENTE C: Movimientos ---
-    # CORRECCIÓN: Filtramos los movimientos que crea el sistema por detrás ('Baja' y 'Alta Inicial')
-    movimientos = TMovimiento.objects.filter(aspirante_id=aspirante_id).exclude(tipo_movimiento__in=['Baja', 'Alta Inicial'])
-    
-    for m in movimientos:
-        tipo = "Movimiento Salario"
-        if m.unidad_anterior != m.unidad_nueva or m.cargo_anterior != m.cargo_nuevo:
-            tipo = "Movimiento Cargo"
-
-        hitos.append({
-            'id': m.pk,
-            'fecha_orden': m.fecha_efectiva,
-            'fecha_inicio': m.fecha_efectiva,
-            'evento': tipo,
-            'expediente': m.no_expediente,
-            'unidad': m.unidad_nueva or "---",
-            'cargo': m.cargo_nuevo,
-            'salario': fmt_dinero(m.salario_nuevo),
-            'es_baja': False
-        })
-
-    # --- ORDENACIÓN Y LÓGICA CRONOLÓGICA ---
-    hitos.sort(key=lambda x: x['fecha_orden'])
-
-    lista_final = []
-    total = len(hitos)
-    primer_alta = True
-    
-    # LA CLAVE: Leer el estado real del trabajador para saber si el último ciclo sigue vivo
-    esta_activo_ahora = (aspirante.estado == 'ACTIVO')
-
-    for i in range(total):
-        item = hitos[i]
-        
-        # 1. Definir si es Alta Inicial o Recontratación
-        if item['evento'] == 'ALTA_PENDIENTE':
-            if primer_alta:
-                item['evento'] = 'Alta Inicial'
-                primer_alta = False
-            else:
-                item['evento'] = 'Recontratación'
-
-        # =======================================================
-        # 2. CALCULAR FECHA FIN (SOLUCIÓN DEFINITIVA)
-        # =======================================================
-        if i == total - 1:
-            # Es el último evento de la historia:
-            if item['es_baja']:
-                # Si lo último registrado es una Baja, su estado actual es "En Baja"
-                # El color será rojo porque el evento es 'Baja' (text-danger)
-                item['fecha_fin'] = "Actualidad"
-            else:
-                # Si lo último es un contrato, solo es Actualidad si el aspirante está ACTIVO
-                item['fecha_fin'] = "Actualidad" if esta_activo_ahora else "Cerrado"
-        else:
-            proximo = hitos[i+1]
-            
-            # REGLA A: Contrato (Alta/Mov) seguido por su propia Baja.
-            # El contrato termina el mismo día que se emite la baja.
-            if not item['es_baja'] and proximo['es_baja'] and item['expediente'] == proximo['expediente']:
-                item['fecha_fin'] = proximo['fecha_inicio'].strftime('%d/%m/%Y')
-            
-            # REGLA B: Baja seguida por Recontratación (o Movimiento seguido por otro Movimiento).
-            # El estado anterior termina un día antes de que empiece el nuevo hito.
-            else:
-                fin_dt = proximo['fecha_inicio'] - timedelta(days=1)
-                item['fecha_fin'] = fin_dt.strftime('%d/%m/%Y')
-
-        # 3. Asignar Colores (Solo para la fecha fin)
-        colores = {
-            'Alta Inicial': 'text-success',      # Verde
-            'Recontratación': 'text-primary',    # Azul
-            'Movimiento Salario': 'text-gold',   # Dorado
-            'Movimiento Cargo': 'text-orange',   # Naranja
-            'Baja': 'text-danger'                # Rojo
-        }
-        item['estado_clase'] = colores.get(item['evento'], 'text-muted')
-        
-        # Formatear fecha inicio
-        item['fecha_inicio_str'] = item['fecha_inicio'].strftime('%d/%m/%Y')
-        lista_final.append(item)
-
-    return JsonResponse({'data': lista_final, 'encabezado': encabezado})
+    encabezado, hitos = linea_tiempo(aspirante)
+    return JsonResponse({'data': hitos, 'encabezado': encabezado})
 
 # --- 2. NUEVA VISTA PARA EXPORTAR HISTORIAL COMPLETO (PDF) ---
 class ExportarHistoricoPDFView(View):
     def get(self, request, aspirante_id):
-        from django.template.loader import get_template
-        from xhtml2pdf import pisa
-        
         aspirante = get_object_or_404(Aspirante, pk=aspirante_id)
         config = Configuracion.objects.first()
         
-        # Súper truco: Llamamos a tu propia función para reciclar los datos ordenados
-        respuesta = historico_trabajador(request, aspirante_id)
-        datos_historial = json.loads(respuesta.content)['data']
+        # Misma línea de tiempo que el histórico en pantalla, sin pasar por JSON
+        _, datos_historial = linea_tiempo(aspirante)
         
         context = {
             'aspirante': aspirante,
@@ -630,13 +436,10 @@ class ExportarHistoricoPDFView(View):
             'historial': datos_historial
         }
         
-        template = get_template('pages/reportes/pdf_historico_trabajador.html')
-        html = template.render(context)
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="Historico_{aspirante.doc_identidad}.pdf"'
-        
-        pisa.CreatePDF(html, dest=response)
-        return response
+        return respuesta_pdf(
+            'pages/reportes/pdf_historico_trabajador.html', context,
+            f"Historico_{aspirante.doc_identidad}.pdf", adjunto=False
+        )
 
 # --- 3. NUEVA VISTA PARA LA CÁPSULA DEL TIEMPO (SOLO LECTURA) ---
 def movimiento_detalle_readonly(request, pk):
@@ -790,16 +593,10 @@ class ContratoUpdateView(UpdateView):
         if contrato.cargo and contrato.tridente:
             cargo = contrato.cargo
             tridente_id = contrato.tridente.id
-            grupo_escala = cargo.ncargo.grupo_escala
-            rol = cargo.rol
+            monto = monto_escala(cargo.ncargo.grupo_escala_id, cargo.rol_id, tridente_id)
 
-            try:
-                salario_obj = NSalario.objects.get(
-                    grupo_escala=grupo_escala,
-                    rol=rol,
-                    tridente_id=tridente_id
-                )
-                monto = float(salario_obj.monto)
+            if monto is not None:
+                monto = float(monto)
                 
                 tarifa = round(monto / fondo, 5) if fondo else 0
                 extras = round((tarifa * porcentaje_extra) + tarifa, 5)
@@ -807,7 +604,7 @@ class ContratoUpdateView(UpdateView):
                 context['initial_salario_escala'] = round(monto, 2)
                 context['initial_tarifa_horaria'] = tarifa
                 context['initial_tarifa_extras'] = extras
-            except NSalario.DoesNotExist:
+            else:
                 context['initial_salario_escala'] = ""
                 context['initial_tarifa_horaria'] = ""
                 context['initial_tarifa_extras'] = ""
@@ -983,23 +780,14 @@ class ContratoDeleteView(DeleteView):
                     completar_cargo=completar_cargo_val
                 )
 
-                # E. Capturar el cargo antes de borrar el contrato
-                cargo_obj = None
-                if contrato.tipo and contrato.tipo.ocupa_plaza and contrato.cargo:
-                    cargo_obj = contrato.cargo
-
                 # Cambiar estado del aspirante a BAJA
                 if contrato.aspirante:
                     contrato.aspirante.estado = 'BAJA'
                     contrato.aspirante.save()
 
-                # F. Borrar contrato
+                # F. Borrar contrato (CAlta.delete libera la plaza del cargo)
                 contrato.delete()
 
-                # G. Refrescar el número oficial en la Base de Datos
-                if cargo_obj:
-                    cargo_obj.refrescar_conteo_plazas()
-
             # Usamos el PK del único movimiento creado
             pdf_url = reverse('imprimir_modelo_movimiento', kwargs={'pk': movimiento_baja.pk})
 
@@ -1016,6 +804,142 @@ class ContratoDeleteView(DeleteView):
                 'success': False, 
                 'message': f'Error interno al procesar la baja: {str(e)}'
             }, status=500)
+
+
+def baja_masiva(request):
+    """
+    Baja de varios contratos a la vez con fecha y causa comunes (fin de
+    contratos por oleadas). Mismos datos que el modal de baja individual, con
+    `contratos` repetido por cada contrato. Todo o nada: si alguno falla la
+    validación cronológica no se da de baja ninguno.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Método no permitido'}, status=405)
+
+    contratos_ids = request.POST.getlist('contratos')
+    fecha_baja_str = request.POST.get('fecha_baja')
+    fecha_efectiva_str = request.POST.get('fecha_efectiva')
+    causa_id = request.POST.get('causa_baja')
+
+    if not contratos_ids or not fecha_baja_str or not causa_id:
+        return JsonResponse({'success': False, 'message': 'Faltan datos obligatorios: Contratos, Fecha de Baja o Causa.'}, status=400)
+
+    try:
+        fecha_baja = datetime.strptime(fecha_baja_str, '%Y-%m-%d').date()
+        fecha_documento = datetime.strptime(fecha_efectiva_str, '%Y-%m-%d').date() if fecha_efectiva_str else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Formato de fecha inválido.'}, status=400)
+
+    try:
+        movimientos = dar_baja_masiva(
+            contratos_ids, fecha_baja, causa_id,
+            fecha_documento=fecha_documento,
+            cobro_sistema=request.POST.get('cobro_sistema_pago') == 'true',
+            actividad=request.POST.get('actividad_realizada'),
+            observaciones=request.POST.get('observaciones', ''),
+            completar_cargo=request.POST.get('completar_cargo') == 'true',
+        )
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'message': ' '.join(e.messages)}, status=400)
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'message': 'Selección de contratos inválida.'}, status=400)
+    except Exception as e:
+        logger.exception("Error al dar baja masiva")
+        return JsonResponse({'success': False, 'message': f'Error interno al procesar las bajas: {str(e)}'}, status=500)
+
+    ids = ','.join(str(m.pk) for m in movimientos)
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(movimientos)} contratos dados de baja y archivados correctamente.',
+        'pdf_url': f"{reverse('relacion_bajas_pdf')}?movimientos={ids}"
+    })
+
+
+class RelacionBajasPDFView(View):
+    """Documento único (PDF) con todas las bajas de una baja masiva."""
+
+    def get(self, request):
+        try:
+            ids = [int(pk) for pk in request.GET.get('movimientos', '').split(',') if pk]
+        except ValueError:
+            raise Http404("Selección de movimientos inválida.")
+
+        bajas = TMovimiento.objects.filter(pk__in=ids, tipo_movimiento='Baja').select_related('aspirante').order_by('no_expediente')
+        context = {
+            'bajas': bajas,
+            'config': Configuracion.objects.first(),
+            'fecha_hoy': datetime.now(),
+        }
+
+        return respuesta_pdf(
+            'pages/reportes/pdf_relacion_bajas.html', context,
+            f"Relacion_Bajas_{datetime.now().strftime('%d_%m_%Y')}.pdf", adjunto=False
+        )
+
+class RenovacionContratosView(View):
+    """
+    Renovación por lotes de los contratos que vencen en una ventana de fechas.
+    GET: página con filtros; con HTMX devuelve solo la tabla de propuesta
+    (nuevas duraciones y vencimientos, sin guardar nada). POST: aplica la
+    renovación a los contratos marcados, todo o nada.
+    """
+    template_name = 'pages/contrato/renovacion_contratos.html'
+    template_propuesta = 'pages/contrato/partials/tabla_renovacion.html'
+
+    @staticmethod
+    def _fecha(valor):
+        return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+
+    @staticmethod
+    def _dias(valor):
+        return int(valor) if valor else None
+
+    def get(self, request):
+        hoy = datetime.now().date()
+        try:
+            desde = self._fecha(request.GET.get('desde')) or hoy
+            hasta = self._fecha(request.GET.get('hasta')) or hoy + timedelta(days=30)
+            dias = self._dias(request.GET.get('dias'))
+        except ValueError:
+            return HttpResponse("Parámetros inválidos.", status=400)
+
+        contratos = previsualizar(contratos_por_vencer(
+            desde, hasta,
+            tipo_id=request.GET.get('tipo') or None,
+            unidad_id=request.GET.get('unidad') or None,
+            motivo_id=request.GET.get('motivo') or None,
+        ), dias)
+        context = {'contratos': contratos, 'desde': desde, 'hasta': hasta, 'dias': dias}
+
+        if request.headers.get('HX-Request'):
+            return render(request, self.template_propuesta, context)
+
+        context.update({
+            'tipos': NTipoContrato.objects.order_by('descripcion'),
+            'motivos': NMotivoContrato.objects.select_related('tipo_contrato').order_by('descripcion'),
+            'unidades': UnidadOrganizativa.objects.order_by('descripcion'),
+        })
+        return render(request, self.template_name, context)
+
+    def post(self, request):
+        try:
+            dias = self._dias(request.POST.get('dias'))
+            fecha_solicitud = self._fecha(request.POST.get('fecha_solicitud'))
+            movimientos = renovar_contratos(
+                request.POST.getlist('contratos'), dias,
+                fecha_solicitud=fecha_solicitud,
+                observaciones=request.POST.get('observaciones', ''),
+            )
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'message': ' '.join(e.messages)}, status=400)
+        except (ValueError, TypeError):
+            return JsonResponse({'success': False, 'message': 'Datos de renovación inválidos.'}, status=400)
+
+        return JsonResponse({
+            'success': True,
+            'message': f'{len(movimientos)} contratos renovados correctamente.',
+        })
+
 #*REPORTES
 
         
@@ -1058,12 +982,7 @@ class MovimientoUpdateView(UpdateView):
                 context['initial_tarifa_extras'] = round((context['initial_tarifa_horaria'] * porcentaje_extra) + context['initial_tarifa_horaria'], 5)
         
         # Añadimos la fecha límite cronológica para el JavaScript
-        ultimo_mov = TMovimiento.objects.filter(
-            aspirante=contrato.aspirante,
-            no_expediente=contrato.no_expediente
-        ).order_by('-fecha_efectiva').first()
-        
-        fecha_limite = ultimo_mov.fecha_efectiva if ultimo_mov else contrato.fecha_alta
+        fecha_limite = contrato.fecha_ultima_accion
         if fecha_limite:
             context['fecha_limite_js'] = fecha_limite.strftime('%Y-%m-%d')
 
@@ -1081,14 +1000,8 @@ class MovimientoUpdateView(UpdateView):
             # PASO 1: VALIDACIÓN CRONOLÓGICA (EL PORTERO)
             # =================================================================
             
-            # Buscamos si hay movimientos previos usando la ruta segura
-            ultimo_mov = TMovimiento.objects.filter(
-                aspirante=contrato.aspirante,
-                no_expediente=contrato.no_expediente
-            ).order_by('-fecha_efectiva').first()
-            
             # La fecha límite es: La del último movimiento, O si no hay, la fecha de Alta original
-            fecha_limite = ultimo_mov.fecha_efectiva if ultimo_mov else contrato.fecha_alta
+            fecha_limite = contrato.fecha_ultima_accion
 
             if nueva_fecha and nueva_fecha < fecha_limite:
                 # Si la nueva fecha es viajar al pasado -> ERROR
@@ -1514,19 +1427,13 @@ class ModeloMovimientoDocxView(View):
             })
 
         # --- GENERACIÓN DEL DOCUMENTO ---
+        # Caché por el contenido del contexto: el documento mezcla la foto del
+        # movimiento con datos vivos (nombre, contrato, configuración), así que
+        # se regenera en cuanto cambia cualquiera de ellos
         try:
             template_path = os.path.join(settings.BASE_DIR, 'templates', 'pages', 'reportes', '13-MOVIMIENTO DE NOMINAS.docx')
-            doc = DocxTemplate(template_path)
-            doc.render(context)
-            
-            buffer = BytesIO()
-            doc.save(buffer)
-            buffer.seek(0)
-            
             filename = f"Movimiento_{obj.no_expediente}.docx"
-            response = HttpResponse(buffer.getvalue(), content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+            return respuesta_docx(render_docx(template_path, context), filename)
         except Exception as e:
             return HttpResponse(f"Error al generar el documento: {str(e)}", status=500)
 # 2. ACTUALIZA ESTA FUNCIÓN (Agregamos el retorno de textos para OOB)
@@ -1568,38 +1475,29 @@ def cargar_salario(request):
 
             # --- ESCENARIO A: SALARIO FIJO DEL CARGO ---
             if tipo_salario == 'FIJ':
-                monto = float(cargo.ncargo.salario_basico)
+                monto = float(salario_cargo(cargo.ncargo, 'FIJ') or 0)
                 context['mostrar_tridente'] = False
             
-            # --- ESCENARIO B: SALARIO DINÁMICO DE LA TABLA ---
+            # --- ESCENARIO B: SALARIO DINÁMICO DE LA TABLA (en memoria) ---
             else:
-                salario_obj = None
+                salario_tabla = None
                 
                 if es_cuadro_por_cat:
                     context['mostrar_tridente'] = False
-                    salario_obj = NSalario.objects.filter(
-                        grupo_escala=grupo_obj,
-                        rol__isnull=True,
-                        tridente__isnull=True
-                    ).first()
+                    salario_tabla = salario_escala(cargo.ncargo.grupo_escala_id, cargo.rol_id, None, True)
                 else:
                     nivel_num = nivel_romano_a_int(grupo_obj.nivel) if grupo_obj else 0
                     
                     if 22 <= nivel_num <= 24 and (rol_obj and rol_obj.tipo != "Decisorio"):
                         context['mostrar_tridente'] = False
-                        salario_obj = None 
                     else:
                         context['mostrar_tridente'] = True 
                         
                         if tridente_id and rol_obj: 
-                            salario_obj = NSalario.objects.filter(
-                                grupo_escala=grupo_obj,
-                                rol=rol_obj,
-                                tridente_id=tridente_id
-                            ).first()
+                            salario_tabla = salario_escala(cargo.ncargo.grupo_escala_id, cargo.rol_id, int(tridente_id), False)
                 
-                if salario_obj and salario_obj.monto:
-                    monto = float(salario_obj.monto)
+                if salario_tabla:
+                    monto = float(salario_tabla)
 
             # --- CÁLCULOS FINALES ---
             if monto > 0:
@@ -1720,15 +1618,10 @@ def finalizar_contrato_wizard(request, aspirante_id):
                 
                 
                 # Rescatar cálculos salariales exactos
-                monto = 0
-                if unsaved_contrato.tipo_salario == 'FIJ':
-                    monto = float(cargo_obj.ncargo.salario_basico)
-                elif hasattr(unsaved_contrato, 'tridente_id') and unsaved_contrato.tridente_id:
-                    sal_obj = NSalario.objects.filter(grupo_escala=cargo_obj.ncargo.grupo_escala, rol=cargo_obj.rol, tridente_id=unsaved_contrato.tridente_id).first()
-                    if sal_obj: monto = float(sal_obj.monto)
-                elif cargo_obj.ncargo.es_cuadro:
-                    sal_obj = NSalario.objects.filter(grupo_escala=cargo_obj.ncargo.grupo_escala, rol__isnull=True, tridente__isnull=True).first()
-                    if sal_obj: monto = float(sal_obj.monto)
+                monto = float(salario_cargo(
+                    cargo_obj.ncargo, unsaved_contrato.tipo_salario, cargo_obj.rol_id,
+                    getattr(unsaved_contrato, 'tridente_id', None)
+                ) or 0)
 
                 if monto > 0:
                     config = Configuracion.objects.first()
@@ -1871,81 +1764,101 @@ def finalizar_contrato_wizard(request, aspirante_id):
             traceback.print_exc()
             return JsonResponse({'form_is_valid': False, 'error_popup': str(e)}, status=500)
 
-def exportar_contratos_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Trabajadores Activos"
-
-    # Estilos
-    negrita_centrado = Font(bold=True, color="FFFFFF")
-    fondo_azul = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-    alineacion_centro = Alignment(horizontal="center", vertical="center")
-
-    # Cabeceras (Se añaden las tallas al final)
-    cabeceras = [
-        "No. Expediente", "Nombre", "1er Apellido", "2do Apellido",
-        "Unidad Organizativa", "Departamento", "Cargo", "Cat. Ocupacional", "Tipo de Contrato", "Motivo",
-        "Fecha Alta", "Duración (Dias)", "C. Formal", "Funcionario", "Designado",
-        "Chofer Prof.", "Jubilado Recontratado", "Misión", "País Misión", "Reg. Militar",
-        "Grupo Escala", "Rol", "Tridente", "Instructor", "CNCI",
-        "Carnet de Ident.", "Edad", "Sexo", "Raza", "Nivel Educacional", "Especialidad", "Título de Oro",
-        "Grado Científico", "Provincia", "Municipio", "Dirección", "Fijo", "Movil",
-        "Talla Pantalón/Falda", "Talla Camisa/Blusa", "Talla Zapatos" # <--- NUEVAS COLUMNAS
-    ]
-    ws.append(cabeceras)
-
-    # Formato cabeceras
-    for col_num, cell in enumerate(ws[1], 1):
-        cell.font = negrita_centrado
-        cell.fill = fondo_azul
-        cell.alignment = alineacion_centro
-        ws.column_dimensions[get_column_letter(col_num)].width = 20
-
-    # Consulta Optimizada
-    contratos = CAlta.objects.filter(aspirante__estado='ACTIVO').select_related(
-        'aspirante', 'aspirante__municipio', 'aspirante__provincia', 'aspirante__especialidad',
-        'tipo', 'motivo', 'cargo', 'cargo__ncargo', 'cargo__ncargo__grupo_escala',
-        'cargo__departamento', 'cargo__departamento__unidad_organizativa', 'rol', 'tridente'
-    ).order_by('cargo__departamento__unidad_organizativa__descripcion', 'aspirante__papellido')
+# Cabeceras del listado de activos (las tallas van al final)
+CABECERAS_EXCEL_ACTIVOS = [
+    "No. Expediente", "Nombre", "1er Apellido", "2do Apellido",
+    "Unidad Organizativa", "Departamento", "Cargo", "Cat. Ocupacional", "Tipo de Contrato", "Motivo",
+    "Fecha Alta", "Duración (Dias)", "C. Formal", "Funcionario", "Designado",
+    "Chofer Prof.", "Jubilado Recontratado", "Misión", "País Misión", "Reg. Militar",
+    "Grupo Escala", "Rol", "Tridente", "Instructor", "CNCI",
+    "Carnet de Ident.", "Edad", "Sexo", "Raza", "Nivel Educacional", "Especialidad", "Título de Oro",
+    "Grado Científico", "Provincia", "Municipio", "Dirección", "Fijo", "Movil",
+    "Talla Pantalón/Falda", "Talla Camisa/Blusa", "Talla Zapatos",
+]
+
+# Proyección plana por fila: sin instancias ni select_related
+COLUMNAS_EXCEL_ACTIVOS = (
+    'no_expediente', 'aspirante__nombre', 'aspirante__papellido', 'aspirante__sapellido',
+    'cargo__departamento__unidad_organizativa__descripcion', 'cargo__departamento__descripcion',
+    'cargo__ncargo__descripcion', 'cargo__ncargo__cat_ocupacional',
+    'tipo__descripcion', 'motivo__descripcion',
+    'fecha_alta', 'duracion', 'c_formal', 'cargo__funcionario', 'cargo__designado',
+    'profesional', 'jubilado_recontratado', 'mision', 'pais', 'reg_militar',
+    'cargo__ncargo__grupo_escala__nivel', 'rol__tipo', 'tridente__tipo', 'instructor', 'cnci',
+    'aspirante__doc_identidad', 'aspirante__fecha_nacimiento', 'aspirante__sexo', 'aspirante__raza',
+    'aspirante__nivel_educ', 'aspirante__especialidad__nombre', 'aspirante__titulo_oro',
+    'aspirante__grado_cientifico', 'aspirante__provincia__nombre', 'aspirante__municipio__nombre',
+    'aspirante__direccion', 'aspirante__movil_personal', 'aspirante__fijo_personal',
+    'aspirante__tpantalon', 'aspirante__tcamisa', 'aspirante__tzapatos',
+)
+
+
+def _filas_excel_activos(contratos):
+    # Etiquetas de los choices resueltas una sola vez, no con get_*_display() por fila
+    etiquetas = {
+        campo: dict(Aspirante._meta.get_field(campo).flatchoices)
+        for campo in ('sexo', 'raza', 'nivel_educ')
+    }
+    hoy = datetime.now().date()
 
     def si_no(valor): return "Sí" if valor else "No"
 
-    for c in contratos:
-        asp = c.aspirante
-
-        # --- Obtener la categoría mapeada (más claro) ---
-        cat_sigla = getattr(c.cargo.ncargo, 'cat_ocupacional', '') if c.cargo and c.cargo.ncargo else ''
-        cat_valor = CAT_MAP.get(cat_sigla, cat_sigla[:1])  # Si no está en el mapa, usa la primera letra
-
-        fila = [
-            c.no_expediente, asp.nombre, asp.papellido, asp.sapellido,
-            getattr(c.cargo.departamento.unidad_organizativa, 'descripcion', '') if c.cargo and c.cargo.departamento else "",
-            getattr(c.cargo.departamento, 'descripcion', '') if c.cargo else "",
-            getattr(c.cargo.ncargo, 'descripcion', '') if c.cargo else "",
-            cat_valor,   # <--- AHORA SÍ SE USA LA VARIABLE
-            getattr(c.tipo, 'descripcion', ''), getattr(c.motivo, 'descripcion', ''),
-            c.fecha_alta.strftime('%d/%m/%Y') if c.fecha_alta else "", c.duracion or "",
-            si_no(c.c_formal), si_no(c.funcionario), si_no(c.designado),
-            si_no(c.profesional), si_no(c.jubilado_recontratado), si_no(c.mision), c.pais or "", c.reg_militar or "",
-            # Grupo Escala
-            getattr(c.cargo.ncargo.grupo_escala, 'nivel', '') if c.cargo and c.cargo.ncargo and getattr(c.cargo.ncargo, 'grupo_escala', None) else "",
-            getattr(c.rol, 'tipo', ''), getattr(c.tridente, 'tipo', ''),
-            c.instructor or 0, c.cnci or 0,
-            asp.doc_identidad, asp.get_edad or "", asp.get_sexo_display(), asp.get_raza_display(),
-            asp.get_nivel_educ_display(), getattr(asp.especialidad, 'nombre', ''), si_no(asp.titulo_oro),
-            asp.grado_cientifico or "", getattr(asp.provincia, 'nombre', ''), getattr(asp.municipio, 'nombre', ''),
-            asp.direccion or "", asp.movil_personal or "", asp.fijo_personal or "",
+    def edad(nacimiento):
+        if not nacimiento:
+            return ""
+        return hoy.year - nacimiento.year - ((hoy.month, hoy.day) < (nacimiento.month, nacimiento.day))
+
+    for (expediente, nombre, papellido, sapellido, unidad, departamento, cargo, cat_sigla, tipo, motivo,
+         fecha_alta, duracion, c_formal, funcionario, designado, profesional, jubilado, mision, pais,
+         reg_militar, grupo, rol, tridente, instructor, cnci, carnet, nacimiento, sexo, raza, nivel_educ,
+         especialidad, titulo_oro, grado, provincia, municipio, direccion, movil, fijo,
+         tpantalon, tcamisa, tzapatos) in contratos:
+        cat_sigla = cat_sigla or ''
+        yield [
+            expediente, nombre, papellido, sapellido,
+            unidad or "", departamento or "", cargo or "",
+            CAT_MAP.get(cat_sigla, cat_sigla[:1]),  # Si no está en el mapa, usa la primera letra
+            tipo or "", motivo or "",
+            fecha_alta.strftime('%d/%m/%Y') if fecha_alta else "", duracion or "",
+            si_no(c_formal), si_no(funcionario), si_no(designado),
+            si_no(profesional), si_no(jubilado), si_no(mision), pais or "", reg_militar or "",
+            grupo or "", rol or "", tridente or "",
+            instructor or 0, cnci or 0,
+            carnet, edad(nacimiento), etiquetas['sexo'].get(sexo, sexo or ""),
+            etiquetas['raza'].get(raza, raza or ""), etiquetas['nivel_educ'].get(nivel_educ, nivel_educ or ""),
+            especialidad or "", si_no(titulo_oro),
+            grado or "", provincia or "", municipio or "",
+            direccion or "", movil or "", fijo or "",
             # Tallas
-            asp.tpantalon or "",
-            asp.tcamisa or "",
-            asp.tzapatos or ""
+            tpantalon or "", tcamisa or "", tzapatos or "",
         ]
-        ws.append(fila)
 
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="Listado_Activos_{datetime.now().strftime("%d_%m_%Y")}.xlsx"'
-    wb.save(response)
-    return response
+
+def contratos_activos_excel():
+    return CAlta.objects.filter(aspirante__estado='ACTIVO').order_by(
+        'cargo__departamento__unidad_organizativa__descripcion', 'aspirante__papellido'
+    )
+
+
+def nombre_excel_activos():
+    return f'Listado_Activos_{datetime.now().strftime("%d_%m_%Y")}.xlsx'
+
+
+def exportar_contratos_excel(request):
+    """
+    Listado de trabajadores activos en Excel. Por defecto se encola como
+    tarea (contratos/tareas.py) y se muestra su progreso: el libro de toda la
+    plantilla no cabe en el tiempo máximo de una petición. Con ?directo=1 se
+    genera en la petición (filas por bloques con values_list().iterator() en
+    modo write-only: memoria acotada, pero sin bytes hasta el final).
+    """
+    if not request.GET.get('directo'):
+        return respuesta_tarea(request, Tarea.encolar('contratos.exportar_excel', usuario=request.user))
+
+    contratos = contratos_activos_excel().values_list(*COLUMNAS_EXCEL_ACTIVOS).iterator(chunk_size=2000)
+    return respuesta_excel_streaming(
+        nombre_excel_activos(), "Trabajadores Activos", CABECERAS_EXCEL_ACTIVOS, _filas_excel_activos(contratos)
+    )
 
 MAPA_CATEGORIA_TEXTO = {
     'OPE': 'Obrero',
@@ -1956,6 +1869,23 @@ MAPA_CATEGORIA_TEXTO = {
     'CEJ': 'Cuadro',
 }
 
+# Relaciones que usan los documentos legales: un contrato (o un lote) en una sola consulta
+RELACIONES_CONTRATO_WORD = (
+    'aspirante__municipio',
+    'aspirante__provincia',
+    'aspirante__especialidad',
+    'cargo__departamento__unidad_organizativa',
+    'cargo__ncargo__grupo_escala',
+    'cargo__rol',
+    'rol',
+    'tipo',
+    'motivo',
+    'tridente',
+    'cla',
+    'nocturnidad_1__nocturnidad',
+    'nocturnidad_2__nocturnidad',
+)
+
 class ExportarContratoWordView(FormView):
     template_name = "pages/contrato/exportar_contrato.html" # HTML que crearemos luego
     form_class = ExportarContratoWordForm
@@ -1968,30 +1898,19 @@ class ExportarContratoWordView(FormView):
     def _get_contrato_optimizado(self, pk):
         """ Consulta unificada para evitar N+1 en las relaciones del contrato """
         try:
-            return CAlta.objects.select_related(
-                'aspirante__municipio',
-                'aspirante__provincia',
-                'aspirante__especialidad',
-                'cargo__departamento__unidad_organizativa',
-                'cargo__ncargo__grupo_escala',
-                'cargo__rol',
-                'tipo',
-                'motivo',
-                'tridente',
-                'cla',
-                'nocturnidad_1__nocturnidad',
-                'nocturnidad_2__nocturnidad'
-            ).get(pk=pk)
+            return CAlta.objects.select_related(*RELACIONES_CONTRATO_WORD).get(pk=pk)
         except CAlta.DoesNotExist:
             raise Http404("El contrato solicitado no existe.")
 
     def get_form_kwargs(self):
         """Inyecta el queryset de cuadros activos al formulario."""
         kwargs = super().get_form_kwargs()
+        kwargs['cuadros_qs'] = self.cuadros_firmantes()
+        return kwargs
 
-        from bolsa.models import Aspirante
-
-        kwargs['cuadros_qs'] = (
+    @staticmethod
+    def cuadros_firmantes():
+        return (
             Aspirante.objects.filter(
                 estado='ACTIVO',
                 calta_contratos__cargo__ncargo__cat_ocupacional__in=['CDI', 'CEJ']
@@ -2000,15 +1919,16 @@ class ExportarContratoWordView(FormView):
             .order_by('nombre', 'papellido')
         )
 
-        return kwargs
-
     def get_initial(self):
         """ Inicializa el formulario transitorio con datos pre-procesados """
         initial = super().get_initial()
         contrato = self._get_contrato_optimizado(self.kwargs['pk'])
-        
-        config = Configuracion.objects.first()
-        
+        initial.update(self._valores_iniciales(contrato, Configuracion.objects.first()))
+        return initial
+
+    def _valores_iniciales(self, contrato, config):
+        """ Valores por defecto que dependen del contrato: período de pago, fecha efectiva y nocturnidad """
+        initial = {}
         if config and config.periodo:
             initial['periodo_pago'] = 'Quincenal' if config.periodo == 15 else 'Mensual'
             
@@ -2072,8 +1992,9 @@ class ExportarContratoWordView(FormView):
         except ValueError:
             return "________"
 
-    def _compilar_contexto_word(self, contrato, cleaned_data, config):
-        """ Consolida todos los datos en un diccionario listo para DocxTpl """
+    def _datos_firmante(self, cleaned_data, datos=None):
+        """ Cuadro que firma y provincia/municipio de la entidad: iguales para todos los contratos de la petición """
+        datos = self.request.POST if datos is None else datos
         
         # 1. Identificación Cuadro Firmante
         empleador_nombre = ""
@@ -2098,7 +2019,40 @@ class ExportarContratoWordView(FormView):
             if contrato_actual and contrato_actual.cargo and contrato_actual.cargo.ncargo:
                 empleador_cargo = contrato_actual.cargo.ncargo.descripcion
 
-        # 2. Fechas para el cierre del documento
+        # 2. Extracción de Provincia y Municipio (Desde el HTML manual)
+        prov_id = datos.get('provincia_entidad')
+        muni_id = datos.get('municipio_entidad')
+        
+        entidad_provincia = ""
+        entidad_municipio = ""
+        
+        if prov_id:
+            from nomencladores.models import NProvincia
+            prov_obj = NProvincia.objects.filter(id=prov_id).first()
+            if prov_obj: entidad_provincia = prov_obj.nombre
+            
+        if muni_id:
+            from nomencladores.models import NMunicipio
+            muni_obj = NMunicipio.objects.filter(id=muni_id).first()
+            if muni_obj: entidad_municipio = muni_obj.nombre
+
+        return {
+            'empleador_nombre': empleador_nombre,
+            'empleador_cargo': empleador_cargo,
+            'entidad_provincia': entidad_provincia,
+            'entidad_municipio': entidad_municipio,
+        }
+
+    def _compilar_contexto_word(self, contrato, cleaned_data, config, firmante=None):
+        """ Consolida todos los datos en un diccionario listo para DocxTpl """
+        if firmante is None:
+            firmante = self._datos_firmante(cleaned_data)
+        empleador_nombre = firmante['empleador_nombre']
+        empleador_cargo = firmante['empleador_cargo']
+        entidad_provincia = firmante['entidad_provincia']
+        entidad_municipio = firmante['entidad_municipio']
+
+        # 1. Fechas para el cierre del documento
         fecha_efectiva = cleaned_data.get('fecha_efectiva')
         if fecha_efectiva:
             firma_dia = str(fecha_efectiva.day).zfill(2)
@@ -2109,7 +2063,7 @@ class ExportarContratoWordView(FormView):
         else:
             firma_dia = firma_mes = firma_anno = ""
 
-        # 3. Matemática Salarial
+        # 2. Matemática Salarial
         monto_escala = contrato.calcular_salario_escala()
         salario_escala = f"{monto_escala:.2f}" if monto_escala else ""
         tarifa_horaria = ""
@@ -2118,31 +2072,14 @@ class ExportarContratoWordView(FormView):
             fondo = float(config.fondo_tiempo_calc_tarif)
             tarifa_horaria = f"{round(float(monto_escala) / fondo, 5):.5f}" if fondo else ""
 
-        # 4. Extracción de Provincia y Municipio (Desde el HTML manual)
-        prov_id = self.request.POST.get('provincia_entidad')
-        muni_id = self.request.POST.get('municipio_entidad')
-        
-        entidad_provincia = ""
-        entidad_municipio = ""
-        
-        if prov_id:
-            from nomencladores.models import NProvincia
-            prov_obj = NProvincia.objects.filter(id=prov_id).first()
-            if prov_obj: entidad_provincia = prov_obj.nombre
-            
-        if muni_id:
-            from nomencladores.models import NMunicipio
-            muni_obj = NMunicipio.objects.filter(id=muni_id).first()
-            if muni_obj: entidad_municipio = muni_obj.nombre
-
-        # 5. Resolución de Nombramiento (Limpiando el "Campo Vacío")
+        # 3. Resolución de Nombramiento (Limpiando el "Campo Vacío")
         res_no = ""
         if contrato.funcionario and contrato.funcionario_res:
             res_no = contrato.funcionario_res
         elif contrato.designado and contrato.designado_res:
             res_no = contrato.designado_res
 
-        # 6. Construcción Final del Diccionario (Valores por defecto en "" para usar el Subrayado de Word)
+        # 4. Construcción Final del Diccionario (Valores por defecto en "" para usar el Subrayado de Word)
         ctx = {
             # ENTIDAD Y FIRMANTE
             'entidad_nombre': (
@@ -2239,26 +2176,103 @@ class ExportarContratoWordView(FormView):
         # Compilar Contexto (Inyectamos form.cleaned_data)
         context_word = self._compilar_contexto_word(contrato, form.cleaned_data, config)
         
-        # Localizar plantilla según el tipo de documento elegido
+        template_path = self._ruta_plantilla(tipo)
+        return respuesta_docx(render_docx(template_path, context_word), self._nombre_archivo(contrato, tipo))
+
+    def _ruta_plantilla(self, tipo):
+        """ Plantilla según el tipo de documento elegido (404 si no está en el servidor) """
         nombre_plantilla = self.PLANTILLAS.get(tipo, self.PLANTILLAS['creacion'])
         template_path = os.path.join(settings.BASE_DIR, 'plantillas_word', 'documentos_legales', nombre_plantilla)
-        
+
         if not os.path.exists(template_path):
             # Si el archivo fue borrado del disco, lanzamos el 404
             raise Http404("La plantilla legal oficial no se encuentra en el servidor. Ruta buscada: " + template_path)
+        return template_path
 
-        # Inyección a través de DocxTemplate
-        doc = DocxTemplate(template_path)
-        doc.render(context_word)
-        
-        # Preparación de la respuesta HTTP para descarga
-        buffer = BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
-        
-        prefijo = "Modificacion" if tipo == 'modificacion' else "Contrato_Trabajo"
-        filename = f"{prefijo}_{contrato.aspirante.nombre}_{contrato.aspirante.papellido}.docx"
-        response = HttpResponse(buffer.read(), content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
\ No newline at end of file
+    @staticmethod
+    def _prefijo(tipo):
+        return "Modificacion" if tipo == 'modificacion' else "Contrato_Trabajo"
+
+    def _nombre_archivo(self, contrato, tipo):
+        return f"{self._prefijo(tipo)}_{contrato.aspirante.nombre}_{contrato.aspirante.papellido}.docx"
+
+
+class ExportarContratosLoteView(ExportarContratoWordView):
+    """
+    Contratos en lote (POST): los ids de `contratos` o, si no se envían, los
+    que cumplan los filtros del listado (search_contratos). Se leen en una
+    sola consulta, se generan en los procesos de WORD_WORKERS y se devuelven
+    en un ZIP o en un único .docx con un contrato por página. Los campos del
+    formulario valen para todos; los vacíos toman el valor por defecto de
+    cada contrato (fecha de alta, nocturnidad, período de pago). Con
+    `segundo_plano` se encola como tarea y se responde con su progreso.
+    """
+    form_class = ExportarContratosLoteForm
+    http_method_names = ['post']
+    MAXIMO = 500
+
+    def get_initial(self):
+        return {}
+
+    def form_invalid(self, form):
+        return JsonResponse({'errores': form.errors}, status=400)
+
+    def _contratos(self, ids, datos):
+        qs = CAlta.objects.select_related(*RELACIONES_CONTRATO_WORD)
+        qs = qs.filter(pk__in=ids) if ids else filtrar_contratos(qs, datos)
+        return list(qs.order_by('no_expediente', 'pk')[:self.MAXIMO + 1])
+
+    def form_valid(self, form):
+        if form.cleaned_data.get('segundo_plano'):
+            datos = {k: v for k, v in self.request.POST.items() if k != 'csrfmiddlewaretoken'}
+            tarea = Tarea.encolar('contratos.contratos_word_lote', datos, usuario=self.request.user)
+            return respuesta_tarea(self.request, tarea)
+
+        try:
+            nombre, contenido = self.generar_lote(form, self.request.POST)
+        except ValidationError as e:
+            return JsonResponse({'errores': {'contratos': e.messages}}, status=400)
+        except PoolOcupado as e:
+            return HttpResponse(str(e), status=503)
+        except ErrorTrabajo as e:
+            return HttpResponse(f"Error al generar los documentos: {str(e)}", status=500)
+
+        if nombre.endswith('.docx'):
+            return respuesta_docx(contenido, nombre)
+        return FileResponse(BytesIO(contenido), as_attachment=True, filename=nombre)
+
+    def generar_lote(self, form, datos, tarea=None):
+        """
+        (nombre_archivo, bytes) del lote para el formulario ya validado; `datos`
+        son los valores enviados (filtros del listado, provincia y municipio de
+        la entidad). ValidationError si no hay contratos o son demasiados.
+        """
+        contratos = self._contratos(form.cleaned_data['contratos'], datos)
+        if not contratos:
+            raise ValidationError("No hay contratos que exportar.")
+        if len(contratos) > self.MAXIMO:
+            raise ValidationError(f"Se pueden exportar como mucho {self.MAXIMO} contratos a la vez.")
+
+        config = Configuracion.objects.first()
+        tipo = form.cleaned_data.get('tipo_documento', 'creacion')
+        template_path = self._ruta_plantilla(tipo)
+        firmante = self._datos_firmante(form.cleaned_data, datos)
+        comunes = {k: v for k, v in form.cleaned_data.items() if v not in (None, '')}
+
+        contextos = []
+        for contrato in contratos:
+            datos_contrato = {**self._valores_iniciales(contrato, config), **comunes}
+            contextos.append(self._compilar_contexto_word(contrato, datos_contrato, config, firmante))
+
+        if tarea:
+            tarea.reportar(10, f"Generando {len(contratos)} documentos...")
+        documentos = render_lote(template_path, contextos)
+        if tarea:
+            tarea.reportar(90, "Empaquetando...")
+
+        nombre_lote = f"{self._prefijo(tipo)}_{datetime.now().strftime('%d_%m_%Y')}"
+        if form.cleaned_data['formato'] == 'docx':
+            return f"{nombre_lote}.docx", unir_documentos(documentos)
+
+        nombres = [f"{contrato.no_expediente}_{self._nombre_archivo(contrato, tipo)}" for contrato in contratos]
+        return f"{nombre_lote}.zip", comprimir(zip(nombres, documentos))
\ No newline at end of file
@@ -6,7 +6,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Definimos el esquema (NombreVariable=(Tipo, ValorPorDefecto)) al instanciar
 env = environ.Env(
-    DEBUG=(bool, True)
+    DEBUG=(bool, True),
+    TAREAS_EN_LINEA=(bool, False),
 )
 env.read_env(BASE_DIR / "core" / ".env", encoding="utf-8")
 
@@ -29,12 +30,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'import_export',
     'django_htmx',
     #?APLICACIONES
     'bolsa', 'contratos', 'strorganizativa', 'nomencladores',
     'notificaciones', 'dashboard', 'configuracion', 'usuarios', 'auditoria',
-    'solicitudes', 'informes',  'informe_inteligente',
+    'solicitudes', 'informes',  'informe_inteligente', 'tareas',
 ]
 
 MIDDLEWARE = [
@@ -93,6 +95,23 @@ DATABASES = {
     }
 }
 
+# Caché de widgets del Dashboard e informes. Las claves llevan la versión de datos
+# (dashboard.VersionDatos), así que en producción conviene un backend compartido
+# entre procesos (Redis/Memcached); en local basta la memoria del proceso.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'orbith',
+    }
+}
+
+# Generación de PDF (reportes/pdf.py): procesos dedicados a xhtml2pdf, tiempo
+# máximo por documento (segundos) y cuánto se reutiliza un PDF idéntico.
+# Con PDF_WORKERS = 0 se convierte en el propio proceso (desarrollo, tests).
+PDF_WORKERS = 2
+PDF_TIMEOUT = 60
+PDF_CACHE_TTL = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -130,6 +149,29 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Documentos Word ya generados (reportes/word.py), por hash de plantilla y datos.
+# Fuera de MEDIA_ROOT: contienen datos personales y el servidor web no debe
+# servirlos. Se pueden borrar en cualquier momento: se regeneran al pedirse.
+# ejecutar_tareas borra los que llevan WORD_CACHE_MAX_DIAS sin usarse y, si aún
+# ocupan más de WORD_CACHE_MAX_MB, los menos usados (ver reportes.word.limpiar_cache).
+WORD_CACHE_DIR = BASE_DIR / "privado" / "cache_word"
+WORD_CACHE_MAX_DIAS = 30
+WORD_CACHE_MAX_MB = 1024
+# Procesos y tiempo máximo por documento para los lotes de Word (0: en el propio proceso)
+WORD_WORKERS = 2
+WORD_TIMEOUT = 60
+
+# Cola de tareas en segundo plano (app tareas, comando ejecutar_tareas).
+# TAREAS_EN_LINEA ejecuta cada tarea al confirmarse la transacción que la
+# encola, sin trabajadores (desarrollo). Una tarea en curso durante más de
+# TAREAS_MAX_DURACION segundos se da por interrumpida.
+TAREAS_EN_LINEA = env('TAREAS_EN_LINEA')
+TAREAS_MAX_DURACION = 3600
+# Resultados y archivos subidos de las tareas: fuera de MEDIA_ROOT para que el
+# servidor web no los sirva; solo se descargan por la vista de la tarea, que
+# comprueba el usuario.
+TAREAS_ROOT = BASE_DIR / "privado" / "tareas"
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
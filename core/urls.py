@@ -8,6 +8,7 @@ from usuarios.views import CustomLoginView
 urlpatterns = [
     # DASHBOARD PRINCIPAL
     path('', dashboard_views.DashboardView.as_view(), name='dashboard'),
+    path('dashboard/', include('dashboard.urls')),
     
     ## ---------------------------------------------------------
     # LA NUEVA APP DE INFORMES (Esta línea sustituye a todas las anteriores)
@@ -27,6 +28,7 @@ urlpatterns = [
     path('notificaciones/', include('notificaciones.urls')),
     path('usuarios/', include('usuarios.urls')),
     path('solicitudes/', include('solicitudes.urls')),
+    path('tareas/', include('tareas.urls')),
     
     # SISTEMA DE AUTENTICACIÓN
     path('accounts/login/', CustomLoginView.as_view(), name='login'),
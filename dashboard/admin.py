@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import ResumenDashboard
 
-# Register your models here.
+
+@admin.register(ResumenDashboard)
+class ResumenDashboardAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'unidad', 'vigente', 'actualizado')
+    list_filter = ('fecha', 'vigente')
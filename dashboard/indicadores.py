@@ -0,0 +1,297 @@
+"""
+Indicadores del Dashboard calculados en la base de datos.
+
+Cada función resuelve un bloque del tablero con consultas agregadas
+(Count/Sum con filter=, Case/When, GROUP BY), de modo que el coste no
+depende de cuántos contratos activos existan: nunca se recorren los
+contratos en Python.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Avg, Case, Count, DateField, DurationField, ExpressionWrapper, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from bolsa.models import Aspirante
+from contratos.models import CAlta, CBaja
+from strorganizativa.models import CargoPlantilla, Departamento
+
+
+MESES_CORTOS = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Límites superiores (inclusive) de cada barra de la pirámide: 18-25, 26-35, 36-45, 46-55, 56-65, 66+
+BANDAS_EDAD = [25, 35, 45, 55, 65]
+
+DIAS_AVISO = 45
+
+
+# Ruta desde CAlta/CBaja hasta su Unidad Organizativa
+RUTA_UNIDAD = 'cargo__departamento__unidad_organizativa'
+
+
+def _por_unidad(qs, unidad=None, ruta=RUTA_UNIDAD):
+    """Restringe `qs` a una Unidad Organizativa (None = toda la entidad)."""
+    return qs.filter(**{ruta: unidad}) if unidad is not None else qs
+
+
+def contratos_activos(unidad=None):
+    return _por_unidad(CAlta.objects.filter(aspirante__estado='ACTIVO'), unidad)
+
+
+def _hace_annos(hoy, annos):
+    """Misma fecha de hoy, `annos` años atrás (el 29/02 cae en 28/02)."""
+    try:
+        return hoy.replace(year=hoy.year - annos)
+    except ValueError:
+        return hoy.replace(year=hoy.year - annos, day=28)
+
+
+def _edad(fecha_nacimiento, hoy):
+    return hoy.year - fecha_nacimiento.year - (
+        (hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day)
+    )
+
+
+def _porcentaje(parte, total, decimales=1):
+    return round((parte / total) * 100, decimales) if total else 0
+
+
+# =====================================================================
+# 1. TARJETAS, GÉNERO, CATEGORÍAS Y KPIs (una sola consulta agregada)
+# =====================================================================
+def resumen_plantilla(activos, hoy, unidad=None):
+    dias_en_empresa = ExpressionWrapper(
+        Value(hoy, output_field=DateField()) - F('fecha_alta'),
+        output_field=DurationField()
+    )
+    r = activos.aggregate(
+        total=Count('id'),
+        hombres=Count('id', filter=Q(aspirante__sexo='M')),
+        mujeres=Count('id', filter=Q(aspirante__sexo='F')),
+        adiestrados=Count('id', filter=Q(tipo__es_adiestrado=True)),
+        ope=Count('id', filter=Q(cargo__ncargo__cat_ocupacional='OPE')),
+        tec=Count('id', filter=Q(cargo__ncargo__cat_ocupacional='TEC')),
+        adm=Count('id', filter=Q(cargo__ncargo__cat_ocupacional='ADM')),
+        ser=Count('id', filter=Q(cargo__ncargo__cat_ocupacional='SER')),
+        cua=Count('id', filter=Q(cargo__ncargo__cat_ocupacional__in=['CDI', 'CEJ'])),
+        masa_salarial=Sum('salario_actual'),
+        antiguedad_media=Avg(dias_en_empresa),
+    )
+
+    total = r['total']
+    hombres, mujeres = r['hombres'], r['mujeres']
+    total_g = hombres + mujeres
+    bajas_mes = _por_unidad(CBaja.objects.all(), unidad).filter(
+        fecha_baja__year=hoy.year, fecha_baja__month=hoy.month
+    ).count()
+    antiguedad = r['antiguedad_media']
+    masa = float(r['masa_salarial'] or 0)
+
+    return {
+        'contratos_count': total,
+        'generos': {
+            'hombres': hombres, 'mujeres': mujeres,
+            'porc_hombres': _porcentaje(hombres, total_g),
+            'porc_mujeres': _porcentaje(mujeres, total_g),
+        },
+        'resumen_personal': {
+            'capacitaciones': r['adiestrados'],
+            'antiguedad': round((antiguedad.total_seconds() / 86400) / 365.25, 1) if antiguedad else 0,
+            'rotacion': _porcentaje(bajas_mes, total),
+            'salario_prom': round(masa / total, 2) if total else 0,
+        },
+        'cat_ocupacional': [r['ope'], r['tec'], r['adm'], r['ser'], r['cua']],
+    }
+
+
+# =====================================================================
+# 2. PIRÁMIDE DE EDADES (GROUP BY sexo + banda con Case/When)
+# =====================================================================
+def piramide_edades(activos, hoy):
+    # edad <= N  <=>  nacido después de (hoy - (N+1) años)
+    banda = Case(
+        *[When(aspirante__fecha_nacimiento__gt=_hace_annos(hoy, limite + 1), then=Value(i))
+          for i, limite in enumerate(BANDAS_EDAD)],
+        default=Value(len(BANDAS_EDAD)),
+        output_field=IntegerField(),
+    )
+    filas = (
+        activos.filter(aspirante__fecha_nacimiento__isnull=False)
+        .annotate(banda=banda)
+        .values('aspirante__sexo', 'banda')
+        .annotate(n=Count('id'))
+    )
+
+    edades_m = [0] * (len(BANDAS_EDAD) + 1)
+    edades_f = [0] * (len(BANDAS_EDAD) + 1)
+    for fila in filas:
+        if fila['aspirante__sexo'] == 'M':
+            edades_m[fila['banda']] += fila['n']
+        elif fila['aspirante__sexo'] == 'F':
+            edades_f[fila['banda']] += fila['n']
+    return {'edades_m': edades_m, 'edades_f': edades_f}
+
+
+# =====================================================================
+# 3. DISTRIBUCIONES PARA LOS GRÁFICOS (GROUP BY por dimensión)
+# =====================================================================
+def _conteo_por(activos, campo, etiqueta):
+    """Agrupa por `campo` y devuelve pares [etiqueta, cantidad] de mayor a menor.
+    `etiqueta(valor)` traduce el valor crudo (puede repetir etiquetas: se suman).
+    Se usan pares y no un dict para que el orden sobreviva al guardarse en JSONB."""
+    conteo = {}
+    for fila in activos.values(campo).annotate(n=Count('id')).order_by('-n'):
+        clave = etiqueta(fila[campo])
+        conteo[clave] = conteo.get(clave, 0) + fila['n']
+    return list(conteo.items())
+
+
+def nivel_educacional(activos):
+    labels = dict(Aspirante._meta.get_field('nivel_educ').choices)
+    return _conteo_por(activos, 'aspirante__nivel_educ', lambda v: labels.get(v, v) if v else 'Sin Acreditar')
+
+
+def nivel_preparacion(activos):
+    return _conteo_por(activos, 'cargo__nivel_preparacion__nombre', lambda v: v or 'No Definido')
+
+
+def tipos_contrato(activos):
+    return _conteo_por(activos, 'tipo__descripcion', lambda v: v or 'Sin Tipo')
+
+
+def distribucion_raza(activos):
+    labels = dict(Aspirante._meta.get_field('raza').choices)
+    return _conteo_por(activos, 'aspirante__raza', lambda v: labels.get(v, v) if v else 'No Definida')
+
+
+def masa_salarial(activos, limite=5):
+    """Top de departamentos por suma de salario_actual."""
+    filas = (
+        activos.values('cargo__departamento__descripcion')
+        .annotate(total=Sum('salario_actual'))
+        .order_by(F('total').desc(nulls_last=True))[:limite]
+    )
+    return [[f['cargo__departamento__descripcion'] or 'Sin Dpto', float(f['total'] or 0)] for f in filas]
+
+
+# =====================================================================
+# 4. LISTADOS CORTOS (solo se materializan las filas que se muestran)
+# =====================================================================
+def proximos_cumpleannos(hoy, unidad=None, dias=DIAS_AVISO, limite=5):
+    """Cumpleaños de trabajadores activos en los próximos `dias` (índice sobre cumple_ordinal)."""
+    trabajadores = Aspirante.objects.filter(estado='ACTIVO')
+    if unidad is not None:
+        trabajadores = trabajadores.filter(calta_contratos__cargo__departamento__unidad_organizativa=unidad).distinct()
+    trabajadores = trabajadores.only('nombre', 'papellido', 'sexo', 'fecha_nacimiento', 'cumple_ordinal')
+
+    return [{
+        'nombre': f"{a.nombre} {a.papellido}",
+        'fecha_str': f"{a.fecha_nacimiento.day} {MESES_CORTOS[a.fecha_nacimiento.month - 1]}",
+        'dias': a.dias_para_cumple,
+        'sexo': a.sexo,
+    } for a in trabajadores.proximos_cumpleannos(n=limite, hoy=hoy, dias=dias)]
+
+
+def avisos_contratos(activos, hoy, dias=DIAS_AVISO, limite=5):
+    """Contratos temporales vencidos o que vencen en los próximos `dias` (índice parcial de fecha_vencimiento)."""
+    proximos = (
+        activos.vencen_hasta(hoy + timedelta(days=dias))
+        .a_termino()
+        .order_by('fecha_vencimiento')
+        .values_list('aspirante__nombre', 'aspirante__papellido', 'tipo__descripcion', 'fecha_vencimiento')[:limite]
+    )
+    return [
+        {'nombre': f"{nombre} {papellido}", 'dias': (vence - hoy).days, 'tipo': tipo}
+        for nombre, papellido, tipo, vence in proximos
+    ]
+
+
+def radar_jubilaciones(activos, hoy):
+    """Mujeres desde 58 años y hombres desde 63 (edad de jubilación próxima o cumplida)."""
+    candidatos = activos.filter(
+        Q(aspirante__sexo='F', aspirante__fecha_nacimiento__lte=_hace_annos(hoy, 58)) |
+        Q(aspirante__sexo='M', aspirante__fecha_nacimiento__lte=_hace_annos(hoy, 63))
+    ).order_by('aspirante__fecha_nacimiento').values_list(
+        'aspirante__nombre', 'aspirante__papellido', 'aspirante__sexo',
+        'aspirante__fecha_nacimiento', 'cargo__ncargo__descripcion'
+    )
+
+    pre_jubilacion, recontratados = [], []
+    for nombre, papellido, sexo, nac, cargo in candidatos:
+        edad = _edad(nac, hoy)
+        item = {'nombre': f"{nombre} {papellido}", 'edad': edad, 'sexo': sexo, 'cargo': cargo or '-'}
+        tope = 60 if sexo == 'F' else 65
+        (pre_jubilacion if edad <= tope else recontratados).append(item)
+    return {'pre_jubilacion': pre_jubilacion, 'recontratados': recontratados}
+
+
+# =====================================================================
+# 5. EVOLUCIÓN DE ALTAS Y BAJAS (GROUP BY mes, dos consultas)
+# =====================================================================
+def evolucion_altas_bajas(hoy, unidad=None, meses=6):
+    periodos = []
+    for i in range(meses - 1, -1, -1):
+        mes, anno = hoy.month - i, hoy.year
+        if mes <= 0:
+            mes += 12
+            anno -= 1
+        periodos.append((anno, mes))
+    inicio = date(*periodos[0], 1)
+
+    def por_mes(qs, campo):
+        filas = qs.filter(**{f'{campo}__gte': inicio}).annotate(m=TruncMonth(campo)).values('m').annotate(n=Count('id'))
+        return {(f['m'].year, f['m'].month): f['n'] for f in filas}
+
+    altas = por_mes(_por_unidad(CAlta.objects.all(), unidad), 'fecha_alta')
+    bajas = por_mes(_por_unidad(CBaja.objects.all(), unidad), 'fecha_baja')
+
+    return {
+        'meses': [MESES_CORTOS[m - 1] for _, m in periodos],
+        'altas': [altas.get(p, 0) for p in periodos],
+        'bajas': [bajas.get(p, 0) for p in periodos],
+    }
+
+
+# =====================================================================
+# 6. OCUPACIÓN DE PLAZAS
+# =====================================================================
+def ocupacion_plazas(unidad=None):
+    cargos = _por_unidad(CargoPlantilla.objects.filter(activo=True), unidad, ruta='departamento__unidad_organizativa')
+    r = cargos.aggregate(
+        cubiertas=Sum('cant_cubierta'), aprobadas=Sum('cant_aprobada')
+    )
+    t_cubiertas = r['cubiertas'] or 0
+    t_aprobadas = r['aprobadas'] or 0
+    t_vacantes = max(t_aprobadas - t_cubiertas, 0)
+    totales = t_cubiertas + t_vacantes
+
+    return {
+        'totales': totales, 'cubiertas': t_cubiertas, 'vacantes': t_vacantes,
+        'porc_cubiertas': _porcentaje(t_cubiertas, totales, 2),
+        'porc_vacantes': _porcentaje(t_vacantes, totales, 2),
+    }
+
+
+# =====================================================================
+# 7. SECCIONES (unidad mínima que se calcula, cachea y guarda en la foto diaria)
+# =====================================================================
+SECCIONES = {
+    'plantilla': lambda hoy, unidad: resumen_plantilla(contratos_activos(unidad), hoy, unidad),
+    'dptos_count': lambda hoy, unidad: _por_unidad(Departamento.objects.all(), unidad, ruta='unidad_organizativa').count(),
+    'plazas': lambda hoy, unidad: ocupacion_plazas(unidad),
+    'cumpleannos': lambda hoy, unidad: proximos_cumpleannos(hoy, unidad),
+    'avisos_contratos': lambda hoy, unidad: avisos_contratos(contratos_activos(unidad), hoy),
+    'jubilaciones': lambda hoy, unidad: radar_jubilaciones(contratos_activos(unidad), hoy),
+    'edades': lambda hoy, unidad: piramide_edades(contratos_activos(unidad), hoy),
+    'nivel_educ': lambda hoy, unidad: nivel_educacional(contratos_activos(unidad)),
+    'nivel_prep': lambda hoy, unidad: nivel_preparacion(contratos_activos(unidad)),
+    'tipos_contrato': lambda hoy, unidad: tipos_contrato(contratos_activos(unidad)),
+    'raza': lambda hoy, unidad: distribucion_raza(contratos_activos(unidad)),
+    'masa_salarial': lambda hoy, unidad: masa_salarial(contratos_activos(unidad)),
+    'evolucion': lambda hoy, unidad: evolucion_altas_bajas(hoy, unidad),
+}
+
+
+def calcular_resumen(hoy, unidad=None, secciones=None):
+    """Indicadores del tablero para `unidad` (None = toda la entidad), por sección.
+    El resultado es serializable a JSON para guardarlo en ResumenDashboard."""
+    return {nombre: SECCIONES[nombre](hoy, unidad) for nombre in (secciones or SECCIONES)}
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from dashboard.models import ResumenDashboard
+from strorganizativa.models import UnidadOrganizativa
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero las fotos del Dashboard de hoy (entidad y cada Unidad Organizativa)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purgar', action='store_true',
+            help="Elimina además las fotos de días anteriores."
+        )
+
+    def handle(self, *args, **options):
+        hoy = date.today()
+
+        if options['purgar']:
+            borradas, _ = ResumenDashboard.objects.filter(fecha__lt=hoy).delete()
+            self.stdout.write(f"Fotos anteriores eliminadas: {borradas}")
+
+        ResumenDashboard.refrescar(hoy)
+        unidades = UnidadOrganizativa.objects.all()
+        for unidad in unidades:
+            ResumenDashboard.refrescar(hoy, unidad)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Dashboard reconstruido: entidad + {unidades.count()} unidades ({hoy:%d/%m/%Y})."
+        ))
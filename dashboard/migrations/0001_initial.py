@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('strorganizativa', '0011_alter_unidadorganizativa_orden_informe_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(db_index=True)),
+                ('datos', models.JSONField(default=dict)),
+                ('vigente', models.BooleanField(default=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('unidad', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_dashboard', to='strorganizativa.unidadorganizativa')),
+            ],
+            options={
+                'verbose_name': 'Resumen del Dashboard',
+                'verbose_name_plural': 'Resúmenes del Dashboard',
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'unidad'), name='unique_resumen_dashboard_por_dia', nulls_distinct=False)],
+            },
+        ),
+    ]
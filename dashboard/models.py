@@ -1,3 +1,107 @@
+from datetime import date
+from django.core.cache import cache
 from django.db import models
+from strorganizativa.models import UnidadOrganizativa
 
-# Create your models here.
+
+class ResumenDashboard(models.Model):
+    """
+    Foto diaria de los indicadores del Dashboard por Unidad Organizativa.
+    La fila con unidad=None corresponde a toda la entidad.
+
+    Las señales de dashboard/signals.py marcan como no vigentes solo las filas
+    de las unidades afectadas por un cambio; al leerse se recalculan esas y
+    ninguna otra.
+    """
+    # Segundos que un proceso puede tener reservado el recálculo de una foto
+    BLOQUEO_REFRESCO = 120
+    fecha = models.DateField(db_index=True)
+    unidad = models.ForeignKey(
+        UnidadOrganizativa,
+        on_delete=models.CASCADE,
+        null=True, blank=True,
+        related_name='resumenes_dashboard'
+    )
+    datos = models.JSONField(default=dict)
+    vigente = models.BooleanField(default=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = ("Resumen del Dashboard")
+        verbose_name_plural = ("Resúmenes del Dashboard")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'unidad'],
+                name='unique_resumen_dashboard_por_dia',
+                nulls_distinct=False,
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.unidad or 'Entidad'}"
+
+    @classmethod
+    def refrescar(cls, fecha, unidad=None):
+        """Recalcula y guarda la foto de `unidad` para `fecha`."""
+        from .indicadores import calcular_resumen
+        resumen, _ = cls.objects.update_or_create(
+            fecha=fecha, unidad=unidad,
+            defaults={'datos': calcular_resumen(fecha, unidad), 'vigente': True}
+        )
+        return resumen
+
+    @classmethod
+    def obtener(cls, fecha, unidad=None, secciones=None):
+        """
+        Devuelve los datos vigentes con las `secciones` pedidas (todas si es
+        None). Si no hay foto, está obsoleta o le faltan secciones, un solo
+        proceso la recalcula entera (reserva con cache.add); los widgets que
+        llegan mientras tanto calculan solo sus secciones, sin guardarlas.
+        """
+        from .indicadores import SECCIONES, calcular_resumen
+        resumen = cls.objects.filter(fecha=fecha, unidad=unidad, vigente=True).first()
+        if resumen is not None and all(s in resumen.datos for s in secciones or SECCIONES):
+            return resumen.datos
+
+        bloqueo = f"dashboard:refresco:{fecha.isoformat()}:{unidad.pk if unidad else 'entidad'}"
+        if not cache.add(bloqueo, True, cls.BLOQUEO_REFRESCO):
+            return calcular_resumen(fecha, unidad, secciones)
+        try:
+            return cls.refrescar(fecha, unidad).datos
+        finally:
+            cache.delete(bloqueo)
+
+    @classmethod
+    def invalidar(cls, unidades_ids):
+        """Marca como obsoletas las fotos de hoy de las unidades indicadas y la de la entidad."""
+        ids = {u for u in unidades_ids if u is not None}
+        cls.objects.filter(
+            models.Q(unidad__isnull=True) | models.Q(unidad_id__in=ids),
+            fecha=date.today(), vigente=True
+        ).update(vigente=False)
+
+
+class VersionDatos(models.Model):
+    """
+    Contador de versión de datos por ámbito ('dashboard', ...).
+    Forma parte de las claves de caché: al incrementarlo, todo lo cacheado
+    con la versión anterior deja de usarse, en cualquier proceso.
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    valor = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        verbose_name = ("Versión de Datos")
+        verbose_name_plural = ("Versiones de Datos")
+
+    def __str__(self):
+        return f"{self.nombre} v{self.valor}"
+
+    @classmethod
+    def actual(cls, nombre):
+        return cls.objects.get_or_create(nombre=nombre)[0].valor
+
+    @classmethod
+    def incrementar(cls, nombre):
+        if not cls.objects.filter(nombre=nombre).update(valor=models.F('valor') + 1):
+            cls.objects.get_or_create(nombre=nombre, defaults={'valor': 2})
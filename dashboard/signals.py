@@ -0,0 +1,80 @@
+"""
+Invalidación incremental de ResumenDashboard.
+
+Cada alta, baja, cambio de trabajador o de plantilla marca como obsoleta solo
+la foto de su Unidad Organizativa (y la de la entidad) una vez confirmada la
+transacción. El recálculo ocurre en la siguiente lectura del Dashboard, de
+modo que una importación masiva no recalcula nada hasta que alguien mira.
+También se incrementa la versión 'dashboard', que invalida la caché de los
+widgets (ver dashboard/widgets.py).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from bolsa.models import Aspirante
+from contratos.models import CAlta, CBaja
+from contratos.signals import contratos_actualizados, es_lote
+from strorganizativa.models import CargoPlantilla, Departamento
+
+from .models import ResumenDashboard, VersionDatos
+
+
+def _unidad_de_cargo(cargo_id):
+    if not cargo_id:
+        return None
+    return CargoPlantilla.objects.filter(pk=cargo_id).values_list(
+        'departamento__unidad_organizativa_id', flat=True
+    ).first()
+
+
+def _invalidar(*unidades_ids):
+    ids = set(unidades_ids)
+
+    def aplicar():
+        ResumenDashboard.invalidar(ids)
+        VersionDatos.incrementar('dashboard')
+
+    transaction.on_commit(aplicar)
+
+
+@receiver(pre_save, sender=CAlta)
+def recordar_cargo_anterior(sender, instance, **kwargs):
+    # Si el contrato cambia de cargo, la unidad anterior también debe recalcularse
+    instance._cargo_anterior_id = None
+    if instance.pk:
+        instance._cargo_anterior_id = CAlta.objects.filter(pk=instance.pk).values_list('cargo_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=CAlta)
+@receiver([post_save, post_delete], sender=CBaja)
+def contrato_cambiado(sender, instance, **kwargs):
+    if es_lote():
+        return
+    unidades = {_unidad_de_cargo(instance.cargo_id)}
+    cargo_anterior_id = getattr(instance, '_cargo_anterior_id', None)
+    if cargo_anterior_id and cargo_anterior_id != instance.cargo_id:
+        unidades.add(_unidad_de_cargo(cargo_anterior_id))
+    _invalidar(*unidades)
+
+
+@receiver(post_save, sender=Aspirante)
+def aspirante_cambiado(sender, instance, **kwargs):
+    unidades = CAlta.objects.filter(aspirante=instance).values_list(
+        'cargo__departamento__unidad_organizativa_id', flat=True
+    )
+    _invalidar(*unidades)
+
+
+@receiver([post_save, post_delete], sender=CargoPlantilla)
+def plantilla_cambiada(sender, instance, **kwargs):
+    _invalidar(Departamento.objects.filter(pk=instance.departamento_id).values_list(
+        'unidad_organizativa_id', flat=True
+    ).first())
+
+
+@receiver(contratos_actualizados)
+def contratos_actualizados_en_lote(sender, cargos_ids, **kwargs):
+    _invalidar(*CargoPlantilla.objects.filter(pk__in=cargos_ids).values_list(
+        'departamento__unidad_organizativa_id', flat=True
+    ))
@@ -2,9 +2,6 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    # DASHBOARD
-    path('', views.DashboardView.as_view(), name='dashboard'),
-    
-    # INFORMES
-    path('informes/economia/', views.InformeEconomiaView.as_view(), name='informe_economia'),
-]
\ No newline at end of file
+    # WIDGETS DEL DASHBOARD (HTMX)
+    path('widget/<str:nombre>/', views.dashboard_widget, name='dashboard_widget'),
+]
@@ -0,0 +1,52 @@
+"""
+Widgets del Dashboard servidos por separado (HTMX).
+
+Cada widget declara qué secciones de indicadores.SECCIONES necesita, su
+plantilla y cuánto tiempo se cachea. Los datos salen de la foto diaria
+(ResumenDashboard.obtener), que se recalcula una sola vez si las señales la
+marcaron como obsoleta: los widgets que se cargan a la vez mientras tanto
+calculan solo sus secciones. La clave de caché incluye el día, la unidad y la versión de datos
+'dashboard', que las señales incrementan en cada cambio, así que un alta o una
+baja se ven en la siguiente petición sin esperar al TTL.
+"""
+from django.core.cache import cache
+
+from .models import ResumenDashboard, VersionDatos
+
+
+WIDGETS = {
+    'tarjetas':        {'secciones': ('plantilla', 'plazas', 'dptos_count', 'evolucion'), 'ttl': 300},
+    'genero':          {'secciones': ('plantilla',), 'ttl': 300},
+    'evolucion':       {'secciones': ('evolucion',), 'ttl': 900},
+    'cumpleannos':     {'secciones': ('cumpleannos',), 'ttl': 3600},
+    'avisos':          {'secciones': ('avisos_contratos',), 'ttl': 600},
+    'kpis':            {'secciones': ('plantilla',), 'ttl': 300},
+    'plazas':          {'secciones': ('plazas',), 'ttl': 300},
+    'masa_salarial':   {'secciones': ('masa_salarial',), 'ttl': 900},
+    'cat_ocupacional': {'secciones': ('plantilla',), 'ttl': 900},
+    'tipos_contrato':  {'secciones': ('tipos_contrato',), 'ttl': 900},
+    'edades':          {'secciones': ('edades',), 'ttl': 3600},
+    'jubilaciones':    {'secciones': ('jubilaciones',), 'ttl': 3600},
+    'nivel_educ':      {'secciones': ('nivel_educ',), 'ttl': 3600},
+    'nivel_prep':      {'secciones': ('nivel_prep',), 'ttl': 3600},
+    'raza':            {'secciones': ('raza',), 'ttl': 3600},
+}
+
+
+def plantilla_widget(nombre):
+    return f"pages/dashboard/widgets/{nombre}.html"
+
+
+def datos_widget(nombre, hoy, unidad=None):
+    """Secciones del widget para `unidad` (None = entidad): primero la caché,
+    luego la foto diaria, que se recalcula si no existe o está obsoleta."""
+    widget = WIDGETS[nombre]
+    version = VersionDatos.actual('dashboard')
+    clave = f"dashboard:widget:{nombre}:{hoy.isoformat()}:{unidad.pk if unidad else 'entidad'}:v{version}"
+
+    datos = cache.get(clave)
+    if datos is None:
+        foto = ResumenDashboard.obtener(hoy, unidad, widget['secciones'])
+        datos = {s: foto[s] for s in widget['secciones']}
+        cache.set(clave, datos, widget['ttl'])
+    return datos
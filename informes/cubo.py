@@ -0,0 +1,239 @@
+"""
+Cubo de hechos compartido por los informes.
+
+En vez de que cada informe recorra los contratos en Python con su propia
+versión de los conteos, una única consulta GROUP BY agrupa los contratos por
+todas las dimensiones que usan los informes (unidad, departamento, cargo,
+categoría, sexo, tipo de contrato, motivo, misión, puesto clave...) y el
+resultado queda en un DataFrame de pandas. Cada informe filtra y suma ese
+cubo en memoria.
+
+    cubo = CuboInformes()
+    activos = cubo.contratos.filtrar(estado='ACTIVO').en_subarbol(ueb_id)
+    activos.por('categoria', 'sexo')        # {('TEC', 'F'): 3, ...}
+    cubo.plazas.total('aprobadas')
+
+Las familias de cargo son una relación muchos a muchos con NCargo: no son
+una columna del cubo (duplicarían filas) sino un puente ncargo -> familia
+que se aplica con `de_familias`.
+
+Al cerrar un mes (CierrePeriodo) los cubos se guardan con `foto()` y los
+informes de ese periodo los reconstruyen con `CuboInformes.congelado_desde(foto)`,
+sin consultar las tablas vivas.
+"""
+import json
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+
+from contratos.models import CAlta
+from nomencladores.models import NCargo
+from strorganizativa.jerarquia import descendientes_ids, en_subarbol
+from strorganizativa.models import CargoPlantilla, UnidadJerarquia
+
+# (columna del cubo, lookup del ORM, valor para NULL)
+DIMENSIONES_CONTRATOS = (
+    ('unidad_id', 'cargo__departamento__unidad_organizativa_id', 0),
+    ('departamento_id', 'cargo__departamento_id', 0),
+    ('ncargo_id', 'cargo__ncargo_id', 0),
+    ('categoria', 'cargo__ncargo__cat_ocupacional', ''),
+    ('puesto_clave', 'cargo__ncargo__puesto_clave', False),
+    ('sexo', 'aspirante__sexo', ''),
+    ('estado', 'aspirante__estado', ''),
+    ('tipo_id', 'tipo_id', 0),
+    ('tipo', 'tipo__descripcion', ''),
+    ('requiere_motivo', 'tipo__requiere_motivo', False),
+    ('motivo', 'motivo__descripcion', ''),
+    ('mision', 'mision', False),
+    ('cargo_activo', 'cargo__activo', False),
+)
+
+DIMENSIONES_PLAZAS = (
+    ('unidad_id', 'departamento__unidad_organizativa_id', 0),
+    ('departamento_id', 'departamento_id', 0),
+    ('ncargo_id', 'ncargo_id', 0),
+    ('categoria', 'ncargo__cat_ocupacional', ''),
+    ('puesto_clave', 'ncargo__puesto_clave', False),
+)
+
+# Códigos de NCargo.cat_ocupacional agrupados como en los informes
+CATEGORIAS = {'OPE': 'Obreros', 'TEC': 'Técnicos', 'ADM': 'Administrativos', 'SER': 'Servicios', 'CDI': 'Cuadros', 'CEJ': 'Cuadros'}
+
+
+def clase_tipo(descripcion):
+    """Clase del tipo de contrato según su nombre: INDETERMINADO, ADIESTRAMIENTO, DETERMINADO o ''."""
+    texto = (descripcion or '').upper()
+    for clase in ('INDETERMINADO', 'ADIESTRAMIENTO', 'DETERMINADO'):
+        if clase in texto:
+            return clase
+    return ''
+
+
+def _a_json(df):
+    # to_json convierte los tipos de numpy; el resultado es compacto (columnas + filas)
+    return json.loads(df.to_json(orient='split', index=False))
+
+
+def _de_json(datos):
+    return pd.DataFrame(datos['data'], columns=datos['columns'])
+
+
+def _agrupar(qs, dimensiones, **medidas):
+    columnas = [nombre for nombre, _, _ in dimensiones]
+    filas = qs.values(*[lookup for _, lookup, _ in dimensiones]).annotate(**medidas).order_by()
+    # Sin NULL en las dimensiones: los grupos vacíos se comparan y agrupan como cualquier otro valor
+    return pd.DataFrame.from_records(
+        [
+            [vacio if fila[lookup] is None else fila[lookup] for _, lookup, vacio in dimensiones]
+            + [fila[medida] or 0 for medida in medidas]
+            for fila in filas
+        ],
+        columns=columnas + list(medidas),
+    )
+
+
+class Cubo:
+    """Vista filtrable de un DataFrame de hechos con medidas aditivas."""
+
+    def __init__(self, df, origen):
+        self.df = df
+        self._origen = origen
+
+    def _derivar(self, mascara):
+        return Cubo(self.df[mascara], self._origen)
+
+    def filtrar(self, **criterios):
+        """filtrar(columna=valor, columna__in=valores, columna__ne=valor)."""
+        mascara = np.ones(len(self.df), dtype=bool)
+        for clave, valor in criterios.items():
+            columna, _, operador = clave.partition('__')
+            serie = self.df[columna]
+            if operador == 'in':
+                mascara &= serie.isin(list(valor)).to_numpy()
+            elif operador == 'ne':
+                mascara &= (serie != valor).to_numpy()
+            else:
+                mascara &= (serie == valor).to_numpy()
+        return self._derivar(mascara)
+
+    def en_subarbol(self, unidad):
+        """Solo la unidad y sus dependientes (sin filtro si `unidad` está vacío)."""
+        if not unidad or self._origen.restringido_a(unidad):
+            return self
+        return self.filtrar(unidad_id__in=self._origen.subarbol(unidad))
+
+    def de_familias(self, familias_ids=None, tipo_familia_id=None):
+        """Solo los cargos de las familias indicadas (o de las familias de un tipo)."""
+        puente = self._origen.familias
+        if familias_ids is not None:
+            puente = puente[puente['familia_id'].isin(list(familias_ids))]
+        if tipo_familia_id is not None:
+            puente = puente[puente['tipo_familia_id'] == tipo_familia_id]
+        return self.filtrar(ncargo_id__in=puente['ncargo_id'].unique())
+
+    def total(self, medida='n'):
+        return int(self.df[medida].sum())
+
+    def por(self, *dimensiones, medida='n'):
+        """{valor o tupla de valores: suma de la medida} agrupando por las dimensiones."""
+        if self.df.empty:
+            return {}
+        serie = self.df.groupby(list(dimensiones), sort=False)[medida].sum()
+        return {clave: int(valor) for clave, valor in serie.items()}
+
+    def __len__(self):
+        return len(self.df)
+
+
+class CuboInformes:
+    """
+    Cubos de contratos y de plantilla de un informe. Cada parte se consulta
+    una sola vez, la primera vez que se usa. Con `unidad` los cubos solo
+    traen esa unidad y sus dependientes (filtro dentro de la misma consulta).
+    """
+
+    def __init__(self, unidad=None):
+        self.unidad = unidad or None
+        self.congelado = False
+        self._subarboles = {}
+
+    @classmethod
+    def congelado_desde(cls, foto):
+        """Cubos reconstruidos desde `foto()` (cierre de periodo): no consultan las tablas vivas."""
+        cubo = cls()
+        cubo.congelado = True
+        cubo._subarboles = {clave: set(ids) for clave, ids in foto['jerarquia'].items()}
+        cubo.__dict__.update(
+            contratos=Cubo(_de_json(foto['contratos']), cubo),
+            plazas=Cubo(_de_json(foto['plazas']), cubo),
+            familias=_de_json(foto['familias']),
+            cargos=_de_json(foto['cargos']),
+        )
+        return cubo
+
+    def foto(self):
+        """Cubos completos y estructura de unidades en un dict serializable a JSON."""
+        jerarquia = {}
+        for ancestro_id, descendiente_id in UnidadJerarquia.objects.values_list('ancestro_id', 'descendiente_id'):
+            jerarquia.setdefault(str(ancestro_id), []).append(descendiente_id)
+        foto = {parte: _a_json(getattr(self, parte)) for parte in ('familias', 'cargos')}
+        foto.update(contratos=_a_json(self.contratos.df), plazas=_a_json(self.plazas.df), jerarquia=jerarquia)
+        return foto
+
+    def restringido_a(self, unidad):
+        """True si los cubos ya se consultaron limitados al subárbol de `unidad`."""
+        return bool(self.unidad) and str(getattr(unidad, 'pk', unidad)) == str(getattr(self.unidad, 'pk', self.unidad))
+
+    def _restringir(self, qs, campo):
+        return qs.filter(en_subarbol(self.unidad, campo)) if self.unidad else qs
+
+    def subarbol(self, unidad):
+        """Pks del subárbol de la unidad (una consulta por unidad y cubo; la foto si está congelado)."""
+        clave = str(getattr(unidad, 'pk', unidad))
+        if clave not in self._subarboles:
+            self._subarboles[clave] = set() if self.congelado else descendientes_ids(unidad)
+        return self._subarboles[clave]
+
+    @cached_property
+    def familias(self):
+        """Puente ncargo_id -> familia_id, tipo_familia_id, familia (M2M NCargo.familias)."""
+        return pd.DataFrame.from_records(
+            list(NCargo.familias.through.objects.values_list(
+                'ncargo_id', 'nfamiliacargo_id', 'nfamiliacargo__tipo_familia_id', 'nfamiliacargo__nombre'
+            )),
+            columns=['ncargo_id', 'familia_id', 'tipo_familia_id', 'familia'],
+        )
+
+    @cached_property
+    def cargos(self):
+        """Nomenclador de cargos: ncargo_id, descripcion, puesto_clave."""
+        return pd.DataFrame.from_records(
+            list(NCargo.objects.values_list('pk', 'descripcion', 'puesto_clave')),
+            columns=['ncargo_id', 'descripcion', 'puesto_clave'],
+        )
+
+    @cached_property
+    def contratos(self):
+        """Contratos en alta: medida `n`; columnas derivadas `clase` (del tipo de contrato) y `grupo_categoria`."""
+        df = _agrupar(
+            self._restringir(CAlta.objects.all(), 'cargo__departamento__unidad_organizativa'), DIMENSIONES_CONTRATOS,
+            n=Count('id'),
+        )
+        df['clase'] = df['tipo'].map(clase_tipo)
+        df['grupo_categoria'] = df['categoria'].map(lambda codigo: CATEGORIAS.get(codigo, ''))
+        return Cubo(df, self)
+
+    @cached_property
+    def plazas(self):
+        """Plantilla activa: medidas `aprobadas`, `cubiertas` (contadores guardados), `vacantes` y `cargos`."""
+        df = _agrupar(
+            self._restringir(CargoPlantilla.objects.filter(activo=True), 'departamento__unidad_organizativa'),
+            DIMENSIONES_PLAZAS,
+            aprobadas=Sum('cant_aprobada'), cubiertas=Sum('cant_cubierta'), cargos=Count('id'),
+            # Vacantes cargo a cargo (un cargo sobrecubierto no resta vacantes a otro)
+            vacantes=Sum(Greatest(F('cant_aprobada') - F('cant_cubierta'), Value(0))),
+        )
+        return Cubo(df, self)
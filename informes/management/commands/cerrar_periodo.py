@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from informes.models import CierrePeriodo
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra el mes en curso: congela los cubos de los informes (contratos y plantilla) para que los "
+        "informes de ese periodo no dependan de los datos vivos. Debe ejecutarse el último día de cada mes, "
+        "antes de medianoche: la foto es de los datos de hoy y no se puede cerrar un mes pasado."
+    )
+
+    def add_arguments(self, parser):
+        hoy = date.today()
+        parser.add_argument('--mes', type=int, default=hoy.month, help="Mes a cerrar: solo se admite el actual.")
+        parser.add_argument('--anno', type=int, default=hoy.year, help="Año del mes a cerrar: solo se admite el actual.")
+        parser.add_argument(
+            '--forzar', action='store_true',
+            help="Vuelve a cerrar el mes en curso aunque ya exista su cierre (reemplaza la foto)."
+        )
+
+    def handle(self, *args, **options):
+        mes, anno = options['mes'], options['anno']
+        if not 1 <= mes <= 12:
+            raise CommandError(f"Mes inválido: {mes}.")
+        hoy = date.today()
+        if (anno, mes) != (hoy.year, hoy.month):
+            raise CommandError(
+                f"Solo se puede cerrar el mes en curso ({hoy.month:02d}/{hoy.year}); "
+                f"la foto de {mes:02d}/{anno} ya no se puede tomar."
+            )
+
+        if CierrePeriodo.objects.filter(anno=anno, mes=mes).exists() and not options['forzar']:
+            self.stdout.write(self.style.WARNING(f"El periodo {mes:02d}/{anno} ya está cerrado (use --forzar para repetirlo)."))
+            return
+
+        try:
+            cierre = CierrePeriodo.cerrar(anno, mes)
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+        self.stdout.write(self.style.SUCCESS(
+            f"Periodo {cierre} cerrado: {len(cierre.datos['contratos']['data'])} grupos de contratos, "
+            f"{len(cierre.datos['plazas']['data'])} grupos de plantilla."
+        ))
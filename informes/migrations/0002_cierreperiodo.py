@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierrePeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anno', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('datos', models.JSONField(default=dict)),
+                ('cerrado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cierre de Periodo',
+                'verbose_name_plural': 'Cierres de Periodo',
+                'ordering': ['-anno', '-mes'],
+                'constraints': [models.UniqueConstraint(fields=('anno', 'mes'), name='unique_cierre_periodo')],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
 from strorganizativa.models import UnidadOrganizativa
@@ -12,3 +15,60 @@ class PlanMensualRegistro(models.Model):
     class Meta:
         unique_together = ('mes', 'anno', 'ueb_id', 'familia_id')
 
+
+
+class CierrePeriodo(models.Model):
+    """
+    Cierre mensual de los informes: foto de los cubos de hechos (contratos por
+    unidad, cargo, categoría y tipo de contrato; plantilla aprobada y cubierta;
+    familias y estructura) tal como estaban al cerrar el mes. Los informes que
+    piden un mes ya cerrado leen esta fila en lugar de las tablas vivas.
+    """
+    anno = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    datos = models.JSONField(default=dict)
+    cerrado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = ("Cierre de Periodo")
+        verbose_name_plural = ("Cierres de Periodo")
+        ordering = ['-anno', '-mes']
+        constraints = [
+            models.UniqueConstraint(fields=['anno', 'mes'], name='unique_cierre_periodo')
+        ]
+
+    def __str__(self):
+        return f"{self.mes:02d}/{self.anno}"
+
+    @classmethod
+    def cerrar(cls, anno, mes):
+        """
+        Congela (o vuelve a congelar) los cubos actuales como cierre de anno/mes.
+        La foto es de los datos de hoy, así que solo se puede cerrar el mes en
+        curso: un mes pasado recibiría cifras que no son las suyas.
+        """
+        from .cubo import CuboInformes
+        hoy = date.today()
+        if (int(anno), int(mes)) != (hoy.year, hoy.month):
+            raise ValidationError(
+                f"Solo se puede cerrar el mes en curso ({hoy.month:02d}/{hoy.year}), no {int(mes):02d}/{anno}."
+            )
+        cierre, _ = cls.objects.update_or_create(anno=anno, mes=mes, defaults={'datos': CuboInformes().foto()})
+        return cierre
+
+    @classmethod
+    def cubo(cls, anno, mes):
+        """
+        Cubos congelados del periodo si es un mes anterior al actual y está
+        cerrado; None en caso contrario (el informe usa los datos vivos).
+        """
+        from .cubo import CuboInformes
+        try:
+            anno, mes = int(anno), int(mes)
+        except (TypeError, ValueError):
+            return None
+        hoy = date.today()
+        if (anno, mes) >= (hoy.year, hoy.month):
+            return None
+        datos = cls.objects.filter(anno=anno, mes=mes).values_list('datos', flat=True).first()
+        return CuboInformes.congelado_desde(datos) if datos else None
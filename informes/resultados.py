@@ -0,0 +1,38 @@
+"""
+Caché de resultados de los informes.
+
+Cada informe guarda su cálculo bajo la clave (informe, filtros, versión de
+datos). La versión 'informes' es un contador global que las señales de
+informes/signals.py incrementan al cambiar contratos, bajas, plantilla o
+unidades, así que nunca se sirve un resultado viejo: simplemente deja de
+pedirse. La vista HTML y sus exportaciones a Word y PDF comparten la misma
+entrada, de modo que exportar justo después de consultar no recalcula nada.
+
+    datos, totales = resultado_informe('consolidado', {'ueb': ueb_id},
+                                       lambda: self.calcular_consolidado(ueb_id))
+"""
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+from dashboard.models import VersionDatos
+
+VERSION = 'informes'
+
+# Tope de vida por si cambia algo que no emite señales (nomencladores, updates masivos)
+TTL = 3600
+
+
+def clave_informe(nombre, filtros, version):
+    filtros = urlencode(sorted((k, str(v)) for k, v in filtros.items()))
+    return f"informes:{nombre}:{filtros}:v{version}"
+
+
+def resultado_informe(nombre, filtros, calcular):
+    """Resultado cacheado de `calcular()` para el informe y los filtros dados."""
+    clave = clave_informe(nombre, filtros, VersionDatos.actual(VERSION))
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular()
+        cache.set(clave, datos, TTL)
+    return datos
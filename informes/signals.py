@@ -0,0 +1,42 @@
+"""
+Invalidación de la caché de informes (ver informes/resultados.py).
+
+Cualquier alta, baja, cambio de trabajador, de plantilla o de la estructura
+incrementa la versión 'informes' una vez confirmada la transacción.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bolsa.models import Aspirante
+from contratos.models import CAlta, CBaja
+from contratos.signals import contratos_actualizados, es_lote
+from dashboard.models import VersionDatos
+from strorganizativa.models import CargoPlantilla, UnidadOrganizativa
+
+from .resultados import VERSION
+
+
+def _nueva_version():
+    transaction.on_commit(lambda: VersionDatos.incrementar(VERSION))
+
+
+@receiver([post_save, post_delete], sender=CAlta)
+@receiver([post_save, post_delete], sender=CBaja)
+@receiver([post_save, post_delete], sender=CargoPlantilla)
+@receiver([post_save, post_delete], sender=UnidadOrganizativa)
+def datos_cambiados(sender, **kwargs):
+    if sender in (CAlta, CBaja) and es_lote():
+        return
+    _nueva_version()
+
+
+@receiver(post_save, sender=Aspirante)
+def aspirante_cambiado(sender, instance, **kwargs):
+    # Sexo y estado del trabajador entran en los conteos
+    _nueva_version()
+
+
+@receiver(contratos_actualizados)
+def contratos_actualizados_en_lote(sender, **kwargs):
+    _nueva_version()
@@ -1,3 +1,111 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from bolsa.models import Aspirante
+from contratos.models import CAlta
+from nomencladores.models import (
+    NCargo, NFamiliaCargo, NGrupoEscala, NMunicipio, NProvincia, NTipoContrato, NTipoFamilia,
+    NTipoUnidadOrganizativa,
+)
+from strorganizativa.models import CargoPlantilla, Departamento, UnidadOrganizativa
+
+from .models import CierrePeriodo
+from .views import InformePuestosClaveView
+
+
+class InformePuestosClaveTests(TestCase):
+    """Puestos clave: tres consultas agregadas sin importar cuántos cargos haya, y caché hasta que cambian los datos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        provincia = NProvincia.objects.create(nombre='Provincia')
+        municipio = NMunicipio.objects.create(nombre='Municipio', provincia=provincia)
+        tipo_uo = NTipoUnidadOrganizativa.objects.create(descripcion='Principal', es_principal=True)
+        tipo_ueb = NTipoUnidadOrganizativa.objects.create(descripcion='UEB', es_subunidad=True)
+        cls.entidad = UnidadOrganizativa.objects.create(codigo_interno=1, descripcion='Entidad', tipo=tipo_uo, grupo_nomina=1)
+        cls.ueb = UnidadOrganizativa.objects.create(codigo_interno=2, descripcion='UEB', tipo=tipo_ueb, padre=cls.entidad)
+        dpto_entidad = Departamento.objects.create(descripcion='Dirección', unidad_organizativa=cls.entidad)
+        dpto_ueb = Departamento.objects.create(descripcion='Operaciones', unidad_organizativa=cls.ueb)
+
+        grupo = NGrupoEscala.objects.create(nivel='XX', es_cuadro=True)
+        indeterminado = NTipoContrato.objects.create(descripcion='Indeterminado', ocupa_plaza=True)
+        determinado = NTipoContrato.objects.create(descripcion='Determinado', ocupa_plaza=False)
+        cls.tipo_familia = NTipoFamilia.objects.create(nombre='Dirección')
+        familia = NFamiliaCargo.objects.create(nombre='Directivos', tipo_familia=cls.tipo_familia)
+
+        cls.cargos = []
+        for i in range(6):
+            ncargo = NCargo.objects.create(
+                descripcion=f'Director {i}', cat_ocupacional='CDI', grupo_escala=grupo,
+                salario_basico=Decimal('8000'), puesto_clave=True
+            )
+            ncargo.familias.add(familia)
+            for departamento in (dpto_entidad, dpto_ueb):
+                cargo = CargoPlantilla.objects.create(ncargo=ncargo, departamento=departamento, cant_aprobada=2)
+                cls.cargos.append(cargo)
+
+        for i, cargo in enumerate(cls.cargos):
+            aspirante = Aspirante.objects.create(
+                doc_identidad=f'8001010{i:04d}', nombre=f'N{i}', papellido='A', sapellido='B',
+                municipio=municipio, provincia=provincia, sexo='MF'[i % 2], raza='BL',
+                fecha_nacimiento=date(1980, 1, 1)
+            )
+            CAlta.objects.create(
+                aspirante=aspirante, no_expediente=str(500 + i), fecha_alta=date(2024, 1, 1), duracion=30,
+                cargo=cargo, tipo=determinado if cargo.ncargo_id % 2 else indeterminado
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def contexto(self, **params):
+        request = RequestFactory().get('/', params)
+        vista = InformePuestosClaveView()
+        vista.setup(request)
+        return vista.get_context_data()
+
+    def test_presupuesto_de_consultas(self):
+        vista = InformePuestosClaveView()
+        for ueb_id, tipo_id in (('', 'puestos_clave'), (self.ueb.pk, 'puestos_clave'), ('', self.tipo_familia.pk)):
+            with self.subTest(ueb=ueb_id, tipo=tipo_id), self.assertNumQueries(3):
+                vista.calcular_puestos_clave(ueb_id, tipo_id)
+
+    def test_cache_por_version_de_datos(self):
+        self.contexto()
+        # Segunda petición (o su exportación): solo se lee la versión de datos
+        with self.assertNumQueries(1):
+            stats = self.contexto()['stats']
+        self.assertEqual(stats['cubierta'], 6)
+
+        # Un alta confirmada incrementa la versión y el informe se recalcula
+        contrato = CAlta.objects.filter(tipo__ocupa_plaza=False).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            contrato.tipo = NTipoContrato.objects.get(descripcion='Indeterminado')
+            contrato.save()
+        self.assertEqual(self.contexto()['stats']['cubierta'], 7)
+
+    def test_totales(self):
+        stats = self.contexto()['stats']
+        self.assertEqual((stats['aprobada'], stats['cubierta'], stats['vacante']), (24, 6, 18))
+        self.assertEqual((stats['det'], stats['muj']), (6, 6))
+
+        familias = self.contexto(ueb=self.ueb.pk)['datos_familias']
+        self.assertEqual([p['aprob'] for p in familias[0]['puestos']], [2] * 6)
+        self.assertEqual(familias[0]['subtotales']['cub'], 3)
+
+    def test_mes_cerrado_usa_la_foto(self):
+        # El cierre solo se toma en el mes en curso; se archiva como un diciembre pasado
+        hoy = date.today()
+        anno = hoy.year - 1
+        CierrePeriodo.cerrar(hoy.year, hoy.month)
+        CierrePeriodo.objects.update(anno=anno, mes=12)
+        for contrato in CAlta.objects.filter(cargo__departamento=self.cargos[1].departamento):
+            contrato.delete()
+
+        cerrado = self.contexto(mes='12', anno=str(anno), tipo_familia=self.tipo_familia.pk)['stats']
+        self.assertEqual((cerrado['aprobada'], cerrado['cubierta'], cerrado['det']), (24, 6, 6))
+        vivo = self.contexto(tipo_familia=self.tipo_familia.pk)['stats']
+        self.assertEqual((vivo['cubierta'], vivo['det']), (3, 3))
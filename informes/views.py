@@ -1,29 +1,31 @@
 # 1. Librerías Estándar de Python
 import os
 import calendar
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 # 2. Librerías y Módulos de Django
 from django.conf import settings
 from django.contrib import messages
-from django.db.models import Sum  # <-- AQUÍ ESTÁ EL QUE NECESITAMOS
+from django.db.models import Count, F, Q
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.template.loader import get_template
 from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView
 from django.views.generic import TemplateView
 # 3. Librerías de Terceros
-from docxtpl import DocxTemplate
-from xhtml2pdf import pisa
 
 # 4. Modelos de tus Propias Aplicaciones
 from configuracion.models import Configuracion
+from reportes.pdf import respuesta_pdf
+from reportes.word import render_docx, respuesta_docx
 from contratos.models import CAlta
-from nomencladores.models import NTipoFamilia, NFamiliaCargo, NCargo
-from strorganizativa.models import CargoPlantilla, Departamento, UnidadOrganizativa
-from .models import PlanMensualRegistro
+from nomencladores.models import NTipoFamilia, NCargo
+from strorganizativa.jerarquia import en_subarbol, subarboles
+from strorganizativa.models import Departamento, UnidadOrganizativa
+from .cubo import CuboInformes
+from .models import CierrePeriodo, PlanMensualRegistro
+from .resultados import resultado_informe
 
 # Create your views here.
 class InformeEconomiaView(TemplateView):
@@ -49,8 +51,8 @@ class InformeEconomiaView(TemplateView):
         # LIMPIEZA: Trae Unidades Principales, Normales y Subunidades Independientes
         context['unidades'] = UnidadOrganizativa.objects.select_related('tipo').filter(padre__isnull=True).order_by('orden_informe')
         
-        # 3. Calculamos en tiempo real
-        context['datos_tabla'], context['totales'] = self.calcular_consolidado(ueb_id)
+        # 3. Calculamos (o reutilizamos el cálculo cacheado para estos filtros)
+        context['datos_tabla'], context['totales'] = self.consolidado(ueb_id)
         
         return context
 
@@ -59,6 +61,10 @@ class InformeEconomiaView(TemplateView):
         mapa = {'OPE': 'Obreros', 'TEC': 'Técnico', 'CDI': 'Cuadro', 'CEJ': 'Cuadro', 'SER': 'Servicio', 'ADM': 'Administrativo'}
         return mapa.get(codigo, 'Obreros')
 
+    def consolidado(self, ueb_id):
+        # Misma entrada de caché para la vista, el Word y el PDF
+        return resultado_informe('consolidado', {'ueb': ueb_id}, lambda: self.calcular_consolidado(ueb_id))
+
     # -- CÁLCULO EN TIEMPO REAL --
     def calcular_consolidado(self, ueb_id):
         datos = {
@@ -69,56 +75,30 @@ class InformeEconomiaView(TemplateView):
             'Administrativo': {'aprob':0, 'cub':0, 'vac':0, 'p_muj':0, 'd_tot':0, 'd_muj':0, 'a_tot':0, 'a_muj':0},
         }
 
-        # Jerarquía Dinámica
-        unidades_ids = []
-        if ueb_id:
-            unidad_seleccionada = UnidadOrganizativa.objects.select_related('tipo').filter(pk=ueb_id).first()
-            if unidad_seleccionada:
-                unidades_ids = [unidad_seleccionada.pk]
-                # Si la unidad seleccionada es de tipo Principal, sumamos todas sus hijas
-                if unidad_seleccionada.tipo and unidad_seleccionada.tipo.es_principal:
-                    hijas_ids = UnidadOrganizativa.objects.filter(padre=unidad_seleccionada).values_list('pk', flat=True)
-                    unidades_ids.extend(hijas_ids)
+        # Todo sale del cubo de hechos: la unidad seleccionada y todas sus dependientes
+        cubo = CuboInformes()
 
         # Contar Cargos Aprobados, Cubiertos y Vacantes (Directo de la plantilla actual)
-        cargos = CargoPlantilla.objects.filter(activo=True)
-        if unidades_ids:
-            cargos = cargos.filter(departamento__unidad_organizativa_id__in=unidades_ids)
-            
-        for cargo in cargos:
-            cat = self.mapear_categoria(cargo.ncargo.cat_ocupacional)
-            aprobadas = cargo.cant_aprobada or 0
-            cubiertas = cargo.cant_cubierta_real
-            vacantes = max(aprobadas - cubiertas, 0)
-            
-            datos[cat]['aprob'] += aprobadas
-            datos[cat]['cub'] += cubiertas
-            datos[cat]['vac'] += vacantes
-
-        # Contar Contratos activos para sacar las mujeres, determinados y adiestrados
-        # AÑADIDO: 'tipo' en select_related para que la base de datos sea super rápida
-        contratos = CAlta.objects.select_related('aspirante', 'cargo__ncargo', 'tipo').all()
-        if unidades_ids:
-            contratos = contratos.filter(cargo__departamento__unidad_organizativa_id__in=unidades_ids)
-            
-        for c in contratos:
-            # Protegemos el código asegurándonos de que tenga cargo y tipo asignado
-            if not c.cargo or not c.tipo: continue 
-            cat = self.mapear_categoria(c.cargo.ncargo.cat_ocupacional)
-            mujer = (c.aspirante.sexo == 'F')
-            
-            # Convertimos el nombre del nomenclador a mayúsculas para buscar las palabras clave
-            desc_tipo = c.tipo.descripcion.upper()
-            
-            # Buscamos de forma dinámica:
-            if 'INDETERMINADO' in desc_tipo:
-                if mujer: datos[cat]['p_muj'] += 1
-            elif 'ADIESTRAMIENTO' in desc_tipo:
-                datos[cat]['a_tot'] += 1
-                if mujer: datos[cat]['a_muj'] += 1
-            elif 'DETERMINADO' in desc_tipo:
-                datos[cat]['d_tot'] += 1
-                if mujer: datos[cat]['d_muj'] += 1
+        plazas = cubo.plazas.en_subarbol(ueb_id)
+        for medida, clave in (('aprobadas', 'aprob'), ('cubiertas', 'cub'), ('vacantes', 'vac')):
+            for codigo, cantidad in plazas.por('categoria', medida=medida).items():
+                datos[self.mapear_categoria(codigo)][clave] += cantidad
+
+        # Contar Contratos para sacar las mujeres, determinados y adiestrados
+        # (solo los que tienen cargo y tipo asignado)
+        contratos = cubo.contratos.en_subarbol(ueb_id).filtrar(ncargo_id__ne=0, tipo_id__ne=0)
+        for (codigo, clase, sexo), cantidad in contratos.por('categoria', 'clase', 'sexo').items():
+            cat = self.mapear_categoria(codigo)
+            mujer = (sexo == 'F')
+
+            if clase == 'INDETERMINADO':
+                if mujer: datos[cat]['p_muj'] += cantidad
+            elif clase == 'ADIESTRAMIENTO':
+                datos[cat]['a_tot'] += cantidad
+                if mujer: datos[cat]['a_muj'] += cantidad
+            elif clase == 'DETERMINADO':
+                datos[cat]['d_tot'] += cantidad
+                if mujer: datos[cat]['d_muj'] += cantidad
 
         # Sumar los Totales
         totales = {'aprob':0, 'cub':0, 'vac':0, 'p_muj':0, 'd_tot':0, 'd_muj':0, 'a_tot':0, 'a_muj':0, 't_tot':0, 't_muj':0}
@@ -141,10 +121,9 @@ class ExportarConsolidadoWordView(InformeEconomiaView):
         anno = str(hoy.year)
 
         # Calculamos los datos
-        datos, totales = self.calcular_consolidado(ueb_id)
+        datos, totales = self.consolidado(ueb_id)
 
         template_path = os.path.join(settings.BASE_DIR, 'plantillas_word', 'informes_economia', 'consolidado_template.docx')
-        doc = DocxTemplate(template_path)
         
         nombre_ueb = "Empresa Eléctrica Camagüey"
         if ueb_id:
@@ -159,13 +138,7 @@ class ExportarConsolidadoWordView(InformeEconomiaView):
             'anno': anno,
             'ueb': nombre_ueb
         }
-        doc.render(context)
-        
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        response['Content-Disposition'] = f'attachment; filename="Consolidado_{mes}_{anno}.docx"'
-        doc.save(response)
-        
-        return response
+        return respuesta_docx(render_docx(template_path, context), f"Consolidado_{mes}_{anno}.docx")
     
 
 class ExportarConsolidadoPDFView(InformeEconomiaView):
@@ -177,7 +150,7 @@ class ExportarConsolidadoPDFView(InformeEconomiaView):
         anno = str(hoy.year)
 
         # Usamos tu misma matemática exacta
-        datos, totales = self.calcular_consolidado(ueb_id)
+        datos, totales = self.consolidado(ueb_id)
 
         nombre_ueb = "Empresa Eléctrica Camagüey"
         if ueb_id:
@@ -193,21 +166,7 @@ class ExportarConsolidadoPDFView(InformeEconomiaView):
             'ueb': nombre_ueb
         }
 
-        # 1. Cargamos el HTML que creamos
-        template = get_template('pages/reportes/consolidado_pdf.html')
-        html = template.render(context)
-        
-        # 2. Preparamos el navegador para recibir un PDF
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Consolidado_{mes}_{anno}.pdf"'
-        
-        # 3. Convertimos el HTML a PDF usando xhtml2pdf
-        pisa_status = pisa.CreatePDF(html, dest=response)
-        
-        if pisa_status.err:
-            return HttpResponse('Hubo un error al generar el PDF', status=500)
-            
-        return response
+        return respuesta_pdf('pages/reportes/consolidado_pdf.html', context, f"Consolidado_{mes}_{anno}.pdf")
     
 
 class InformeTrabajadoresUEBView(TemplateView):
@@ -221,7 +180,7 @@ class InformeTrabajadoresUEBView(TemplateView):
         context['anno_actual'] = str(hoy.year)
 
         # Llamada correcta al método de la clase
-        datos_uebs, total_general, total_mujeres = self.calcular_resumen_uebs()
+        datos_uebs, total_general, total_mujeres = self.resumen_uebs()
         
         context['datos_uebs'] = datos_uebs
         context['total_general'] = total_general
@@ -230,24 +189,24 @@ class InformeTrabajadoresUEBView(TemplateView):
         return context
 
 
+    def resumen_uebs(self):
+        return resultado_informe('resumen_uebs', {}, self.calcular_resumen_uebs)
+
     # Reemplaza la función calcular_resumen_uebs completa por esta:
     def calcular_resumen_uebs(self):
         unidades = UnidadOrganizativa.objects.select_related('tipo').filter(padre__isnull=True).order_by('orden_informe')
         datos_uebs = []
         total_general = 0; total_mujeres = 0
         
-        contratos = CAlta.objects.select_related('aspirante', 'cargo__departamento__unidad_organizativa__tipo').all()
+        # Contratos con departamento, por unidad y sexo (cubo de hechos)
+        por_unidad = CuboInformes().contratos.filtrar(departamento_id__ne=0).por('unidad_id', 'sexo')
+        # Subárbol de todas las unidades raíz en una sola consulta
+        ramas = subarboles(unidades)
         
         for ueb in unidades:
-            unidades_ids = [ueb.pk]
-            if ueb.tipo and ueb.tipo.es_principal:
-                hijas_ids = UnidadOrganizativa.objects.filter(padre=ueb).values_list('pk', flat=True)
-                unidades_ids.extend(hijas_ids)
-                
-            contratos_ueb = [c for c in contratos if c.cargo and c.cargo.departamento and c.cargo.departamento.unidad_organizativa_id in unidades_ids]
-            
-            total_ueb = len(contratos_ueb)
-            mujeres_ueb = sum(1 for c in contratos_ueb if c.aspirante.sexo == 'F')
+            unidades_ids = ramas.get(ueb.pk, {ueb.pk})
+            total_ueb = sum(n for (unidad_id, _), n in por_unidad.items() if unidad_id in unidades_ids)
+            mujeres_ueb = sum(n for (unidad_id, sexo), n in por_unidad.items() if unidad_id in unidades_ids and sexo == 'F')
             
             datos_uebs.append({
                 'nombre': ueb.descripcion,
@@ -268,11 +227,10 @@ class ExportarResumenUEBWordView(InformeTrabajadoresUEBView):
         anno = str(hoy.year)
 
         # Calculamos los datos
-        datos_uebs, total_general, total_mujeres = self.calcular_resumen_uebs()
+        datos_uebs, total_general, total_mujeres = self.resumen_uebs()
 
         # Apuntamos a la nueva plantilla que guardaste
         template_path = os.path.join(settings.BASE_DIR, 'plantillas_word', 'informes_economia', 'resumen_ueb_template.docx')
-        doc = DocxTemplate(template_path)
         
         # Inyectamos exactamente las variables que le pusiste a las celdas del Word
         context = {
@@ -282,13 +240,7 @@ class ExportarResumenUEBWordView(InformeTrabajadoresUEBView):
             'mes': mes,
             'anno': anno
         }
-        doc.render(context)
-        
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        response['Content-Disposition'] = f'attachment; filename="Resumen_Trabajadores_UEB_{mes}_{anno}.docx"'
-        doc.save(response)
-        
-        return response
+        return respuesta_docx(render_docx(template_path, context), f"Resumen_Trabajadores_UEB_{mes}_{anno}.docx")
     
 
 # --- NUEVO INFORME: PUESTOS CLAVES ---
@@ -296,79 +248,98 @@ class ExportarResumenUEBWordView(InformeTrabajadoresUEBView):
 class InformePuestosClaveView(TemplateView):
     template_name = 'pages/informes/informe_puestos_clave.html'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # 1. Filtros
-        ueb_id = self.request.GET.get('ueb', '')
-        tipo_id = self.request.GET.get('tipo_familia', '')
-        mes = self.request.GET.get('mes', str(date.today().month))
-        anno = self.request.GET.get('anno', str(date.today().year))
-        
-        # 2. Tipos de Familia
-        tipos_familia = NTipoFamilia.objects.all().order_by('nombre')
-        if not tipo_id:
-            tipo_id = 'puestos_clave'
-            
-        # 3. Estructuras
+    @staticmethod
+    def conteos_por_cargo(conteos):
+        """{ncargo_id: (determinados, mujeres, adiestrados)} a partir de cubo.por('ncargo_id', 'clase', 'sexo')."""
+        resultado = {}
+        for (ncargo_id, clase, sexo), cantidad in conteos.items():
+            det, muj, adiest = resultado.get(ncargo_id, (0, 0, 0))
+            if sexo == 'F':
+                muj += cantidad
+            if clase == 'DETERMINADO':
+                det += cantidad
+            elif clase == 'ADIESTRAMIENTO':
+                adiest += cantidad
+            resultado[ncargo_id] = (det, muj, adiest)
+        return resultado
+
+    @staticmethod
+    def grupos_de_cargos(tipo_id, cubo=None):
+        """
+        [(nombre del grupo, [(ncargo_id, descripción), ...])] en una consulta:
+        la familia virtual de todos los puestos clave o, para un tipo de
+        familia, cada familia con sus cargos que son puesto clave. Con un
+        cubo congelado (mes cerrado) salen de la foto, sin consultas.
+        """
+        if tipo_id == 'puestos_clave':
+            if cubo is not None and cubo.congelado:
+                clave = cubo.cargos[cubo.cargos['puesto_clave']].sort_values('descripcion', kind='stable')
+                cargos = clave[['ncargo_id', 'descripcion']].itertuples(index=False, name=None)
+            else:
+                cargos = NCargo.objects.filter(puesto_clave=True).order_by('descripcion').values_list('pk', 'descripcion')
+            return [('⭐ Puestos Clave', list(cargos))]
+
+        try:
+            tipo_id_int = int(tipo_id)
+        except (ValueError, TypeError):
+            return []
+
+        # Puente M2M NCargo.familias: una fila por (familia, cargo)
+        if cubo is not None and cubo.congelado:
+            puente = cubo.familias[cubo.familias['tipo_familia_id'] == tipo_id_int].merge(
+                cubo.cargos[cubo.cargos['puesto_clave']], on='ncargo_id'
+            ).sort_values(['familia_id', 'ncargo_id'])
+            filas = puente[['familia_id', 'familia', 'ncargo_id', 'descripcion']].itertuples(index=False, name=None)
+        else:
+            filas = NCargo.familias.through.objects.filter(
+                nfamiliacargo__tipo_familia_id=tipo_id_int, ncargo__puesto_clave=True
+            ).order_by('nfamiliacargo_id', 'ncargo_id').values_list(
+                'nfamiliacargo_id', 'nfamiliacargo__nombre', 'ncargo_id', 'ncargo__descripcion'
+            )
+        grupos = {}
+        for familia_id, nombre, ncargo_id, descripcion in filas:
+            grupos.setdefault(familia_id, (nombre, []))[1].append((ncargo_id, descripcion))
+        return list(grupos.values())
+
+    def calcular_puestos_clave(self, ueb_id, tipo_id, cubo=None):
+        """
+        (datos_familias, stats) del informe: familias con sus puestos,
+        subtotales y totales. Sin `cubo` se usan los datos vivos de la unidad.
+        """
+        # Estructuras
         datos_familias = []
         stats = {'aprobada': 0, 'cubierta': 0, 'vacante': 0, 'det': 0, 'muj': 0, 'adiest': 0, 'porcentaje': 0}
 
-        unidades_ids = []
-        if ueb_id:
-            unidad_obj = UnidadOrganizativa.objects.select_related('tipo').filter(pk=ueb_id).first()
-            if unidad_obj:
-                unidades_ids = [unidad_obj.pk]
-                if unidad_obj.tipo and unidad_obj.tipo.es_principal:
-                    hijas_ids = UnidadOrganizativa.objects.filter(padre=unidad_obj).values_list('pk', flat=True)
-                    unidades_ids.extend(hijas_ids)
-
-        # 4. Lógica de Agrupación con Subtotales
-        # ================================================
-        # CASO 1: FILTRO "PUESTOS CLAVE"
-        # ================================================
-        if tipo_id == 'puestos_clave':
-            # Obtenemos todos los NCargos marcados como Puesto Clave
-            ncargos_qs = NCargo.objects.filter(puesto_clave=True).order_by('descripcion')
-            
-            # Creamos una "familia virtual" para agruparlos
-            virtual_family_name = '⭐ Puestos Clave'
+        # Tres consultas agregadas en total: los grupos de cargos, la plantilla
+        # por NCargo y los contratos por NCargo, clase y sexo (ya limitadas a la unidad)
+        grupos = self.grupos_de_cargos(tipo_id, cubo)
+        if grupos:
+            cubo = cubo or CuboInformes(unidad=ueb_id)
+            plazas = cubo.plazas.en_subarbol(ueb_id).filtrar(puesto_clave=True)
+            aprobadas = plazas.por('ncargo_id', medida='aprobadas')
+            cubiertas = plazas.por('ncargo_id', medida='cubiertas')
+            conteos = self.conteos_por_cargo(
+                cubo.contratos.en_subarbol(ueb_id).filtrar(estado='ACTIVO', cargo_activo=True).por('ncargo_id', 'clase', 'sexo')
+            )
+
+        # Agrupación con Subtotales
+        for nombre_grupo, cargos in grupos:
             f_stats = {'aprob': 0, 'cub': 0, 'vac': 0, 'det': 0, 'muj': 0, 'adiest': 0, 'porc': 0}
             puestos_list = []
-            
-            for ncargo in ncargos_qs:
-                # Filtramos las plazas de este cargo (sin necesidad de filtro por puesto_clave, ya lo sabemos)
-                cqs = CargoPlantilla.objects.filter(ncargo=ncargo, activo=True)
-                if unidades_ids:
-                    cqs = cqs.filter(departamento__unidad_organizativa_id__in=unidades_ids)
-                    
-                if not cqs.exists():
+
+            for ncargo_id, descripcion in cargos:
+                # Sin plazas activas en la unidad seleccionada: el cargo no sale en el informe
+                if ncargo_id not in aprobadas:
                     continue
-                    
-                aprob = sum(c.cant_aprobada for c in cqs)
-                cub = sum(c.cant_cubierta_real for c in cqs)
+
+                aprob = aprobadas[ncargo_id]
+                cub = cubiertas[ncargo_id]
                 vac = max(aprob - cub, 0)
-                
-                contratos = CAlta.objects.filter(cargo__in=cqs, aspirante__estado='ACTIVO').select_related('tipo', 'aspirante')
-                
-                c_det = 0
-                c_muj = 0
-                c_adiest = 0
-                
-                for c in contratos:
-                    desc_tipo = c.tipo.descripcion.upper() if c.tipo else ""
-                    if c.aspirante.sexo == 'F':
-                        c_muj += 1
-                    if "INDETERMINADO" in desc_tipo:
-                        continue
-                    elif "DETERMINADO" in desc_tipo:
-                        c_det += 1
-                    elif "ADIESTRAMIENTO" in desc_tipo:
-                        c_adiest += 1
-                        
+                c_det, c_muj, c_adiest = conteos.get(ncargo_id, (0, 0, 0))
+
                 puestos_list.append({
-                    'codigo': ncargo.pk,
-                    'nombre': ncargo.descripcion,
+                    'codigo': ncargo_id,
+                    'nombre': descripcion,
                     'aprob': aprob, 'cub': cub, 'vac': vac, 
                     'porc': int((cub / aprob * 100)) if aprob > 0 else 0,
                     'det': c_det, 'muj': c_muj, 'adiest': c_adiest
@@ -384,7 +355,7 @@ class InformePuestosClaveView(TemplateView):
             if puestos_list:
                 f_stats['porc'] = int((f_stats['cub'] / f_stats['aprob'] * 100)) if f_stats['aprob'] > 0 else 0
                 datos_familias.append({
-                    'nombre': virtual_family_name,
+                    'nombre': nombre_grupo,
                     'puestos': puestos_list,
                     'subtotales': f_stats
                 })
@@ -395,87 +366,33 @@ class InformePuestosClaveView(TemplateView):
                 stats['muj'] += f_stats['muj']
                 stats['adiest'] += f_stats['adiest']
 
-        # ================================================
-        # CASO 2: FILTRO POR TIPO DE FAMILIA (Código original)
-        # ================================================
-        else:
-            # Convertimos a entero para la consulta, manejando posible error
-            try:
-                tipo_id_int = int(tipo_id)
-            except (ValueError, TypeError):
-                tipo_id_int = None
-                
-            if tipo_id_int:
-                familias = NFamiliaCargo.objects.filter(tipo_familia_id=tipo_id_int).prefetch_related('cargos')
-                
-                for familia in familias:
-                    puestos_list = []
-                    f_stats = {'aprob': 0, 'cub': 0, 'vac': 0, 'det': 0, 'muj': 0, 'adiest': 0, 'porc': 0}
-                    
-                    for ncargo in familia.cargos.all():
-                        # Mantenemos el filtro de puesto_clave=True (solo plazas clave dentro de esta familia)
-                        cqs = CargoPlantilla.objects.filter(ncargo=ncargo, activo=True, ncargo__puesto_clave=True)
-                        if unidades_ids:
-                            cqs = cqs.filter(departamento__unidad_organizativa_id__in=unidades_ids)
-                            
-                        if not cqs.exists():
-                            continue
-                            
-                        aprob = sum(c.cant_aprobada for c in cqs)
-                        cub = sum(c.cant_cubierta_real for c in cqs)
-                        vac = max(aprob - cub, 0)
-                        
-                        contratos = CAlta.objects.filter(cargo__in=cqs, aspirante__estado='ACTIVO').select_related('tipo', 'aspirante')
-                        
-                        c_det = 0
-                        c_muj = 0
-                        c_adiest = 0
-                        
-                        for c in contratos:
-                            desc_tipo = c.tipo.descripcion.upper() if c.tipo else ""
-                            if c.aspirante.sexo == 'F':
-                                c_muj += 1
-                            if "INDETERMINADO" in desc_tipo:
-                                continue
-                            elif "DETERMINADO" in desc_tipo:
-                                c_det += 1
-                            elif "ADIESTRAMIENTO" in desc_tipo:
-                                c_adiest += 1
-                                
-                        puestos_list.append({
-                            'codigo': ncargo.pk,
-                            'nombre': ncargo.descripcion,
-                            'aprob': aprob, 'cub': cub, 'vac': vac, 
-                            'porc': int((cub / aprob * 100)) if aprob > 0 else 0,
-                            'det': c_det, 'muj': c_muj, 'adiest': c_adiest
-                        })
-                        
-                        f_stats['aprob'] += aprob
-                        f_stats['cub'] += cub
-                        f_stats['vac'] += vac
-                        f_stats['det'] += c_det
-                        f_stats['muj'] += c_muj
-                        f_stats['adiest'] += c_adiest
-
-                    if puestos_list:
-                        f_stats['porc'] = int((f_stats['cub'] / f_stats['aprob'] * 100)) if f_stats['aprob'] > 0 else 0
-                        
-                        datos_familias.append({
-                            'nombre': familia.nombre,
-                            'puestos': puestos_list,
-                            'subtotales': f_stats
-                        })
-                        
-                        stats['aprobada'] += f_stats['aprob']
-                        stats['cubierta'] += f_stats['cub']
-                        stats['vacante'] += f_stats['vac']
-                        stats['det'] += f_stats['det']
-                        stats['muj'] += f_stats['muj']
-                        stats['adiest'] += f_stats['adiest']
-
         if stats['aprobada'] > 0:
             stats['porcentaje'] = int((stats['cubierta'] / stats['aprobada']) * 100)
 
+        return datos_familias, stats
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        # 1. Filtros
+        ueb_id = self.request.GET.get('ueb', '')
+        tipo_id = self.request.GET.get('tipo_familia', '')
+        mes = self.request.GET.get('mes', str(date.today().month))
+        anno = self.request.GET.get('anno', str(date.today().year))
+        
+        # 2. Tipos de Familia
+        tipos_familia = NTipoFamilia.objects.all().order_by('nombre')
+        if not tipo_id:
+            tipo_id = 'puestos_clave'
+            
+        # 3. Datos agrupados (cacheados por unidad y tipo de familia; los comparten el Word y el PDF).
+        # Un mes anterior ya cerrado se calcula sobre la foto del cierre
+        cierre = CierrePeriodo.cubo(anno, mes)
+        datos_familias, stats = resultado_informe(
+            'puestos_clave', {'ueb': ueb_id, 'tipo_familia': tipo_id, 'cierre': f"{anno}-{mes}" if cierre else ''},
+            lambda: self.calcular_puestos_clave(ueb_id, tipo_id, cierre)
+        )
+
         dt = datetime.now()
         meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
         dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
@@ -504,15 +421,8 @@ class ExportarPuestosClaveWordView(InformePuestosClaveView):
         template_path = os.path.join(settings.BASE_DIR, 'plantillas_word', 'informes_economia', 'puestos_clave_template.docx')
         
         try:
-            doc = DocxTemplate(template_path)
-            doc.render(context)
-            
-            response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
             filename = f'Puestos_Clave_{context.get("mes_actual")}_{context.get("anno_actual")}.docx'
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            doc.save(response)
-            return response
+            return respuesta_docx(render_docx(template_path, context), filename)
         except Exception as e:
             return HttpResponse(f'Error al generar el Word: {str(e)}', status=500)
 
@@ -529,18 +439,8 @@ class ExportarPuestosClavePDFView(InformePuestosClaveView):
         context['nombre_empresa'] = config.nombre_empresa if config else "Empresa Eléctrica"
 
         # 3. Renderizar PDF
-        template = get_template('pages/reportes/puestos_clave_pdf.html')
-        html = template.render(context)
-        
-        response = HttpResponse(content_type='application/pdf')
         filename = f'Puestos_Clave_{context.get("mes_actual")}_{context.get("anno_actual")}.pdf'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        pisa_status = pisa.CreatePDF(html, dest=response)
-        if pisa_status.err:
-            return HttpResponse('Hubo un error al generar el PDF', status=500)
-            
-        return response
+        return respuesta_pdf('pages/reportes/puestos_clave_pdf.html', context, filename)
     
 
 #Nuevo Informe:
@@ -554,7 +454,13 @@ class InformeMisionesView(TemplateView):
         context['mes_actual'] = str(hoy.month)
         context['anno_actual'] = str(hoy.year)
 
-        # 1. Traer solo los contratos en misión
+        # 1. Datos del informe (cacheados hasta el próximo cambio de datos)
+        context.update(resultado_informe('misiones', {}, self.calcular_misiones))
+        return context
+
+    def calcular_misiones(self):
+        """Totales, desglose por categoría y trabajadores en misión agrupados por unidad."""
+        # Traer solo los contratos en misión
         # Asumiendo que el campo se llama 'mision' (Boolean) y 'pais' (Char)
         contratos = CAlta.objects.filter(mision=True).select_related(
             'aspirante', 
@@ -562,8 +468,9 @@ class InformeMisionesView(TemplateView):
             'cargo__departamento__unidad_organizativa'
         )
 
-        # 2. Variables de conteo
-        total_misiones = contratos.count()
+        # Variables de conteo (cubo de hechos)
+        misiones = CuboInformes().contratos.filtrar(mision=True)
+        total_misiones = misiones.total()
         importe_total = 0.00  # Queda en 0 hasta que la empresa lo defina
         
         desglose = {
@@ -573,8 +480,11 @@ class InformeMisionesView(TemplateView):
             'Técnicos': 0,
             'Cuadros': 0
         }
+        for grupo, cantidad in misiones.por('grupo_categoria').items():
+            if grupo in desglose:
+                desglose[grupo] += cantidad
 
-        # 3. Agrupación por UEB (ESTRUCTURA COMPATIBLE CON TU HTML)
+        # Agrupación por UEB (ESTRUCTURA COMPATIBLE CON TU HTML)
         datos_por_ueb = {} 
         orden_map = {}     
 
@@ -584,11 +494,6 @@ class InformeMisionesView(TemplateView):
             orden = ueb_obj.orden_informe if ueb_obj and ueb_obj.orden_informe else 999
             
             cat_sigla = c.cargo.ncargo.cat_ocupacional if c.cargo and c.cargo.ncargo else ""
-            if cat_sigla == 'OPE': desglose['Obreros'] += 1
-            elif cat_sigla == 'SER': desglose['Servicios'] += 1
-            elif cat_sigla == 'ADM': desglose['Administrativos'] += 1
-            elif cat_sigla == 'TEC': desglose['Técnicos'] += 1
-            elif cat_sigla in ['CDI', 'CEJ']: desglose['Cuadros'] += 1
 
             # Si es la primera vez que vemos esta unidad, inicializamos como LISTA
             if ueb_nombre not in datos_por_ueb:
@@ -609,11 +514,12 @@ class InformeMisionesView(TemplateView):
         sorted_keys = sorted(orden_map.keys(), key=lambda k: orden_map[k])
         uebs_ordenadas = {k: datos_por_ueb[k] for k in sorted_keys}
 
-        context['total_misiones'] = total_misiones
-        context['importe_total'] = importe_total
-        context['desglose'] = desglose
-        context['uebs'] = uebs_ordenadas # Ahora es {Nombre: [lista_trabajadores]}
-        return context
+        return {
+            'total_misiones': total_misiones,
+            'importe_total': importe_total,
+            'desglose': desglose,
+            'uebs': uebs_ordenadas,  # {Nombre: [lista_trabajadores]}
+        }
     
 class RegistroDiarioView(TemplateView):
     template_name = "pages/informes/registro_diario.html"
@@ -628,26 +534,14 @@ class RegistroDiarioView(TemplateView):
         ueb_filtro = self.request.GET.get('ueb', '')
         familia_filtro = self.request.GET.get('tipo_familia', '')
 
-        # 1. Traer contratos activos
-        contratos = CAlta.objects.select_related('aspirante', 'cargo__ncargo').all()
-
-        # --- LÓGICA DE UNIDADES Y SUBUNIDADES (Padres e Hijas) ---
-        unidades_ids = []
-        if ueb_filtro:
-            # Añadimos la unidad seleccionada (que puede ser padre o hija)
-            unidades_ids.append(ueb_filtro)
-            
-            # Buscamos si tiene hijas usando el campo 'padre_id' que me mostraste en tu modelo
-            hijas_ids = UnidadOrganizativa.objects.filter(padre_id=ueb_filtro).values_list('codigo_interno', flat=True)
-            if hijas_ids:
-                unidades_ids.extend(list(hijas_ids))
-
-        # --- APLICAR FILTROS A LOS CONTRATOS ---
-        if unidades_ids:
-            # Filtramos los contratos cuyo departamento pertenezca a la unidad padre O a sus hijas
-            contratos = contratos.filter(cargo__departamento__unidad_organizativa_id__in=unidades_ids)
-        if familia_filtro:
-            contratos = contratos.filter(cargo__ncargo__familia_id=familia_filtro)
+        # 1. Contratos y plantilla del cubo de hechos (la foto del cierre si el mes ya se cerró),
+        # con los filtros aplicados
+        cubo = CierrePeriodo.cubo(anno_actual, mes_actual) or CuboInformes()
+        contratos = cubo.contratos.en_subarbol(ueb_filtro)
+        plazas = cubo.plazas.en_subarbol(ueb_filtro)
+        if familia_filtro.isdigit():
+            contratos = contratos.de_familias([int(familia_filtro)])
+            plazas = plazas.de_familias([int(familia_filtro)])
 
         # 2. Diccionario de contadores
         # OPE=Obreros, TEC=Técnicos, ADM=Administrativos, SER=Servicios, CDI/CEJ=Cuadros
@@ -660,26 +554,18 @@ class RegistroDiarioView(TemplateView):
             'Misiones': {'tot': 0, 'muj': 0}
         }
 
-        for c in contratos:
-            cat = c.cargo.ncargo.cat_ocupacional if c.cargo and c.cargo.ncargo else ""
-            es_mujer = c.aspirante.sexo == 'F'
+        for (grupo, mision, sexo), cantidad in contratos.por('grupo_categoria', 'mision', 'sexo').items():
+            es_mujer = sexo == 'F'
 
             # Contar Misiones
-            if c.mision:
-                datos['Misiones']['tot'] += 1
-                if es_mujer: datos['Misiones']['muj'] += 1
+            if mision:
+                datos['Misiones']['tot'] += cantidad
+                if es_mujer: datos['Misiones']['muj'] += cantidad
 
             # Contar por Categoría
-            llave = None
-            if cat == 'OPE': llave = 'Obreros'
-            elif cat == 'TEC': llave = 'Técnicos'
-            elif cat == 'ADM': llave = 'Administrativos'
-            elif cat == 'SER': llave = 'Servicios'
-            elif cat in ['CDI', 'CEJ']: llave = 'Cuadros'
-
-            if llave:
-                datos[llave]['tot'] += 1
-                if es_mujer: datos[llave]['muj'] += 1
+            if grupo:
+                datos[grupo]['tot'] += cantidad
+                if es_mujer: datos[grupo]['muj'] += cantidad
 
        # --- 3. Buscar el Plan Editable (PlanMensualRegistro) ---
         
@@ -696,13 +582,7 @@ class RegistroDiarioView(TemplateView):
             valor_plan = plan_guardado.valor
         else:
             # Si no existe, calculamos el de CargoPlantilla por defecto
-            plazas_query = CargoPlantilla.objects.filter(activo=True)
-            if unidades_ids:
-                plazas_query = plazas_query.filter(departamento__unidad_organizativa_id__in=unidades_ids)
-            if familia_filtro:
-                plazas_query = plazas_query.filter(ncargo__familia_id=familia_filtro)
-                
-            valor_plan = plazas_query.aggregate(total=Sum('cant_aprobada'))['total'] or 0
+            valor_plan = plazas.total('aprobadas')
 
         # Enviar al contexto
         context['mes_actual'] = mes_actual
@@ -742,85 +622,115 @@ class InformeMotivosContratoView(TemplateView):
         # 1. CAPTURAR EL FILTRO DE LA URL
         ueb_id = self.request.GET.get('ueb', '')
         
+        # Datos del informe: el semáforo depende del día, así que la fecha entra en la clave
+        context.update(resultado_informe(
+            'motivos', {'ueb': ueb_id, 'hoy': hoy.isoformat()}, lambda: self.calcular_motivos(ueb_id, hoy)
+        ))
+
+        context.update({
+            'mes_actual': hoy.strftime("%B").capitalize(),
+            'anno_actual': hoy.year,
+            # 4. ENVIAR LAS UNIDADES Y EL FILTRO ACTUAL AL TEMPLATE
+            'unidades': UnidadOrganizativa.objects.select_related('tipo').filter(padre__isnull=True).order_by('orden_informe'),
+            'ueb_actual': ueb_id,
+        })
+        
+        return context
+
+    def calcular_motivos(self, ueb_id, hoy):
+        """Conteos, semáforo de vencimientos y detalle agrupado por tipo, motivo y unidad."""
         # Consulta base
         contratos_qs = CAlta.objects.filter(
             aspirante__estado='ACTIVO',
             tipo__requiere_motivo=True
         )
 
-        # Lógica de cascada: Si hay filtro, sumar las hijas si es Unidad Principal
+        # Lógica de cascada: la unidad seleccionada y todas sus dependientes
         if ueb_id:
-            unidad_seleccionada = UnidadOrganizativa.objects.select_related('tipo').filter(pk=ueb_id).first()
-            if unidad_seleccionada:
-                unidades_ids = [unidad_seleccionada.pk]
-                if unidad_seleccionada.tipo and unidad_seleccionada.tipo.es_principal:
-                    hijas_ids = UnidadOrganizativa.objects.filter(padre=unidad_seleccionada).values_list('pk', flat=True)
-                    unidades_ids.extend(hijas_ids)
-                contratos_qs = contratos_qs.filter(cargo__departamento__unidad_organizativa_id__in=unidades_ids)
+            contratos_qs = contratos_qs.filter(en_subarbol(ueb_id, 'cargo__departamento__unidad_organizativa'))
 
         # 2. ORDENAR POR ORDEN_INFORME EN VEZ DE DESCRIPCIÓN
-        contratos = contratos_qs.select_related(
-            'aspirante',
-            'cargo__ncargo__grupo_escala',
-            'cargo__departamento__unidad_organizativa__tipo',
-            'tipo',
-            'motivo'
-        ).order_by(
+        # Solo los valores que pinta la plantilla: el resultado se cachea y no
+        # debe arrastrar instancias de modelo
+        ueb = 'cargo__departamento__unidad_organizativa'
+        contratos = contratos_qs.order_by(
             'tipo__descripcion',
             'motivo__descripcion',
-            'cargo__departamento__unidad_organizativa__orden_informe', # <-- CAMBIADO AQUÍ
+            f'{ueb}__orden_informe', # <-- CAMBIADO AQUÍ
             'aspirante__nombre'
+        ).values(
+            'no_expediente', 'fecha_alta', 'duracion', 'fecha_vencimiento',
+            nombre=F('aspirante__nombre'),
+            papellido=F('aspirante__papellido'),
+            sexo=F('aspirante__sexo'),
+            cargo_nombre=F('cargo__ncargo__descripcion'),
+            cat_ocupacional=F('cargo__ncargo__cat_ocupacional'),
+            grupo_escala=F('cargo__ncargo__grupo_escala__nivel'),
+            tipo_desc=F('tipo__descripcion'),
+            motivo_desc=F('motivo__descripcion'),
+            ueb_desc=F(f'{ueb}__descripcion'),
+            ueb_color=F(f'{ueb}__tipo__color'),
+            es_p=F(f'{ueb}__tipo__es_principal'),
+            es_s=F(f'{ueb}__tipo__es_subunidad'),
         )
 
-        total_contratos = 0
-        total_mujeres = 0
-        total_hombres = 0
-        vencen_critico = 0
-        vencen_alerta = 0
-        vencen_vigente = 0
-        cat_t = cat_o = cat_s = cat_a = cat_c = 0 
-        conteo_motivos = {} 
-        
+        # Semáforo de vencimientos: conteo en la BD sobre la columna fecha_vencimiento
+        vencimientos = contratos_qs.filter(fecha_vencimiento__isnull=False).aggregate(
+            critico=Count('id', filter=Q(fecha_vencimiento__lte=hoy + timedelta(days=15))),
+            alerta=Count('id', filter=Q(fecha_vencimiento__gt=hoy + timedelta(days=15), fecha_vencimiento__lte=hoy + timedelta(days=30))),
+            vigente=Count('id', filter=Q(fecha_vencimiento__gt=hoy + timedelta(days=30))),
+        )
+        vencen_critico = vencimientos['critico']
+        vencen_alerta = vencimientos['alerta']
+        vencen_vigente = vencimientos['vigente']
+
+        # Conteos del cubo de hechos (mismos filtros que la consulta de detalle)
+        cubo = CuboInformes().contratos.filtrar(estado='ACTIVO', requiere_motivo=True).en_subarbol(ueb_id)
+        total_contratos = cubo.total()
+        por_sexo = cubo.por('sexo')
+        total_mujeres = por_sexo.get('F', 0)
+        total_hombres = por_sexo.get('M', 0)
+
+        por_categoria = cubo.por('categoria')
+        cat_t = por_categoria.get('TEC', 0)
+        cat_o = por_categoria.get('OPE', 0)
+        cat_s = por_categoria.get('SER', 0)
+        cat_a = por_categoria.get('ADM', 0)
+        cat_c = por_categoria.get('CDI', 0) + por_categoria.get('CEJ', 0)
+
+        conteo_motivos = {}
+        totales_grupo = {}
+        for (tipo, motivo), cantidad in cubo.por('tipo', 'motivo').items():
+            tipo_desc = tipo or "Sin Tipo Asignado"
+            motivo_desc = motivo or "Sin Motivo Asignado"
+            conteo_motivos[motivo_desc] = conteo_motivos.get(motivo_desc, 0) + cantidad
+            totales_grupo[tipo_desc] = totales_grupo.get(tipo_desc, 0) + cantidad
+            totales_grupo[(tipo_desc, motivo_desc)] = cantidad
+        
+        # Detalle: los contratos agrupados por tipo, motivo y unidad
         datos_agrupados = {}
 
         for c in contratos:
-            total_contratos += 1
-            
-            if c.aspirante.sexo == 'F': total_mujeres += 1
-            elif c.aspirante.sexo == 'M': total_hombres += 1
-                
-            cat = c.cargo.ncargo.cat_ocupacional if c.cargo and c.cargo.ncargo else None
-            if cat == 'TEC': cat_t += 1
-            elif cat == 'OPE': cat_o += 1
-            elif cat == 'SER': cat_s += 1
-            elif cat == 'ADM': cat_a += 1
-            elif cat in ['CDI', 'CEJ']: cat_c += 1
-            
-            if c.dias_restantes is not None:
-                if c.dias_restantes <= 15: vencen_critico += 1
-                elif c.dias_restantes <= 30: vencen_alerta += 1
-                else: vencen_vigente += 1
+            tipo_desc = c.pop('tipo_desc') or "Sin Tipo Asignado"
+            motivo_desc = c.pop('motivo_desc') or "Sin Motivo Asignado"
             
-            tipo_desc = c.tipo.descripcion if c.tipo else "Sin Tipo Asignado"
-            motivo_desc = c.motivo.descripcion if c.motivo else "Sin Motivo Asignado"
-            
-            ueb_obj = c.cargo.departamento.unidad_organizativa if c.cargo and c.cargo.departamento else None
-            ueb_desc = ueb_obj.descripcion if ueb_obj else "Sin Unidad Organizativa"
-            ueb_color = ueb_obj.tipo.color if ueb_obj and ueb_obj.tipo and ueb_obj.tipo.color else "#697a8d"
+            ueb_desc = c.pop('ueb_desc') or "Sin Unidad Organizativa"
+            ueb_color = c.pop('ueb_color') or "#697a8d"
             
             # 3. EXTRAER LAS BANDERAS PARA EL HTML
-            es_p = ueb_obj.tipo.es_principal if ueb_obj and ueb_obj.tipo else False
-            es_s = ueb_obj.tipo.es_subunidad if ueb_obj and ueb_obj.tipo else False
-            
-            conteo_motivos[motivo_desc] = conteo_motivos.get(motivo_desc, 0) + 1
+            es_p = bool(c.pop('es_p'))
+            es_s = bool(c.pop('es_s'))
+
+            vence = c['fecha_vencimiento']
+            c['dias_restantes'] = (vence - hoy).days if vence else None
             
             if tipo_desc not in datos_agrupados:
-                datos_agrupados[tipo_desc] = {'total': 0, 'motivos': {}}
-            datos_agrupados[tipo_desc]['total'] += 1
+                datos_agrupados[tipo_desc] = {'total': totales_grupo.get(tipo_desc, 0), 'motivos': {}}
 
             if motivo_desc not in datos_agrupados[tipo_desc]['motivos']:
-                datos_agrupados[tipo_desc]['motivos'][motivo_desc] = {'total': 0, 'uebs': {}}
-            datos_agrupados[tipo_desc]['motivos'][motivo_desc]['total'] += 1
+                datos_agrupados[tipo_desc]['motivos'][motivo_desc] = {
+                    'total': totales_grupo.get((tipo_desc, motivo_desc), 0), 'uebs': {}
+                }
 
             if ueb_desc not in datos_agrupados[tipo_desc]['motivos'][motivo_desc]['uebs']:
                 datos_agrupados[tipo_desc]['motivos'][motivo_desc]['uebs'][ueb_desc] = {
@@ -832,7 +742,7 @@ class InformeMotivosContratoView(TemplateView):
                 
             datos_agrupados[tipo_desc]['motivos'][motivo_desc]['uebs'][ueb_desc]['contratos'].append(c)
 
-        conteo_motivos_ordenado = dict(sorted(conteo_motivos.items(), key=lambda item: item[1], reverse=True))
+        conteo_motivos_ordenado = dict(sorted(conteo_motivos.items(), key=lambda item: (-item[1], item[0])))
 
         mayor_motivo_nombre = "Sin Datos"
         mayor_motivo_count = 0
@@ -869,7 +779,7 @@ class InformeMotivosContratoView(TemplateView):
         porc_mujeres = round((total_mujeres / total_contratos * 100) if total_contratos else 0, 1)
         porc_hombres = round((total_hombres / total_contratos * 100) if total_contratos else 0, 1)
 
-        context.update({
+        return {
             'datos_agrupados': datos_agrupados,
             'total_contratos': total_contratos,
             'total_mujeres': total_mujeres,
@@ -884,11 +794,4 @@ class InformeMotivosContratoView(TemplateView):
             'mayor_motivo_nombre': mayor_motivo_nombre,
             'mayor_motivo_count': mayor_motivo_count,
             'mayor_motivo_porc': mayor_motivo_porc,
-            'mes_actual': hoy.strftime("%B").capitalize(),
-            'anno_actual': hoy.year,
-            # 4. ENVIAR LAS UNIDADES Y EL FILTRO ACTUAL AL TEMPLATE
-            'unidades': UnidadOrganizativa.objects.select_related('tipo').filter(padre__isnull=True).order_by('orden_informe'),
-            'ueb_actual': ueb_id,
-        })
-        
-        return context
\ No newline at end of file
+        }
@@ -4,7 +4,8 @@ from .forms import ImportarCargosForm
 from import_export import resources, fields
 from import_export.widgets import ForeignKeyWidget
 from import_export.admin import ImportExportModelAdmin
-from .utils import importar_cargos_excel
+from contratos.salarios import recalcular_salarios
+from tareas.models import Tarea, almacen_tareas
 from .models import (
     NTridente, NRol, NGrupoEscala, NSalario, NCargo,
     NProvincia, NMunicipio, NHorario, NJornada, NEspecialidad, 
@@ -78,18 +79,15 @@ class NCargoAdmin(admin.ModelAdmin):
                 archivo = request.FILES['archivo_excel']
                 estrategia = form.cleaned_data['estrategia']
                 
-                res = importar_cargos_excel(archivo, estrategia)
-                
-                if 'fatal' in res:
-                    messages.error(request, f"Error crítico: {res['fatal']}")
-                else:
-                    msg = f"Importación: {res['creados']} creados, {res['actualizados']} actualizados. {res['saltados']} saltados."
-                    if res['errores']:
-                        msg += f" Errores detectados: {len(res['errores'])}."
-                        for err in res['errores'][:5]:
-                            messages.warning(request, err)
-                    messages.success(request, msg)
-                return redirect("..")
+                # La importación corre como tarea (nomencladores/tareas.py): el
+                # Excel se guarda en el storage privado y el trabajador lo lee de ahí
+                ruta = almacen_tareas().save(f"entradas/{archivo.name}", archivo)
+                tarea = Tarea.encolar(
+                    'nomencladores.importar_cargos', {'archivo': ruta, 'estrategia': estrategia},
+                    usuario=request.user
+                )
+                messages.info(request, "Importación de cargos en curso.")
+                return redirect('estado_tarea', pk=tarea.pk)
         else:
             form = ImportarCargosForm()
 
@@ -110,7 +108,25 @@ class NTipoUnidadAdmin(admin.ModelAdmin):
 admin.site.register(NTridente)
 admin.site.register(NRol)
 admin.site.register(NGrupoEscala)
-admin.site.register(NSalario)
+
+
+@admin.register(NSalario)
+class NSalarioAdmin(admin.ModelAdmin):
+    # Los cambios desde el admin también se propagan a CAlta.salario_actual
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recalcular_salarios([obj.grupo_escala_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recalcular_salarios([obj.grupo_escala_id])
+
+    def delete_queryset(self, request, queryset):
+        grupos_ids = set(queryset.values_list('grupo_escala_id', flat=True))
+        super().delete_queryset(request, queryset)
+        recalcular_salarios(grupos_ids)
+
+
 @admin.register(NTipoContrato)
 class NTipoContratoAdmin(admin.ModelAdmin):
     list_display = ('descripcion', 'ocupa_plaza', 'requiere_motivo', 'es_adiestrado')
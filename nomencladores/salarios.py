@@ -0,0 +1,131 @@
+"""
+Resolución de salarios de escala en memoria.
+
+La matriz completa de NSalario es pequeña (grupos x roles x tridentes), así
+que cada proceso la guarda como un dict {(grupo_escala_id, rol_id,
+tridente_id): monto} y resuelve los salarios sin consultar la base de datos.
+
+La tabla se recarga cuando cambia la versión 'salarios' de
+dashboard.VersionDatos, que se incrementa al guardar o borrar un NSalario
+(ver nomencladores/signals.py). Al estar en la base de datos, todos los
+procesos (workers web, ejecutar_tareas, comandos) ven el cambio. Dentro de una
+petición, o de un bloque con_version() (cada tarea de ejecutar_tareas), la
+versión se consulta una sola vez; fuera de ellos, en cada uso.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.core.signals import request_finished, request_started
+
+VERSION = 'salarios'
+
+_tabla = {'version': None, 'montos': {}}
+_peticion = threading.local()
+
+
+def _inicio_peticion(**kwargs):
+    _peticion.activa = True
+    _peticion.version = None
+
+
+def _fin_peticion(**kwargs):
+    _peticion.activa = False
+    _peticion.version = None
+
+
+request_started.connect(_inicio_peticion, dispatch_uid='salarios_inicio_peticion')
+request_finished.connect(_fin_peticion, dispatch_uid='salarios_fin_peticion')
+
+
+@contextmanager
+def con_version():
+    """Consulta la versión una sola vez durante el bloque, como en una petición (tareas, comandos)."""
+    if getattr(_peticion, 'activa', False):
+        yield
+        return
+    _inicio_peticion()
+    try:
+        yield
+    finally:
+        _fin_peticion()
+
+
+def version_salarios():
+    version = getattr(_peticion, 'version', None)
+    if version is None:
+        from dashboard.models import VersionDatos
+        version = VersionDatos.actual(VERSION)
+        if getattr(_peticion, 'activa', False):
+            _peticion.version = version
+    return version
+
+
+def invalidar_salarios():
+    """Incrementa la versión; cada proceso recarga la tabla en su próxima consulta."""
+    from dashboard.models import VersionDatos
+    VersionDatos.incrementar(VERSION)
+    _peticion.version = None
+
+
+def tabla_salarios():
+    """Dict {(grupo_escala_id, rol_id, tridente_id): monto} vigente."""
+    version = version_salarios()
+    if _tabla['version'] != version:
+        from .models import NSalario
+        _tabla['montos'] = {
+            (grupo_id, rol_id, tridente_id): monto
+            for grupo_id, rol_id, tridente_id, monto in NSalario.objects.values_list(
+                'grupo_escala_id', 'rol_id', 'tridente_id', 'monto'
+            )
+        }
+        _tabla['version'] = version
+    return _tabla['montos']
+
+
+def monto_escala(grupo_escala_id, rol_id=None, tridente_id=None):
+    """Monto exacto de la celda (grupo, rol, tridente), o None si no existe."""
+    return tabla_salarios().get((grupo_escala_id, rol_id, tridente_id))
+
+
+def roles_con_salario(grupo_escala_id):
+    """Ids de rol que tienen algún monto positivo en el grupo."""
+    return {
+        rol_id for (grupo_id, rol_id, _), monto in tabla_salarios().items()
+        if grupo_id == grupo_escala_id and monto and monto > 0
+    }
+
+
+def salario_escala(grupo_escala_id, rol_id, tridente_id, es_cuadro):
+    """
+    Reglas de la escala dinámica:
+    - Cuadro (CDI/CEJ): celda del rol sin tridente y, si no existe, la celda
+      general del grupo (sin rol ni tridente).
+    - Resto: celda exacta (grupo, rol, tridente); sin tridente no hay salario.
+    """
+    if es_cuadro:
+        monto = monto_escala(grupo_escala_id, rol_id, None)
+        if monto is None:
+            monto = monto_escala(grupo_escala_id, None, None)
+        return monto
+    if not tridente_id:
+        return None
+    return monto_escala(grupo_escala_id, rol_id, tridente_id)
+
+
+def salario_cargo(ncargo, tipo_salario, rol_id=None, tridente_id=None):
+    """
+    Salario de un cargo según el tipo de salario del contrato: FIJ toma el
+    salario básico del NCargo; DIN resuelve la escala. Devuelve Decimal o None.
+    """
+    if ncargo is None:
+        return None
+    if tipo_salario == 'FIJ':
+        return ncargo.salario_basico or None
+    monto = salario_escala(ncargo.grupo_escala_id, rol_id, tridente_id, ncargo.es_cuadro)
+    return monto or None
+
+
+def redondear(monto):
+    """Monto como float con 2 decimales (formato que usan vistas y plantillas)."""
+    return round(float(monto), 2) if monto else None
+
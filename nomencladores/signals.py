@@ -0,0 +1,19 @@
+"""
+Invalidación de la tabla de salarios en memoria (ver nomencladores/salarios.py).
+
+Cualquier alta, cambio o borrado de NSalario incrementa la versión 'salarios'
+una vez confirmada la transacción; los borrados masivos por grupo también
+pasan por aquí porque Django emite post_delete por cada fila.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import NSalario
+from .salarios import invalidar_salarios
+
+
+@receiver(post_save, sender=NSalario)
+@receiver(post_delete, sender=NSalario)
+def nsalario_cambiado(sender, instance, **kwargs):
+    transaction.on_commit(invalidar_salarios)
@@ -0,0 +1,26 @@
+"""
+Tareas en segundo plano de nomencladores (ver tareas/registro.py).
+"""
+from tareas.models import almacen_tareas
+from tareas.registro import tarea
+
+from .utils import importar_cargos_excel
+
+
+@tarea('nomencladores.importar_cargos')
+def importar_cargos(tarea, archivo, estrategia):
+    """Importa el Excel de cargos subido a `archivo` (ruta en almacen_tareas) y lo borra al terminar."""
+    almacen = almacen_tareas()
+    try:
+        tarea.reportar(10, "Leyendo el Excel de cargos...")
+        with almacen.open(archivo, 'rb') as f:
+            res = importar_cargos_excel(f, estrategia)
+    finally:
+        almacen.delete(archivo)
+
+    if 'fatal' in res:
+        raise ValueError(f"Error crítico: {res['fatal']}")
+    mensaje = f"Importación: {res['creados']} creados, {res['actualizados']} actualizados. {res['saltados']} saltados."
+    if res['errores']:
+        mensaje += f" Errores detectados: {len(res['errores'])}."
+    return {'mensaje': mensaje, 'detalles': res['errores'][:50]}
@@ -8,6 +8,7 @@ from .forms import NCargoForm, RegistrarSalariosForm, EditarSalariosForm, NGrupo
 from django.urls import reverse_lazy
 from django.contrib import messages, admin
 from django.db import transaction
+from contratos.salarios import recalcular_salarios
 from nomencladores.models import NSalario, NRol, NTridente, NGrupoEscala, NEspecialidad, NTipoContrato, NMotivoContrato
 from django.http import JsonResponse, HttpResponse
 import json
@@ -158,7 +159,9 @@ def eliminar_salarios_grupo(request, grupo_id):
     if request.method == "DELETE" or request.method == "POST":
         try:
             # Borrar todos los salarios asociados a este grupo escala
-            count, _ = NSalario.objects.filter(grupo_escala_id=grupo_id).delete()
+            with transaction.atomic():
+                count, _ = NSalario.objects.filter(grupo_escala_id=grupo_id).delete()
+                recalcular_salarios([grupo_id])
             
             if count > 0:
                 return JsonResponse({'success': True, 'message': 'Grupo de salarios eliminado y liberado correctamente.'})
@@ -193,6 +196,9 @@ def editar_salarios_grupo(request, grupo_id):
                         parts = key.split('_')
                         if len(parts) == 3: 
                             NSalario.objects.create(grupo_escala=grupo, rol_id=parts[1], tridente_id=parts[2], monto=value)
+
+            # Propagar la nueva escala a los contratos del grupo (misma transacción)
+            recalcular_salarios([grupo.id])
                             
             messages.success(request, f"Salarios del Grupo {grupo.nivel} actualizados.")
             return redirect(reverse_lazy('parametros') + '?tab=salario')
@@ -312,6 +318,8 @@ def crear_salarios_por_grupo(request):
                     parts = key.split('_')
                     if len(parts) == 3:
                         NSalario.objects.create(grupo_escala=grupo, rol_id=parts[1], tridente_id=parts[2], monto=value)
+
+        recalcular_salarios([grupo.id])
         
         messages.success(request, f"Configuración salarial del Grupo {grupo.nivel} guardada correctamente.")
         return redirect(reverse_lazy('parametros') + '?tab=salario')
@@ -0,0 +1,79 @@
+"""
+Servicio de generación de PDF con xhtml2pdf.
+
+pisa.CreatePDF es CPU puro y tarda segundos por documento: dentro del hilo de
+la petición bloquea al worker de gunicorn. Aquí la conversión HTML -> PDF
+corre en un pool de procesos acotado (reportes/procesos.py: PDF_WORKERS
+procesos) con tiempo máximo por documento (PDF_TIMEOUT).
+El resultado se cachea por el hash del HTML renderizado: el mismo informe con
+los mismos datos no se convierte dos veces.
+
+    pdf = render_pdf('pages/reportes/consolidado_pdf.html', context)
+    return respuesta_pdf('pages/reportes/consolidado_pdf.html', context, 'Consolidado.pdf')
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template
+
+from .procesos import ErrorTrabajo, PoolOcupado, PoolProcesos
+
+
+class ErrorPDF(Exception):
+    """La conversión falló, superó el tiempo máximo o el servicio está saturado."""
+
+
+class ServicioOcupado(ErrorPDF):
+    pass
+
+
+def _convertir(html):
+    # Se ejecuta en el proceso del pool: solo recibe y devuelve datos serializables
+    from xhtml2pdf import pisa
+
+    salida = BytesIO()
+    estado = pisa.CreatePDF(html, dest=salida)
+    if estado.err:
+        raise ValueError(f"xhtml2pdf devolvió {estado.err} errores")
+    return salida.getvalue()
+
+
+_pool = PoolProcesos('PDF_WORKERS', 'PDF_TIMEOUT')
+
+
+def html_a_pdf(html):
+    """Bytes del PDF del HTML dado (caché por hash del HTML, conversión en el pool)."""
+    clave = f"pdf:{hashlib.sha256(html.encode('utf-8')).hexdigest()}"
+    pdf = cache.get(clave)
+    if pdf is None:
+        try:
+            pdf = _pool.ejecutar(_convertir, html)
+        except PoolOcupado as e:
+            raise ServicioOcupado(str(e)) from e
+        except ErrorTrabajo as e:
+            raise ErrorPDF(str(e)) from e
+        cache.set(clave, pdf, settings.PDF_CACHE_TTL)
+    return pdf
+
+
+def render_pdf(template, context):
+    """Renderiza la plantilla Django `template` con `context` y la convierte a PDF (bytes)."""
+    return html_a_pdf(get_template(template).render(context))
+
+
+def respuesta_pdf(template, context, nombre_archivo, adjunto=True):
+    """HttpResponse con el PDF; 503 si el servicio está saturado y 500 si la conversión falla."""
+    try:
+        pdf = render_pdf(template, context)
+    except ServicioOcupado as e:
+        return HttpResponse(str(e), status=503)
+    except ErrorPDF:
+        return HttpResponse('Hubo un error al generar el PDF', status=500)
+
+    response = HttpResponse(pdf, content_type='application/pdf')
+    disposicion = 'attachment' if adjunto else 'inline'
+    response['Content-Disposition'] = f'{disposicion}; filename="{nombre_archivo}"'
+    return response
@@ -0,0 +1,117 @@
+"""
+Pools de procesos para el trabajo de CPU de los reportes (PDF, Word).
+
+Cada pool se crea al primer uso con el número de procesos y el tiempo máximo
+por trabajo que indiquen dos ajustes de settings (p. ej. PDF_WORKERS y
+PDF_TIMEOUT). Con 0 procesos el trabajo se ejecuta en el propio proceso.
+
+    _pool = PoolProcesos('PDF_WORKERS', 'PDF_TIMEOUT')
+    pdf = _pool.ejecutar(_convertir, html)
+    documentos = _pool.mapear(_render, [(ruta, ctx1), (ruta, ctx2)])
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as TiempoAgotado
+
+from django.conf import settings
+
+
+class ErrorTrabajo(Exception):
+    """El trabajo falló, superó el tiempo máximo o el pool está saturado."""
+
+
+class PoolOcupado(ErrorTrabajo):
+    pass
+
+
+class PoolProcesos:
+    """ProcessPoolExecutor compartido por el proceso, con cupos y tiempo máximo por trabajo."""
+
+    def __init__(self, ajuste_procesos, ajuste_timeout):
+        self.ajuste_procesos = ajuste_procesos
+        self.ajuste_timeout = ajuste_timeout
+        self._lock = threading.Lock()
+        self._ejecutor = None
+        self._cupos = None
+
+    @property
+    def procesos(self):
+        return getattr(settings, self.ajuste_procesos)
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.ajuste_timeout)
+
+    def _iniciar(self):
+        with self._lock:
+            if self._ejecutor is None:
+                # spawn: los hijos no heredan conexiones ni hilos del servidor
+                self._ejecutor = ProcessPoolExecutor(
+                    max_workers=self.procesos, mp_context=multiprocessing.get_context('spawn')
+                )
+                # Como mucho el doble de trabajos en curso que procesos
+                self._cupos = threading.BoundedSemaphore(self.procesos * 2)
+            return self._ejecutor, self._cupos
+
+    def _reiniciar(self, ejecutor):
+        # Un trabajo colgado ocupa su proceso hasta terminar: se cierra el pool
+        # entero (matando sus procesos) y el siguiente trabajo crea uno nuevo
+        with self._lock:
+            if self._ejecutor is not ejecutor:
+                return
+            self._ejecutor = None
+        for proceso in list(getattr(ejecutor, '_processes', {}).values()):
+            proceso.terminate()
+        ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    def _resultado(self, ejecutor, futuro):
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TiempoAgotado:
+            self._reiniciar(ejecutor)
+            raise ErrorTrabajo(f"El trabajo superó el tiempo máximo de {self.timeout} s.")
+        except Exception as e:
+            raise ErrorTrabajo(str(e)) from e
+
+    def _en_proceso_actual(self, funcion, args):
+        try:
+            return funcion(*args)
+        except Exception as e:
+            raise ErrorTrabajo(str(e)) from e
+
+    def _ocupar(self, cupos):
+        if not cupos.acquire(timeout=self.timeout):
+            raise PoolOcupado("Hay demasiados documentos en cola; intente de nuevo en unos segundos.")
+
+    def ejecutar(self, funcion, *args):
+        """Resultado de `funcion(*args)` en un proceso del pool (ErrorTrabajo si falla)."""
+        if not self.procesos:
+            return self._en_proceso_actual(funcion, args)
+
+        ejecutor, cupos = self._iniciar()
+        self._ocupar(cupos)
+        try:
+            return self._resultado(ejecutor, ejecutor.submit(funcion, *args))
+        finally:
+            cupos.release()
+
+    def mapear(self, funcion, argumentos):
+        """
+        Resultados de `funcion(*args)` para cada tupla de `argumentos`, en
+        orden, repartidos entre los procesos del pool. Un lote ocupa un solo
+        cupo; si un trabajo falla se cancelan los pendientes.
+        """
+        if not self.procesos:
+            return [self._en_proceso_actual(funcion, args) for args in argumentos]
+
+        ejecutor, cupos = self._iniciar()
+        self._ocupar(cupos)
+        futuros = []
+        try:
+            futuros = [ejecutor.submit(funcion, *args) for args in argumentos]
+            return [self._resultado(ejecutor, futuro) for futuro in futuros]
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+            cupos.release()
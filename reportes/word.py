@@ -0,0 +1,276 @@
+"""
+Documentos Word (docxtpl): plantillas en memoria y caché de salida en disco.
+
+Abrir un .docx con DocxTemplate descomprime el paquete, y cada render vuelve
+a compilar con Jinja todo el XML del cuerpo. Aquí cada plantilla se lee una
+sola vez por proceso (se recarga si cambia su mtime) y guarda su propio
+entorno Jinja, que compila el XML una vez y lo reutiliza en cada render.
+
+El documento generado se guarda en WORD_CACHE_DIR bajo el hash de la
+plantilla y del contexto (solo las variables que usa la plantilla), así que
+un mismo documento con los mismos datos no se genera dos veces, y cualquier
+dato corregido produce un documento nuevo. limpiar_cache borra los que no se
+usan (por antigüedad y por tamaño total):
+
+    return respuesta_docx(render_docx(ruta, context), "Movimiento.docx")
+
+Para lotes (cientos de contratos), render_lote reparte los documentos que no
+estén en disco entre los procesos de WORD_WORKERS.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.http import HttpResponse
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docxtpl import DocxTemplate, Listing, RichText
+from jinja2 import Environment, TemplateError
+
+from .procesos import PoolProcesos
+
+CONTENT_TYPE_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+class _EntornoPlantilla(Environment):
+    """Entorno Jinja de una plantilla: cada fragmento XML se compila una sola vez."""
+
+    def __init__(self):
+        super().__init__()
+        self._compiladas = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals or template_class:
+            return super().from_string(source, globals, template_class)
+        compilada = self._compiladas.get(source)
+        if compilada is None:
+            compilada = self._compiladas[source] = super().from_string(source)
+        return compilada
+
+
+class PlantillaWord:
+    """Contenido de un .docx leído en una fecha de modificación concreta."""
+
+    def __init__(self, ruta, mtime):
+        self.ruta = ruta
+        self.mtime = mtime
+        with open(ruta, 'rb') as f:
+            self.contenido = f.read()
+        self.huella = hashlib.sha256(self.contenido).hexdigest()
+        self.entorno = _EntornoPlantilla()
+        self._variables = False
+
+    def documento(self):
+        """DocxTemplate nuevo sobre el contenido en memoria (un render por instancia)."""
+        return DocxTemplate(BytesIO(self.contenido))
+
+    @property
+    def variables(self):
+        """Variables que usa la plantilla, o None si no se pudieron analizar."""
+        if self._variables is False:
+            try:
+                self._variables = self.documento().get_undeclared_template_variables(self.entorno)
+            except TemplateError:
+                self._variables = None
+        return self._variables
+
+    def render(self, context):
+        doc = self.documento()
+        doc.render(context, self.entorno)
+        salida = BytesIO()
+        doc.save(salida)
+        return salida.getvalue()
+
+
+_plantillas = {}
+_lock = threading.Lock()
+
+
+def plantilla(ruta):
+    """PlantillaWord de `ruta`, leída una vez por proceso y recargada si cambia el archivo."""
+    mtime = os.path.getmtime(ruta)
+    actual = _plantillas.get(ruta)
+    if actual is None or actual.mtime != mtime:
+        with _lock:
+            actual = _plantillas.get(ruta)
+            if actual is None or actual.mtime != mtime:
+                actual = _plantillas[ruta] = PlantillaWord(ruta, mtime)
+    return actual
+
+
+def _serializable(valor):
+    if isinstance(valor, (date, datetime, time, Decimal)):
+        return str(valor)
+    if isinstance(valor, (RichText, Listing)):
+        return str(valor)
+    # Modelos, querysets, vistas...: no se puede saber si cambiaron, no se cachea
+    raise TypeError(type(valor).__name__)
+
+
+def _clave_contexto(plantilla_word, context):
+    variables = plantilla_word.variables
+    if variables is None:
+        return None
+    usados = {k: context[k] for k in variables if k in context}
+    try:
+        texto = json.dumps(usados, sort_keys=True, default=_serializable)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _ruta_guardada(plantilla_word, clave):
+    nombre = hashlib.sha256(f"{plantilla_word.huella}:{clave}".encode('utf-8')).hexdigest()
+    return os.path.join(settings.WORD_CACHE_DIR, nombre[:2], f"{nombre}.docx")
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        # La fecha de modificación marca el último uso (ver limpiar_cache)
+        os.utime(ruta)
+        return contenido
+    except OSError:
+        return None
+
+
+def _guardar(ruta, contenido):
+    # Escritura atómica: otro proceso nunca lee un .docx a medias
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass
+
+
+def render_docx(ruta, context, clave=None):
+    """
+    Bytes del .docx de la plantilla `ruta` con `context`. Sin `clave`, se
+    deriva del contenido del contexto; si el contexto no se puede resumir
+    (objetos de modelo), se genera sin pasar por la caché. Una `clave` propia
+    solo debe usarse si identifica todos los datos del documento.
+    """
+    plantilla_word = plantilla(ruta)
+    if clave is None:
+        clave = _clave_contexto(plantilla_word, context)
+    if clave is None:
+        return plantilla_word.render(context)
+
+    destino = _ruta_guardada(plantilla_word, clave)
+    contenido = _leer(destino)
+    if contenido is None:
+        contenido = plantilla_word.render(context)
+        _guardar(destino, contenido)
+    return contenido
+
+
+def limpiar_cache(max_dias=None, max_mb=None):
+    """
+    Borra de WORD_CACHE_DIR los documentos sin usar en `max_dias` días y, si
+    el resto ocupa más de `max_mb` MB, los usados hace más tiempo hasta bajar
+    de ese tamaño (por defecto WORD_CACHE_MAX_DIAS y WORD_CACHE_MAX_MB).
+    Devuelve cuántos archivos borró.
+    """
+    max_dias = settings.WORD_CACHE_MAX_DIAS if max_dias is None else max_dias
+    max_bytes = (settings.WORD_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+    limite = datetime.now().timestamp() - max_dias * 86400
+
+    archivos = []
+    for carpeta, _, nombres in os.walk(settings.WORD_CACHE_DIR):
+        for nombre in nombres:
+            ruta = os.path.join(carpeta, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            archivos.append((estado.st_mtime, estado.st_size, ruta))
+
+    # Del uso más antiguo al más reciente
+    archivos.sort()
+    total = sum(tamanno for _, tamanno, _ in archivos)
+    borrados = 0
+    for usado, tamanno, ruta in archivos:
+        if usado >= limite and total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tamanno
+        borrados += 1
+    return borrados
+
+
+_pool = PoolProcesos('WORD_WORKERS', 'WORD_TIMEOUT')
+
+
+def _render_en_proceso(ruta, context):
+    # Cada proceso del pool guarda sus propias plantillas en memoria
+    return plantilla(ruta).render(context)
+
+
+def render_lote(ruta, contextos):
+    """
+    Bytes de un .docx por contexto, en el mismo orden. Los ya generados se
+    leen del disco; el resto se reparte entre los procesos del pool y se
+    guarda. Lanza procesos.ErrorTrabajo si algún documento falla.
+    """
+    plantilla_word = plantilla(ruta)
+    destinos = []
+    for context in contextos:
+        clave = _clave_contexto(plantilla_word, context)
+        destinos.append(_ruta_guardada(plantilla_word, clave) if clave else None)
+
+    documentos = [_leer(destino) if destino else None for destino in destinos]
+    pendientes = [i for i, contenido in enumerate(documentos) if contenido is None]
+    generados = _pool.mapear(_render_en_proceso, [(ruta, contextos[i]) for i in pendientes])
+    for i, contenido in zip(pendientes, generados):
+        documentos[i] = contenido
+        if destinos[i]:
+            _guardar(destinos[i], contenido)
+    return documentos
+
+
+def unir_documentos(documentos):
+    """
+    Un solo .docx con los documentos dados, cada uno en página nueva. Todos
+    deben salir de la misma plantilla: solo se copian los cuerpos, así que
+    estilos, numeración, imágenes y encabezados son los del primero.
+    """
+    principal = Document(BytesIO(documentos[0]))
+    cierre = principal.element.body.sectPr
+    for contenido in documentos[1:]:
+        principal.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+        for elemento in list(Document(BytesIO(contenido)).element.body):
+            if elemento.tag == cierre.tag:
+                continue
+            cierre.addprevious(elemento)
+    salida = BytesIO()
+    principal.save(salida)
+    return salida.getvalue()
+
+
+def comprimir(archivos):
+    """Bytes de un ZIP con los pares (nombre, contenido) dados."""
+    salida = BytesIO()
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in archivos:
+            zf.writestr(nombre, contenido)
+    return salida.getvalue()
+
+
+def respuesta_docx(contenido, nombre_archivo):
+    response = HttpResponse(contenido, content_type=CONTENT_TYPE_DOCX)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
@@ -0,0 +1,38 @@
+"""
+Consultas sobre el subárbol de una Unidad Organizativa.
+
+Se apoyan en la tabla de clausura UnidadJerarquia: filtrar por "la unidad y
+todas sus dependientes" es un JOIN indexado contra esa tabla, a cualquier
+profundidad y sin consultar antes las hijas.
+
+    Departamento.objects.filter(en_subarbol(unidad))
+    CargoPlantilla.objects.filter(en_subarbol(unidad, 'departamento__unidad_organizativa'))
+    CAlta.objects.filter(en_subarbol(unidad, 'cargo__departamento__unidad_organizativa'))
+"""
+from django.db.models import Q
+
+from .models import UnidadJerarquia
+
+
+def en_subarbol(unidad, campo='unidad_organizativa'):
+    """
+    Q que limita a los objetos cuya `campo` (ruta hasta una UnidadOrganizativa)
+    es `unidad` o una de sus descendientes. `unidad` puede ser objeto o pk.
+    """
+    # Semi-join contra la tabla de clausura (índice único ancestro, descendiente)
+    subarbol = UnidadJerarquia.objects.filter(ancestro=unidad).values('descendiente_id')
+    return Q(**{f'{campo}__in': subarbol})
+
+
+def subarboles(unidades):
+    """{pk de unidad: set de pks de su subárbol (ella incluida)} en una consulta."""
+    resultado = {}
+    filas = UnidadJerarquia.objects.filter(ancestro__in=unidades).values_list('ancestro_id', 'descendiente_id')
+    for ancestro_id, descendiente_id in filas:
+        resultado.setdefault(ancestro_id, set()).add(descendiente_id)
+    return resultado
+
+
+def descendientes_ids(unidad):
+    """Pks de la unidad y de todas sus descendientes."""
+    return list(UnidadJerarquia.objects.filter(ancestro=unidad).values_list('descendiente_id', flat=True))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from strorganizativa.models import CargoPlantilla
+
+
+class Command(BaseCommand):
+    help = "Detecta y corrige desfases en los contadores de plazas (cant_cubierta, cant_contrato) de los cargos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Solo muestra los cargos con desfase, sin modificar nada."
+        )
+
+    def handle(self, *args, **options):
+        desfasados = list(CargoPlantilla.con_desfase().select_related('ncargo', 'departamento'))
+        for cargo in desfasados:
+            self.stdout.write(
+                f"{cargo.pk} {cargo.ncargo.descripcion} ({cargo.departamento.descripcion}): "
+                f"fijas {cargo.cant_cubierta} -> {cargo.real_cubierta}, "
+                f"contrato {cargo.cant_contrato} -> {cargo.real_contrato}"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Cargos con desfase: {len(desfasados)} (sin cambios)."))
+            return
+
+        corregidos = CargoPlantilla.refrescar_conteos([c.pk for c in desfasados]) if desfasados else 0
+        self.stdout.write(self.style.SUCCESS(f"Contadores de plazas reconciliados: {corregidos} cargos corregidos."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strorganizativa', '0011_alter_unidadorganizativa_orden_informe_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cargoplantilla',
+            name='cant_contrato',
+            field=models.IntegerField(default=0),
+        ),
+    ]
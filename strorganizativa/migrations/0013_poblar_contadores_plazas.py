@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def poblar_contadores(apps, schema_editor):
+    CargoPlantilla = apps.get_model('strorganizativa', 'CargoPlantilla')
+    CAlta = apps.get_model('contratos', 'CAlta')
+
+    def conteo(ocupa_plaza):
+        return Coalesce(Subquery(
+            CAlta.objects.filter(
+                cargo=OuterRef('pk'), aspirante__estado='ACTIVO', tipo__ocupa_plaza=ocupa_plaza
+            ).values('cargo').annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    CargoPlantilla.objects.update(cant_cubierta=conteo(True), cant_contrato=conteo(False))
+
+
+def revertir(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('strorganizativa', '0012_cargoplantilla_cant_contrato'),  # ← Depende de la migración de esquema
+        ('contratos', '0013_tmovimiento_indices'),
+    ]
+    operations = [
+        migrations.RunPython(poblar_contadores, revertir),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strorganizativa', '0013_poblar_contadores_plazas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnidadJerarquia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profundidad', models.PositiveIntegerField(default=0)),
+                ('ancestro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendientes', to='strorganizativa.unidadorganizativa')),
+                ('descendiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestros', to='strorganizativa.unidadorganizativa')),
+            ],
+            options={
+                'verbose_name': 'Jerarquía de Unidades',
+                'indexes': [models.Index(fields=['descendiente', 'ancestro'], name='uo_jerarquia_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestro', 'descendiente'), name='unique_ancestro_descendiente')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def poblar_jerarquia(apps, schema_editor):
+    UnidadOrganizativa = apps.get_model('strorganizativa', 'UnidadOrganizativa')
+    UnidadJerarquia = apps.get_model('strorganizativa', 'UnidadJerarquia')
+
+    padres = dict(UnidadOrganizativa.objects.values_list('pk', 'padre_id'))
+    filas = []
+    for unidad_id in padres:
+        # Se sube por la cadena de padres (con tope por si hubiera un ciclo)
+        ancestro_id, profundidad, vistos = unidad_id, 0, set()
+        while ancestro_id is not None and ancestro_id not in vistos:
+            vistos.add(ancestro_id)
+            filas.append(UnidadJerarquia(ancestro_id=ancestro_id, descendiente_id=unidad_id, profundidad=profundidad))
+            ancestro_id, profundidad = padres.get(ancestro_id), profundidad + 1
+    UnidadJerarquia.objects.bulk_create(filas)
+
+
+def revertir(apps, schema_editor):
+    apps.get_model('strorganizativa', 'UnidadJerarquia').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('strorganizativa', '0014_unidadjerarquia'),  # ← Depende de la migración de esquema
+    ]
+    operations = [
+        migrations.RunPython(poblar_jerarquia, revertir),
+    ]
@@ -4,7 +4,8 @@ from django.contrib.contenttypes.models import ContentType
 from nomencladores.models import NCargo, NRol, NNivelPreparacion, NTipoUnidadOrganizativa
 from auditoria.models import Base
 from django.core.exceptions import ValidationError
-from django.db.models import Max
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 
 # Create your models here.
 class UnidadOrganizativa(Base):
@@ -87,10 +88,18 @@ class UnidadOrganizativa(Base):
             from django.db.models import Max
             ultimo_codigo = UnidadOrganizativa.objects.aggregate(Max('codigo_interno'))['codigo_interno__max']
             self.codigo_interno = (ultimo_codigo or 0) + 1
-            
+
+        # Padre anterior, para mover la rama en la tabla de jerarquía si cambia
+        existente = UnidadOrganizativa.objects.filter(pk=self.pk).values('padre_id').first()
+
         self.clean()
         super().save(*args, **kwargs)
 
+        if existente is None:
+            UnidadJerarquia.insertar(self)
+        elif existente['padre_id'] != self.padre_id:
+            UnidadJerarquia.mover(self)
+
         # --- SINCRONIZACIÓN EN CASCADA ---
         # Si esta unidad es Principal, forzamos la actualización de todas sus hijas
         if self.tipo and self.tipo.es_principal:
@@ -100,6 +109,54 @@ class UnidadOrganizativa(Base):
     def __str__(self):
         return self.descripcion
     
+class UnidadJerarquia(models.Model):
+    """
+    Tabla de clausura de UnidadOrganizativa: una fila por cada par
+    (ancestro, descendiente), incluida la unidad consigo misma (profundidad 0).
+    El subárbol de una unidad a cualquier profundidad es un único JOIN
+    indexado (ver strorganizativa/jerarquia.py). La mantiene UnidadOrganizativa.save.
+    """
+    ancestro = models.ForeignKey(UnidadOrganizativa, on_delete=models.CASCADE, related_name='descendientes')
+    descendiente = models.ForeignKey(UnidadOrganizativa, on_delete=models.CASCADE, related_name='ancestros')
+    profundidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Jerarquía de Unidades"
+        constraints = [
+            models.UniqueConstraint(fields=['ancestro', 'descendiente'], name='unique_ancestro_descendiente')
+        ]
+        indexes = [
+            models.Index(fields=['descendiente', 'ancestro'], name='uo_jerarquia_desc_idx'),
+        ]
+
+    @classmethod
+    def _filas_bajo(cls, padre_id, rama):
+        """Filas que cuelgan `rama` [(descendiente_id, profundidad)] de padre_id y sus ancestros."""
+        if not padre_id:
+            return []
+        return [
+            cls(ancestro_id=ancestro_id, descendiente_id=descendiente_id, profundidad=p_ancestro + p_rama + 1)
+            for ancestro_id, p_ancestro in cls.objects.filter(descendiente_id=padre_id).values_list('ancestro_id', 'profundidad')
+            for descendiente_id, p_rama in rama
+        ]
+
+    @classmethod
+    def insertar(cls, unidad):
+        cls.objects.bulk_create(
+            [cls(ancestro_id=unidad.pk, descendiente_id=unidad.pk, profundidad=0)]
+            + cls._filas_bajo(unidad.padre_id, [(unidad.pk, 0)])
+        )
+
+    @classmethod
+    def mover(cls, unidad):
+        """Cuelga la rama de `unidad` (ella y sus descendientes) de su nuevo padre."""
+        rama = list(cls.objects.filter(ancestro_id=unidad.pk).values_list('descendiente_id', 'profundidad'))
+        ids_rama = [descendiente_id for descendiente_id, _ in rama]
+        # Se sueltan los ancestros externos a la rama y se enlazan los del nuevo padre
+        cls.objects.filter(descendiente_id__in=ids_rama).exclude(ancestro_id__in=ids_rama).delete()
+        cls.objects.bulk_create(cls._filas_bajo(unidad.padre_id, rama))
+
+
 class Departamento(Base):
 
     descripcion = models.CharField(max_length=150, blank=False, null=False)
@@ -138,6 +195,8 @@ class CargoPlantilla(Base):
     nivel_preparacion = models.ForeignKey(NNivelPreparacion, verbose_name=('Nivel de Preparación'), on_delete=models.RESTRICT, null=True, blank=True)
     cant_aprobada = models.IntegerField(default=0)
     cant_cubierta = models.IntegerField(default=0)
+    # Contratos activos que no ocupan plaza oficial (determinados, adiestrados...)
+    cant_contrato = models.IntegerField(default=0)
     activo = models.BooleanField(default=True)
     funcionario = models.BooleanField(default=False, verbose_name='Funcionario')
     designado = models.BooleanField(default=False, verbose_name='Designado')
@@ -151,6 +210,7 @@ class CargoPlantilla(Base):
         """
         Cuenta la cantidad de personas REALMENTE activas en este cargo
         QUE OCUPAN UNA PLAZA OFICIAL (Ej: Indeterminados).
+        Consulta la base de datos; para leer usar cant_cubierta (ver ajustar_plazas).
         """
         from contratos.models import CAlta
         return CAlta.objects.filter(
@@ -158,11 +218,74 @@ class CargoPlantilla(Base):
             aspirante__estado='ACTIVO',
             tipo__ocupa_plaza=True  # <--- EL FILTRO DE ORO
         ).count()
-    
+
+    @staticmethod
+    def campo_plaza(ocupa_plaza):
+        """Contador que mueve un contrato según su tipo (None: tipo sin definir, no cuenta)."""
+        if ocupa_plaza is None:
+            return None
+        return 'cant_cubierta' if ocupa_plaza else 'cant_contrato'
+
+    @classmethod
+    def ajustar_plazas(cls, deltas):
+        """
+        Suma a los contadores de plazas los deltas {(cargo_id, ocupa_plaza): n}
+        con un solo UPDATE atómico (F() + n): dos altas simultáneas en el mismo
+        cargo no se pisan y no hace falta contar los contratos.
+        """
+        por_campo = {'cant_cubierta': {}, 'cant_contrato': {}}
+        for (cargo_id, ocupa_plaza), delta in deltas.items():
+            campo = cls.campo_plaza(ocupa_plaza)
+            if cargo_id and campo and delta:
+                por_campo[campo][cargo_id] = por_campo[campo].get(cargo_id, 0) + delta
+
+        cambios = {
+            campo: F(campo) + Case(
+                *[When(pk=cargo_id, then=Value(delta)) for cargo_id, delta in valores.items()],
+                default=Value(0), output_field=models.IntegerField()
+            )
+            for campo, valores in por_campo.items() if valores
+        }
+        if not cambios:
+            return 0
+        ids = set(por_campo['cant_cubierta']) | set(por_campo['cant_contrato'])
+        return cls.objects.filter(pk__in=ids).update(**cambios)
+
+    @classmethod
+    def _conteos_reales(cls):
+        """Subconsultas (fijas, contrato) con los contratos activos de cada cargo."""
+        from contratos.models import CAlta
+
+        def conteo(ocupa_plaza):
+            return Coalesce(Subquery(
+                CAlta.objects.filter(
+                    cargo=OuterRef('pk'), aspirante__estado='ACTIVO', tipo__ocupa_plaza=ocupa_plaza
+                ).values('cargo').annotate(total=Count('pk')).values('total')
+            ), 0)
+        return conteo(True), conteo(False)
+
+    @classmethod
+    def con_desfase(cls):
+        """
+        Cargos cuyos contadores guardados no coinciden con los contratos reales,
+        anotados con `real_cubierta` y `real_contrato` (una sola consulta agrupada).
+        """
+        fijas, contrato = cls._conteos_reales()
+        return cls.objects.annotate(real_cubierta=fijas, real_contrato=contrato).exclude(
+            cant_cubierta=F('real_cubierta'), cant_contrato=F('real_contrato')
+        )
+
     def refrescar_conteo_plazas(self):
-        """Sincroniza el campo de la base de datos con la realidad"""
-        self.cant_cubierta = self.cant_cubierta_real
-        self.save(update_fields=['cant_cubierta'])
+        """Sincroniza los contadores de la base de datos con la realidad"""
+        self.refrescar_conteos([self.pk])
+        self.refresh_from_db(fields=['cant_cubierta', 'cant_contrato'])
+
+    @classmethod
+    def refrescar_conteos(cls, cargos_ids=None):
+        """Recalcula ambos contadores contando los contratos (todos los cargos o los indicados) en un solo UPDATE."""
+        fijas, contrato = cls._conteos_reales()
+        qs = cls.objects.all() if cargos_ids is None else cls.objects.filter(pk__in=cargos_ids)
+        return qs.update(cant_cubierta=fijas, cant_contrato=contrato)
 
     @property
     def disponibilidad(self):
@@ -209,29 +332,13 @@ class CargoPlantilla(Base):
 
     @property
     def plazas_fijas(self):
-        """Cuenta SOLO los contratos cuyo tipo tiene el check 'ocupa_plaza=True' y están activos"""
-        if hasattr(self, 'count_ind'): 
-            return self.count_ind
-        
-        from contratos.models import CAlta # Importación local anti-bucle
-        return CAlta.objects.filter(
-            cargo=self, 
-            tipo__ocupa_plaza=True, 
-            aspirante__estado='ACTIVO'
-        ).count()
+        """Contratos activos cuyo tipo tiene el check 'ocupa_plaza=True' (contador guardado)"""
+        return self.cant_cubierta
 
     @property
     def plazas_contrato(self):
-        """Cuenta los contratos temporales (ocupa_plaza=False) activos"""
-        if hasattr(self, 'count_cont'): 
-            return self.count_cont
-            
-        from contratos.models import CAlta # Importación local anti-bucle
-        return CAlta.objects.filter(
-            cargo=self, 
-            tipo__ocupa_plaza=False, 
-            aspirante__estado='ACTIVO'
-        ).count()
+        """Contratos temporales (ocupa_plaza=False) activos (contador guardado)"""
+        return self.cant_contrato
 
     def __str__(self):
         return self.ncargo.descripcion
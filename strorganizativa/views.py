@@ -721,11 +721,8 @@ def htmx_load_cargos(request, dpto_id):
     if q:
         cargos = cargos.filter(ncargo__descripcion__icontains=q)
 
-    # Anotaciones para estadísticas
-    cargos = cargos.select_related('ncargo', 'rol').annotate(
-        count_ind=Count('calta', filter=Q(calta__tipo__ocupa_plaza=True, calta__aspirante__estado='ACTIVO')),
-        count_cont=Count('calta', filter=Q(calta__tipo__ocupa_plaza=False, calta__aspirante__estado='ACTIVO'))
-    )
+    # Estadísticas: plazas_fijas / plazas_contrato leen los contadores guardados
+    cargos = cargos.select_related('ncargo', 'rol')
 
     # 🔥 ORDENAMIENTO CORREGIDO (con soporte para 'orden', 'alpha', 'estado')
     sort_by = request.GET.get('sort', 'orden')  # 'orden' por defecto
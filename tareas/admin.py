@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Tarea
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'tipo', 'estado', 'progreso', 'usuario', 'trabajador', 'creada', 'terminada')
+    list_filter = ('estado', 'tipo')
+    # El resultado no tiene URL pública: se enlaza la descarga con control de usuario
+    exclude = ('resultado',)
+    readonly_fields = [f.name for f in Tarea._meta.fields if f.name != 'resultado'] + ['archivo']
+
+    @admin.display(description="Archivo resultado")
+    def archivo(self, obj):
+        if not obj.resultado:
+            return "-"
+        return format_html('<a href="{}">{}</a>', reverse('descargar_tarea', args=[obj.pk]), obj.resultado.name)
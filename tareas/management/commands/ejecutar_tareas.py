@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from nomencladores.salarios import con_version
+from reportes.word import limpiar_cache
+from tareas.models import Tarea
+
+# Segundos entre limpiezas de la caché de documentos Word (solo sin tareas pendientes)
+INTERVALO_LIMPIEZA = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Trabajador de la cola de tareas en segundo plano: toma las pendientes con "
+        "SELECT ... FOR UPDATE SKIP LOCKED y las ejecuta una a una. Se pueden lanzar "
+        "varios (--procesos o varias instancias del servicio) sin que repitan trabajo. "
+        "Mientras no hay tareas, limpia cada hora la caché de documentos Word."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--procesos', type=int, default=1,
+            help="Trabajadores en paralelo dentro de este comando (por defecto 1)."
+        )
+        parser.add_argument(
+            '--espera', type=float, default=2.0,
+            help="Segundos entre consultas cuando no hay tareas pendientes."
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help="Termina al vaciar la cola en lugar de quedarse esperando."
+        )
+
+    def handle(self, *args, **options):
+        procesos = max(1, options['procesos'])
+        if procesos == 1:
+            self._trabajar(options)
+            return
+
+        # Cada hijo abre su propia conexión: no se heredan las del padre
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork')
+        hijos = [contexto.Process(target=self._trabajar, args=(options,)) for _ in range(procesos)]
+        for hijo in hijos:
+            hijo.start()
+        signal.signal(signal.SIGTERM, lambda *_: [hijo.terminate() for hijo in hijos])
+        for hijo in hijos:
+            hijo.join()
+
+    def _trabajar(self, options):
+        trabajador = f"{socket.gethostname()}:{os.getpid()}"
+        detener = []
+        # SIGTERM (systemd, supervisor): termina la tarea en curso y sale
+        signal.signal(signal.SIGTERM, lambda *_: detener.append(True))
+        self.stdout.write(f"Trabajador {trabajador} esperando tareas...")
+        ultima_limpieza = None
+
+        while not detener:
+            close_old_connections()
+            tarea = Tarea.tomar_siguiente(trabajador)
+            if tarea is None:
+                liberadas = Tarea.liberar_interrumpidas()
+                if liberadas:
+                    self.stdout.write(self.style.WARNING(f"{liberadas} tareas interrumpidas marcadas como fallidas."))
+                if ultima_limpieza is None or time.monotonic() - ultima_limpieza >= INTERVALO_LIMPIEZA:
+                    ultima_limpieza = time.monotonic()
+                    borrados = limpiar_cache()
+                    if borrados:
+                        self.stdout.write(f"Caché de Word: {borrados} documentos sin uso borrados.")
+                if options['una_vez']:
+                    break
+                time.sleep(options['espera'])
+                continue
+
+            self.stdout.write(f"[{trabajador}] {tarea.tipo} #{tarea.pk}...")
+            inicio = time.monotonic()
+            # La tabla de salarios se valida una vez por tarea, no en cada contrato
+            with con_version():
+                tarea.ejecutar()
+            duracion = time.monotonic() - inicio
+            if tarea.estado == Tarea.TERMINADA:
+                self.stdout.write(self.style.SUCCESS(f"[{trabajador}] {tarea.tipo} #{tarea.pk} terminada en {duracion:.1f} s."))
+            else:
+                self.stdout.write(self.style.ERROR(f"[{trabajador}] {tarea.tipo} #{tarea.pk} fallida: {tarea.error_breve}"))
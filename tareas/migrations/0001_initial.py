@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=100, verbose_name='Tipo')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_CURSO', 'En curso'), ('TERMINADA', 'Terminada'), ('FALLIDA', 'Fallida')], default='PENDIENTE', max_length=10, verbose_name='Estado')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('mensaje', models.CharField(blank=True, max_length=255, verbose_name='Mensaje')),
+                ('resultado', models.FileField(blank=True, upload_to='tareas/%Y/%m/', verbose_name='Archivo resultado')),
+                ('resumen', models.JSONField(blank=True, null=True, verbose_name='Resumen')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('trabajador', models.CharField(blank=True, max_length=100, verbose_name='Trabajador')),
+                ('creada', models.DateTimeField(auto_now_add=True, verbose_name='Creada')),
+                ('iniciada', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada')),
+                ('terminada', models.DateTimeField(blank=True, null=True, verbose_name='Terminada')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tareas', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Tarea en segundo plano',
+                'verbose_name_plural': 'Tareas en segundo plano',
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['estado', 'creada'], name='tarea_estado_creada_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:34
+
+import tareas.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tarea',
+            name='resultado',
+            field=models.FileField(blank=True, storage=tareas.models.almacen_tareas, upload_to='resultados/%Y/%m/', verbose_name='Archivo resultado'),
+        ),
+    ]
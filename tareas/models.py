@@ -0,0 +1,159 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.utils import timezone
+
+from .registro import TAREAS
+
+
+def almacen_tareas():
+    """Storage privado de las tareas (TAREAS_ROOT, no se sirve en MEDIA_URL)."""
+    return FileSystemStorage(location=settings.TAREAS_ROOT, base_url=None)
+
+
+class Tarea(models.Model):
+    """
+    Trabajo pesado fuera del ciclo de la petición (exportaciones, documentos,
+    importaciones). La vista la encola y devuelve enseguida; un trabajador
+    (manage.py ejecutar_tareas) la toma con SELECT ... FOR UPDATE SKIP
+    LOCKED, informa el progreso y deja el resultado en TAREAS_ROOT.
+    """
+    PENDIENTE = 'PENDIENTE'
+    EN_CURSO = 'EN_CURSO'
+    TERMINADA = 'TERMINADA'
+    FALLIDA = 'FALLIDA'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (TERMINADA, 'Terminada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    tipo = models.CharField(max_length=100, verbose_name="Tipo")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE, verbose_name="Estado")
+    progreso = models.PositiveSmallIntegerField(default=0, verbose_name="Progreso (%)")
+    mensaje = models.CharField(max_length=255, blank=True, verbose_name="Mensaje")
+    resultado = models.FileField(
+        upload_to='resultados/%Y/%m/', storage=almacen_tareas, blank=True, verbose_name="Archivo resultado"
+    )
+    resumen = models.JSONField(null=True, blank=True, verbose_name="Resumen")
+    error = models.TextField(blank=True, verbose_name="Error")
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='tareas', verbose_name="Usuario"
+    )
+    trabajador = models.CharField(max_length=100, blank=True, verbose_name="Trabajador")
+    creada = models.DateTimeField(auto_now_add=True, verbose_name="Creada")
+    iniciada = models.DateTimeField(null=True, blank=True, verbose_name="Iniciada")
+    terminada = models.DateTimeField(null=True, blank=True, verbose_name="Terminada")
+
+    class Meta:
+        verbose_name = "Tarea en segundo plano"
+        verbose_name_plural = "Tareas en segundo plano"
+        ordering = ['-creada']
+        indexes = [models.Index(fields=['estado', 'creada'], name='tarea_estado_creada_idx')]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+    @property
+    def finalizada(self):
+        return self.estado in (self.TERMINADA, self.FALLIDA)
+
+    @property
+    def error_breve(self):
+        """Última línea del traceback: lo que se muestra al usuario."""
+        lineas = self.error.strip().splitlines()
+        return lineas[-1] if lineas else ""
+
+    @classmethod
+    def encolar(cls, tipo, parametros=None, usuario=None):
+        """Crea la tarea pendiente (con TAREAS_EN_LINEA se ejecuta al confirmar la transacción)."""
+        if tipo not in TAREAS:
+            raise ValueError(f"Tarea desconocida: {tipo}")
+        tarea = cls.objects.create(
+            tipo=tipo, parametros=parametros or {},
+            usuario=usuario if usuario and usuario.is_authenticated else None
+        )
+        if settings.TAREAS_EN_LINEA:
+            transaction.on_commit(lambda: cls._ejecutar_en_linea(tarea.pk))
+        return tarea
+
+    @classmethod
+    def _ejecutar_en_linea(cls, pk):
+        if cls.tomar(pk, 'en-linea'):
+            cls.objects.get(pk=pk).ejecutar()
+
+    @classmethod
+    def tomar(cls, pk, trabajador):
+        """Marca en curso la tarea `pk` si sigue pendiente (True si este trabajador la obtuvo)."""
+        return bool(cls.objects.filter(pk=pk, estado=cls.PENDIENTE).update(
+            estado=cls.EN_CURSO, iniciada=timezone.now(), trabajador=trabajador
+        ))
+
+    @classmethod
+    def tomar_siguiente(cls, trabajador):
+        """
+        La pendiente más antigua, ya marcada en curso, o None. SKIP LOCKED:
+        varios trabajadores a la vez nunca toman la misma ni se esperan.
+        """
+        with transaction.atomic():
+            tarea = (
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(estado=cls.PENDIENTE)
+                .order_by('creada', 'pk')
+                .first()
+            )
+            if tarea is None:
+                return None
+            tarea.estado = cls.EN_CURSO
+            tarea.iniciada = timezone.now()
+            tarea.trabajador = trabajador
+            tarea.save(update_fields=['estado', 'iniciada', 'trabajador'])
+        return tarea
+
+    @classmethod
+    def liberar_interrumpidas(cls):
+        """Da por fallidas las tareas en curso desde hace más de TAREAS_MAX_DURACION (trabajador caído)."""
+        limite = timezone.now() - timedelta(seconds=settings.TAREAS_MAX_DURACION)
+        return cls.objects.filter(estado=cls.EN_CURSO, iniciada__lt=limite).update(
+            estado=cls.FALLIDA, terminada=timezone.now(),
+            error="Interrumpida: superó el tiempo máximo o el trabajador se detuvo."
+        )
+
+    def reportar(self, progreso, mensaje=''):
+        """Actualiza el progreso (0-100) sin tocar el resto de la fila."""
+        self.progreso = max(0, min(100, int(progreso)))
+        self.mensaje = mensaje[:255]
+        Tarea.objects.filter(pk=self.pk).update(progreso=self.progreso, mensaje=self.mensaje)
+
+    def ejecutar(self):
+        """Ejecuta la función registrada y guarda el resultado (o el error)."""
+        try:
+            funcion = TAREAS.get(self.tipo)
+            if funcion is None:
+                raise LookupError(f"Tarea desconocida: {self.tipo}")
+            resultado = funcion(self, **self.parametros)
+
+            if isinstance(resultado, tuple):
+                nombre, contenido = resultado
+                archivo = contenido if isinstance(contenido, File) else ContentFile(contenido)
+                try:
+                    self.resultado.save(nombre, archivo, save=False)
+                finally:
+                    archivo.close()
+            elif resultado is not None:
+                self.resumen = resultado
+        except Exception:
+            self.estado = self.FALLIDA
+            self.error = traceback.format_exc()
+        else:
+            self.estado = self.TERMINADA
+            self.progreso = 100
+        self.terminada = timezone.now()
+        self.save()
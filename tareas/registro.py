@@ -0,0 +1,24 @@
+"""
+Registro de tareas en segundo plano: nombre -> función.
+
+Cada app declara las suyas en <app>/tareas.py (se importan en
+TareasConfig.ready):
+
+    @tarea('contratos.exportar_excel')
+    def exportar_excel(tarea):
+        tarea.reportar(50, "Escribiendo filas...")
+        return 'Listado.xlsx', contenido
+
+La función recibe la Tarea y sus parámetros como argumentos con nombre.
+Puede devolver (nombre_archivo, bytes o File), que se guarda en TAREAS_ROOT
+como resultado descargable, o un dict con 'mensaje' y 'detalles' (lista de
+textos) para mostrar al terminar.
+"""
+TAREAS = {}
+
+
+def tarea(nombre):
+    def registrar(funcion):
+        TAREAS[nombre] = funcion
+        return funcion
+    return registrar
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Tarea
+from .registro import TAREAS
+
+PRUEBA_OK = 'tests.generar_archivo'
+PRUEBA_ERROR = 'tests.fallar'
+
+
+def _generar_archivo(tarea, texto):
+    tarea.reportar(50, "Escribiendo...")
+    return 'prueba.txt', texto.encode('utf-8')
+
+
+def _fallar(tarea):
+    raise RuntimeError("Fallo de prueba")
+
+
+@override_settings(TAREAS_EN_LINEA=False)
+class TareaTests(TestCase):
+    """Cola de tareas: encolar, tomar, ejecutar y ver el resultado solo su dueño (o un administrador)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        TAREAS.update({PRUEBA_OK: _generar_archivo, PRUEBA_ERROR: _fallar})
+        cls.addClassCleanup(lambda: [TAREAS.pop(nombre, None) for nombre in (PRUEBA_OK, PRUEBA_ERROR)])
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.duenno = User.objects.create_user('duenno', 'duenno@example.com', 'x', es_observador=True)
+        cls.otro = User.objects.create_user('otro', 'otro@example.com', 'x', es_observador=True)
+        # Los administradores son staff (Usuario.save)
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'x', es_admin=True)
+
+    def _ejecutar_siguiente(self):
+        tarea = Tarea.tomar_siguiente('pruebas')
+        tarea.ejecutar()
+        if tarea.resultado:
+            self.addCleanup(tarea.resultado.delete, save=False)
+        return tarea
+
+    def test_encolar_tomar_y_ejecutar(self):
+        encolada = Tarea.encolar(PRUEBA_OK, {'texto': 'hola'}, usuario=self.duenno)
+        self.assertEqual(encolada.estado, Tarea.PENDIENTE)
+
+        tarea = self._ejecutar_siguiente()
+        self.assertEqual(tarea.pk, encolada.pk)
+        self.assertEqual(tarea.trabajador, 'pruebas')
+
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.TERMINADA)
+        self.assertEqual(tarea.progreso, 100)
+        with tarea.resultado.open('rb') as f:
+            self.assertEqual(f.read(), b'hola')
+        self.assertIsNone(Tarea.tomar_siguiente('pruebas'))
+
+    def test_error_deja_la_tarea_fallida(self):
+        Tarea.encolar(PRUEBA_ERROR, usuario=self.duenno)
+        tarea = self._ejecutar_siguiente()
+
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.FALLIDA)
+        self.assertEqual(tarea.error_breve, "RuntimeError: Fallo de prueba")
+
+    def test_tipo_desconocido(self):
+        with self.assertRaises(ValueError):
+            Tarea.encolar('tests.no_existe')
+
+    def test_toma_por_orden_y_una_sola_vez(self):
+        primera = Tarea.encolar(PRUEBA_OK, {'texto': '1'})
+        segunda = Tarea.encolar(PRUEBA_OK, {'texto': '2'})
+
+        self.assertEqual(Tarea.tomar_siguiente('a').pk, primera.pk)
+        self.assertEqual(Tarea.tomar_siguiente('b').pk, segunda.pk)
+        self.assertIsNone(Tarea.tomar_siguiente('c'))
+        self.assertFalse(Tarea.tomar(primera.pk, 'd'))
+
+    @override_settings(TAREAS_MAX_DURACION=60)
+    def test_liberar_interrumpidas(self):
+        colgada = Tarea.encolar(PRUEBA_OK, {'texto': '1'})
+        en_curso = Tarea.encolar(PRUEBA_OK, {'texto': '2'})
+        ahora = timezone.now()
+        Tarea.objects.filter(pk=colgada.pk).update(estado=Tarea.EN_CURSO, iniciada=ahora - timedelta(seconds=120))
+        Tarea.objects.filter(pk=en_curso.pk).update(estado=Tarea.EN_CURSO, iniciada=ahora)
+
+        self.assertEqual(Tarea.liberar_interrumpidas(), 1)
+        self.assertEqual(Tarea.objects.get(pk=colgada.pk).estado, Tarea.FALLIDA)
+        self.assertEqual(Tarea.objects.get(pk=en_curso.pk).estado, Tarea.EN_CURSO)
+
+    def test_solo_el_duenno_o_staff_ven_la_tarea(self):
+        Tarea.encolar(PRUEBA_OK, {'texto': 'privado'}, usuario=self.duenno)
+        tarea = self._ejecutar_siguiente()
+        estado = reverse('estado_tarea', args=[tarea.pk])
+        descarga = reverse('descargar_tarea', args=[tarea.pk])
+
+        self.client.force_login(self.otro)
+        self.assertEqual(self.client.get(estado).status_code, 404)
+        self.assertEqual(self.client.get(descarga).status_code, 404)
+
+        for usuario in (self.duenno, self.admin):
+            self.client.force_login(usuario)
+            self.assertEqual(self.client.get(estado).status_code, 200)
+            respuesta = self.client.get(descarga)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertEqual(b''.join(respuesta.streaming_content), b'privado')
+            respuesta.close()
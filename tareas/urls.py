@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('<int:pk>/', views.EstadoTareaView.as_view(), name='estado_tarea'),
+    path('<int:pk>/descargar/', views.DescargarResultadoTareaView.as_view(), name='descargar_tarea'),
+]
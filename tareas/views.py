@@ -0,0 +1,42 @@
+import os
+
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views import View
+
+from .models import Tarea
+
+TEMPLATE_ESTADO = 'pages/tareas/partials/estado_tarea.html'
+
+
+def _tarea_del_usuario(request, pk):
+    tarea = get_object_or_404(Tarea, pk=pk)
+    if tarea.usuario_id != request.user.pk and not request.user.is_staff:
+        raise Http404("La tarea no existe.")
+    return tarea
+
+
+def respuesta_tarea(request, tarea):
+    """Respuesta tras encolar: el parcial de progreso (HTMX) o la página de la tarea."""
+    if request.htmx:
+        return render(request, TEMPLATE_ESTADO, {'tarea': tarea})
+    return redirect('estado_tarea', pk=tarea.pk)
+
+
+class EstadoTareaView(View):
+    """Progreso de una tarea. Con HTMX devuelve solo el parcial, que se sondea a sí mismo hasta terminar."""
+
+    def get(self, request, pk):
+        tarea = _tarea_del_usuario(request, pk)
+        template = TEMPLATE_ESTADO if request.htmx else 'pages/tareas/tarea.html'
+        return render(request, template, {'tarea': tarea})
+
+
+class DescargarResultadoTareaView(View):
+    def get(self, request, pk):
+        tarea = _tarea_del_usuario(request, pk)
+        if tarea.estado != Tarea.TERMINADA or not tarea.resultado:
+            raise Http404("La tarea no tiene archivo resultado.")
+        return FileResponse(
+            tarea.resultado.open('rb'), as_attachment=True, filename=os.path.basename(tarea.resultado.name)
+        )